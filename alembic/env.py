@@ -6,6 +6,7 @@ from alembic import context
 from config.setting import settings
 from core.setup import Base
 from models.barcode import Barcode
+from models.daily_movement import DailyMovement
 from models.department import Department
 from models.email import Recipients
 from models.job import Job
@@ -17,8 +18,12 @@ from models.stock import Stock
 from models.stock_adjustment import StockAdjustment
 from models.stock_out import StockOut
 from models.stock_running import StockRunning
+from models.stock_running_history import StockRunningHistory
 from models.evaluation import CostEvaluation
+from models.inventory_movement import InventoryMovement
 from models.category import Category
+from models.code_counter import CodeCounter
+from models.stock_summary import StockSummary
 from models.suppliers import Suppliers
 from models.purchase_order_type import PurchaseOrderTypes
 from models.purchase_order_items import PurchaseOrderItems
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 
 from controllers.auth import Auth
 from schemas.operations import SuccessOut
@@ -9,13 +9,20 @@ op_router = APIRouter()
 
 
 @op_router.post("/login", response_model=LoginOut)
-async def login_staff(data: LoginIn):
-    return Auth.login(data)
+def login_staff(data: LoginIn, request: Request):
+    client_ip = request.client.host if request.client else None
+    return Auth.login(data, client_ip=client_ip)
 
 
 @op_router.post("/change-password", response_model=SuccessOut)
-async def change_staff_password(
+def change_staff_password(
     data: ChangePasswordIn, access_token: str = Depends(bearer_schema)
 ):
     staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
     return Auth.change_password(staff_id=staff_id, data=data)
+
+
+@op_router.post("/logout", response_model=SuccessOut)
+def logout_staff(access_token: str = Depends(bearer_schema)):
+    staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
+    return Auth.logout(staff_id=staff_id)
@@ -4,7 +4,7 @@ from controllers.auth import Auth
 from controllers.operations import StaffOperator
 from controllers.order import OrderOperator as OO
 from error import AppError
-from schemas.order import OrderIn, OrderOut, OrdersDoneOut
+from schemas.order import BatchOrderIn, OrderIn, OrderOut, OrdersDoneOut
 from schemas.stock import RunningStockAvailabilityOut as RSO
 from utils.common import bearer_schema
 
@@ -13,7 +13,7 @@ op_router = APIRouter()
 
 
 @op_router.get("/stock/{barcode_id}/available", response_model=RSO)
-async def check_if_part_is_available(
+def check_if_part_is_available(
     barcode_id: int, access_token: str = Depends(bearer_schema)
 ):
     staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
@@ -23,7 +23,7 @@ async def check_if_part_is_available(
 
 
 @op_router.get("/orders/done", response_model=OrdersDoneOut)
-async def get_number_of_orders_done(access_token: str = Depends(bearer_schema)):
+def get_number_of_orders_done(access_token: str = Depends(bearer_schema)):
     staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
     if not StaffOperator.has_engineer_permission(staff_id):
         raise AppError(message=PERMISSION_ERROR, status_code=403)
@@ -31,7 +31,7 @@ async def get_number_of_orders_done(access_token: str = Depends(bearer_schema)):
 
 
 @op_router.post("/stock/{barcode}/collect", response_model=OrderOut)
-async def buy_or_collect_stock_from_store(
+def buy_or_collect_stock_from_store(
     barcode: str,
     data: OrderIn,
     access_token: str = Depends(bearer_schema),
@@ -42,3 +42,14 @@ async def buy_or_collect_stock_from_store(
     return OO.create_order_for_stock_with(
         barcode=barcode, data=data, user_id=staff_id
     )
+
+
+@op_router.post("/stock/collect/batch", response_model=list[OrderOut])
+def collect_stocks_from_store(
+    data: list[BatchOrderIn],
+    access_token: str = Depends(bearer_schema),
+):
+    staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
+    if not StaffOperator.has_engineer_permission(staff_id):
+        raise AppError(message=PERMISSION_ERROR, status_code=403)
+    return OO.create_orders_for_stocks(lines=data, user_id=staff_id)
@@ -7,6 +7,7 @@ from controllers.operations import (
     StaffOperator,
     GroupsOperator,
 )
+from core.setup import database
 from error import AppError
 from models.email import Recipients
 from models.category import Category
@@ -21,9 +22,12 @@ from schemas.operations import (
     SuccessOut,
     CategoryIn,
     CategoryOut,
+    PoolStatusOut,
+    RedisPoolStatusOut,
 )
 from schemas.staff import StaffIn, StaffOut, UpdateStaffIn, GroupIn, GroupsOut
 from utils.common import bearer_schema
+from utils.redis import Cache
 
 PERMISSION_DENIED = "You do not have permission to perform this operation"
 
@@ -41,7 +45,7 @@ op_router = APIRouter()
 
 
 @op_router.get("/staff", response_model=list[StaffOut])
-async def get_staff_members(access_token: str = Depends(bearer_schema)):
+def get_staff_members(access_token: str = Depends(bearer_schema)):
     staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
     if not StaffOperator.has_stock_controller_permission(staff_id=staff_id):
         raise AppError(
@@ -52,12 +56,12 @@ async def get_staff_members(access_token: str = Depends(bearer_schema)):
 
 
 @op_router.get("/staff/roles", response_model=list[RolesOut])
-async def get_staff_roles():
+def get_staff_roles():
     return StaffOperator.get_all_staff_roles()
 
 
 @op_router.get("/staff/{id}", response_model=StaffOut)
-async def get_staff_member(id: int, access_token: str = Depends(bearer_schema)):
+def get_staff_member(id: int, access_token: str = Depends(bearer_schema)):
     staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
     if StaffOperator.has_stock_controller_permission(
         staff_id=staff_id
@@ -73,7 +77,7 @@ async def get_staff_member(id: int, access_token: str = Depends(bearer_schema)):
 
 
 @op_router.post("/staff", response_model=StaffOut)
-async def add_staff_member(data: StaffIn, access_token: str = Depends(bearer_schema)):
+def add_staff_member(data: StaffIn, access_token: str = Depends(bearer_schema)):
     staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
     if not StaffOperator.has_stock_controller_permission(staff_id=staff_id):
         raise AppError(
@@ -84,7 +88,7 @@ async def add_staff_member(data: StaffIn, access_token: str = Depends(bearer_sch
 
 
 @op_router.delete("/staff/{id}", response_model=SuccessOut)
-async def remove_staff_member(id: int, access_token: str = Depends(bearer_schema)):
+def remove_staff_member(id: int, access_token: str = Depends(bearer_schema)):
     staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
     if not StaffOperator.has_stock_controller_permission(staff_id=staff_id):
         raise AppError(
@@ -96,7 +100,7 @@ async def remove_staff_member(id: int, access_token: str = Depends(bearer_schema
 
 
 @op_router.put("/staff/{id}", response_model=StaffOut)
-async def update_staff_member(
+def update_staff_member(
     id: int, data: UpdateStaffIn, access_token: str = Depends(bearer_schema)
 ):
     staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
@@ -139,17 +143,17 @@ def revoke_user_from_any_group(
 
 
 @op_router.get("/groups", response_model=list[GroupsOut])
-async def get_all_groups():
+def get_all_groups():
     return GroupsOperator.all_groups()
 
 
 @op_router.get("/groups/{id}", response_model=GroupsOut)
-async def get_group_by_id(id: int):
+def get_group_by_id(id: int):
     return GroupsOperator.get_group(id)
 
 
 @op_router.get("/categories", response_model=list[CategoryOut])
-async def get_all_categories(access_token: str = Depends(bearer_schema)):
+def get_all_categories(access_token: str = Depends(bearer_schema)):
     staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
     if not StaffOperator.has_stock_controller_permission(staff_id=staff_id):
         raise AppError(
@@ -160,7 +164,7 @@ async def get_all_categories(access_token: str = Depends(bearer_schema)):
 
 
 @op_router.post("/categories")
-async def create_category(data: CategoryIn, access_token: str = Depends(bearer_schema)):
+def create_category(data: CategoryIn, access_token: str = Depends(bearer_schema)):
     staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
     if not StaffOperator.has_stock_controller_permission(staff_id=staff_id):
         raise AppError(
@@ -171,7 +175,7 @@ async def create_category(data: CategoryIn, access_token: str = Depends(bearer_s
 
 
 @op_router.put("/categories/{category_id}", response_model=CategoryOut)
-async def update_category_by_id(
+def update_category_by_id(
     category_id: int, data: CategoryIn, access_token: str = Depends(bearer_schema)
 ):
     staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
@@ -184,7 +188,7 @@ async def update_category_by_id(
 
 
 @op_router.delete("/categories/{category_id}", response_model=SuccessOut)
-async def delete_category_by_id(
+def delete_category_by_id(
     category_id: int, access_token: str = Depends(bearer_schema)
 ):
     staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
@@ -202,7 +206,7 @@ async def delete_category_by_id(
 
 
 @op_router.get("/job-title", response_model=list[JobOut])
-async def get_all_job_titles(access_token: str = Depends(bearer_schema)):
+def get_all_job_titles(access_token: str = Depends(bearer_schema)):
     staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
     if not StaffOperator.has_stock_controller_permission(staff_id=staff_id):
         raise AppError(
@@ -213,7 +217,7 @@ async def get_all_job_titles(access_token: str = Depends(bearer_schema)):
 
 
 @op_router.post("/job-title", response_model=JobOut)
-async def add_job_title(data: JobIn, access_token: str = Depends(bearer_schema)):
+def add_job_title(data: JobIn, access_token: str = Depends(bearer_schema)):
     staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
     if not StaffOperator.has_stock_controller_permission(staff_id=staff_id):
         raise AppError(
@@ -224,7 +228,7 @@ async def add_job_title(data: JobIn, access_token: str = Depends(bearer_schema))
 
 
 @op_router.get("/job-title/{id}", response_model=JobOut)
-async def get_job_title(id: int, access_token: str = Depends(bearer_schema)):
+def get_job_title(id: int, access_token: str = Depends(bearer_schema)):
     staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
     if not StaffOperator.has_stock_controller_permission(staff_id=staff_id):
         raise AppError(
@@ -238,7 +242,7 @@ async def get_job_title(id: int, access_token: str = Depends(bearer_schema)):
 
 
 @op_router.put("/job-title/{id}", response_model=JobOut)
-async def edit_job_title(
+def edit_job_title(
     id: int, data: JobIn, access_token: str = Depends(bearer_schema)
 ):
     staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
@@ -251,7 +255,7 @@ async def edit_job_title(
 
 
 @op_router.delete("/job-title/{id}", response_model=SuccessOut)
-async def delete_job_title(id: int, access_token: str = Depends(bearer_schema)):
+def delete_job_title(id: int, access_token: str = Depends(bearer_schema)):
     staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
     if not StaffOperator.has_stock_controller_permission(staff_id=staff_id):
         raise AppError(
@@ -263,7 +267,7 @@ async def delete_job_title(id: int, access_token: str = Depends(bearer_schema)):
 
 
 @op_router.get("/department", response_model=list[DepartmentOut])
-async def get_departments(access_token: str = Depends(bearer_schema)):
+def get_departments(access_token: str = Depends(bearer_schema)):
     staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
     if not StaffOperator.has_stock_controller_permission(staff_id=staff_id):
         raise AppError(
@@ -274,7 +278,7 @@ async def get_departments(access_token: str = Depends(bearer_schema)):
 
 
 @op_router.post("/department", response_model=DepartmentOut)
-async def add_department(
+def add_department(
     data: DepartmentIn, access_token: str = Depends(bearer_schema)
 ):
     staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
@@ -287,7 +291,7 @@ async def add_department(
 
 
 @op_router.get("/department/{id}", response_model=DepartmentOut)
-async def get_department(id: int, access_token: str = Depends(bearer_schema)):
+def get_department(id: int, access_token: str = Depends(bearer_schema)):
     staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
     if not StaffOperator.has_stock_controller_permission(staff_id=staff_id):
         raise AppError(
@@ -301,7 +305,7 @@ async def get_department(id: int, access_token: str = Depends(bearer_schema)):
 
 
 @op_router.delete("/department/{id}", response_model=SuccessOut)
-async def delete_department(id: int, access_token: str = Depends(bearer_schema)):
+def delete_department(id: int, access_token: str = Depends(bearer_schema)):
     staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
     if not StaffOperator.has_stock_controller_permission(staff_id=staff_id):
         raise AppError(
@@ -313,7 +317,7 @@ async def delete_department(id: int, access_token: str = Depends(bearer_schema))
 
 
 @op_router.put("/department/{id}", response_model=DepartmentOut)
-async def update_department(
+def update_department(
     id: int, data: DepartmentIn, access_token: str = Depends(bearer_schema)
 ):
     staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
@@ -326,7 +330,7 @@ async def update_department(
 
 
 @op_router.post("/configure/email", response_model=EmailConfigureOut)
-async def configure_email_to_receive_emails(
+def configure_email_to_receive_emails(
     data: EmailConfigureIn, access_token: str = Depends(bearer_schema)
 ):
     staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
@@ -339,7 +343,7 @@ async def configure_email_to_receive_emails(
 
 
 @op_router.put("/configure/email/{id}", response_model=EmailConfigureOut)
-async def change_email(
+def change_email(
     id: int, data: EmailConfigureIn, access_token: str = Depends(bearer_schema)
 ):
     staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
@@ -352,7 +356,7 @@ async def change_email(
 
 
 @op_router.delete("/configure/email/{id}", response_model=SuccessOut)
-async def delete_email(id: int, access_token: str = Depends(bearer_schema)):
+def delete_email(id: int, access_token: str = Depends(bearer_schema)):
     staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
     if not StaffOperator.has_stock_controller_permission(staff_id=staff_id):
         raise AppError(
@@ -364,7 +368,7 @@ async def delete_email(id: int, access_token: str = Depends(bearer_schema)):
 
 
 @op_router.get("/configure/emails", response_model=list[EmailConfigureOut])
-async def get_all_emails_configured(access_token: str = Depends(bearer_schema)):
+def get_all_emails_configured(access_token: str = Depends(bearer_schema)):
     staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
     if not StaffOperator.has_stock_controller_permission(staff_id=staff_id):
         raise AppError(
@@ -372,3 +376,25 @@ async def get_all_emails_configured(access_token: str = Depends(bearer_schema)):
             status_code=401,
         )
     return Recipients.get_all_recipients()
+
+
+@op_router.get("/health/db-pool", response_model=PoolStatusOut)
+def get_database_pool_status(access_token: str = Depends(bearer_schema)):
+    staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
+    if not StaffOperator.has_stock_controller_permission(staff_id=staff_id):
+        raise AppError(
+            message=PERMISSION_DENIED,
+            status_code=401,
+        )
+    return database.get_pool_status()
+
+
+@op_router.get("/health/redis-pool", response_model=RedisPoolStatusOut)
+def get_redis_pool_status(access_token: str = Depends(bearer_schema)):
+    staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
+    if not StaffOperator.has_stock_controller_permission(staff_id=staff_id):
+        raise AppError(
+            message=PERMISSION_DENIED,
+            status_code=401,
+        )
+    return Cache.get_pool_status()
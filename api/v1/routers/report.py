@@ -1,16 +1,20 @@
 from fastapi import APIRouter, Depends, Query
 
 from controllers.auth import Auth
+from controllers.inventory_ledger import InventoryLedgerOperator
 from controllers.operations import StaffOperator
 from error import AppError
 from utils.common import bearer_schema
+from utils.enum import ExportFormat
+from utils.export import stream_export
+from utils.report_cache import ReportCache
 from controllers.report import ReportDashboard
 from schemas.report import (
     ErmReportOut, ErmQuantityOut,
-    MonthlyCollectionOut
+    MonthlyCollectionOut, StockValuationOut
 )
 from schemas.purchase_order import PurchaseOrderOut
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Optional
 
 
@@ -19,7 +23,7 @@ op_router = APIRouter()
 
 
 @op_router.get("/reports")
-async def get_stock_reports(
+def get_stock_reports(
     access_token: str = Depends(bearer_schema)
 ):
     """
@@ -43,18 +47,27 @@ async def get_stock_reports(
     staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
     if not StaffOperator.has_stock_controller_permission(staff_id=staff_id):
         raise AppError(message=PERMISSION_ERROR, status_code=401)
-    return {
-        "department_engineer": ReportDashboard.get_number_of_engineers_in_each_department(),
-        "department_adjustment_order": ReportDashboard.get_department_adjustment_order(),
-        "department_number_quantity_order": ReportDashboard.get_number_and_quantity_orders_each_department(),
-    }
+    return ReportDashboard.get_stock_reports()
+
+
+@op_router.get("/reports/cache")
+def get_report_cache_stats(
+    access_token: str = Depends(bearer_schema)
+):
+    """
+    Hit and miss counters of the report cache, per report.
+    """
+    staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
+    if not StaffOperator.has_stock_controller_permission(staff_id=staff_id):
+        raise AppError(message=PERMISSION_ERROR, status_code=401)
+    return ReportCache.stats()
 
 
 @op_router.get(
     "/erm",
     response_model=list[ErmReportOut]
 )
-async def get_erm_report(
+def get_erm_report(
     from_: Optional[str] = Query(None),
     to_: Optional[str] = Query(None),
     access_token: str = Depends(bearer_schema)
@@ -65,11 +78,32 @@ async def get_erm_report(
     return ReportDashboard.get_erm_report_data(from_, to_)
 
 
+@op_router.get("/erm/export")
+def export_erm_report(
+    from_: Optional[str] = Query(None),
+    to_: Optional[str] = Query(None),
+    export_format: ExportFormat = Query(ExportFormat.ndjson, alias="format"),
+    access_token: str = Depends(bearer_schema)
+):
+    """
+    Stream the ERM report for a date range as NDJSON or CSV, written row by
+    row so the memory used does not grow with the range requested.
+    """
+    staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
+    if not StaffOperator.has_stock_controller_permission(staff_id=staff_id):
+        raise AppError(message=PERMISSION_ERROR, status_code=401)
+    return stream_export(
+        ReportDashboard.stream_erm_report_data(from_, to_),
+        export_format,
+        "erm_report",
+    )
+
+
 @op_router.get(
     "/reports/erm_code",
     response_model=list[ErmQuantityOut]
 )
-async def get_erm_code_quantity(
+def get_erm_code_quantity(
     access_token: str = Depends(bearer_schema)
 ):
     staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
@@ -79,7 +113,7 @@ async def get_erm_code_quantity(
 
 
 @op_router.get("/analysis/{barcode}")
-async def get_analysis_report(
+def get_analysis_report(
     barcode: str,
     from_: Optional[str] = Query(None),
     to_: Optional[str] = Query(default=str(datetime.now().date())),
@@ -111,7 +145,7 @@ async def get_analysis_report(
 
 
 @op_router.get("/analysis/department/{department_id}")
-async def get_analysis_report_by_department(
+def get_analysis_report_by_department(
     department_id: int,
     from_: Optional[str] = Query(None),
     to_: Optional[str] = Query(None),
@@ -128,7 +162,7 @@ async def get_analysis_report_by_department(
 
 
 @op_router.get("/analysis/purchase-orders/{supplier_id}", response_model=list[PurchaseOrderOut])
-async def get_analysis_for_purchase_orders_for_supplier(
+def get_analysis_for_purchase_orders_for_supplier(
     supplier_id: int,
     from_: Optional[str] = Query(None),
     to_: Optional[str] = Query(None),
@@ -145,7 +179,7 @@ async def get_analysis_for_purchase_orders_for_supplier(
 
 
 @op_router.get("/analysis/erm_code/{erm_code}")
-async def get_analysis_report_by_erm_code(
+def get_analysis_report_by_erm_code(
     erm_code: str,
     from_: Optional[str] = Query(None),
     to_: Optional[str] = Query(None),
@@ -166,7 +200,7 @@ async def get_analysis_report_by_erm_code(
     "/collection/monthly",
     response_model=list[MonthlyCollectionOut]
 )
-async def get_collection_report(
+def get_collection_report(
     year: int = Query(None),
     access_token: str = Depends(bearer_schema)
 ):
@@ -180,10 +214,29 @@ async def get_collection_report(
     "/collection/years",
     response_model=list[int]
 )
-async def get_collection_yearly_values(
+def get_collection_yearly_values(
     access_token: str = Depends(bearer_schema)
 ):
     staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
     if not StaffOperator.has_stock_controller_permission(staff_id=staff_id):
         raise AppError(message=PERMISSION_ERROR, status_code=401)
     return ReportDashboard.get_collection_yearly_values()
+
+
+@op_router.get("/valuation", response_model=list[StockValuationOut])
+def get_stock_valuation(
+    as_of: Optional[str] = Query(None),
+    access_token: str = Depends(bearer_schema)
+):
+    """
+    Value the stock remaining of every barcode first in, first out, at the
+    end of the day given or now.
+    """
+    staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
+    if not StaffOperator.has_stock_controller_permission(staff_id=staff_id):
+        raise AppError(message=PERMISSION_ERROR, status_code=401)
+    as_of_datetime = None
+    if as_of:
+        as_of_datetime = datetime.strptime(as_of, '%Y-%m-%d') + \
+            timedelta(hours=23, minutes=59, seconds=59)
+    return InventoryLedgerOperator.valuation(as_of=as_of_datetime)
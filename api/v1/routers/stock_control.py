@@ -1,6 +1,7 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Response
 
 from controllers.auth import Auth
+from controllers.barcode_import import BarcodeImportOperator
 from controllers.operations import StaffOperator
 from controllers.order import OrderOperator
 from controllers.stock import StockOperator, ScanStock
@@ -12,6 +13,7 @@ from schemas.operations import SuccessOut
 from schemas.order import OrderOut
 from schemas.stock import (
     Barcode,
+    BarcodeImportOut,
     RunningStockOut,
     StockAdjustmentGroupOut,
     StockAdjustmentIn,
@@ -19,14 +21,20 @@ from schemas.stock import (
     StockIn,
     StockOut,
     StockOutOut,
+    StockSummaryOut,
     UpdateStockAdjustmentIn,
     StockQuery,
+    PageQuery,
     BarcodeIn,
     UpdateIn,
     CostEvaluationOut
 )
 from utils.common import bearer_schema
-from typing import Optional
+from utils.countFilter import set_next_cursor
+from utils.enum import ExportFormat, ImportFormat
+from utils.export import stream_export
+from utils.upload import read_rows, spooled_body
+from typing import BinaryIO, Optional
 
 
 PERMISSION_ERROR = "You do not have permission to perform this operation"
@@ -34,17 +42,23 @@ op_router = APIRouter()
 
 
 @op_router.get("/barcodes", response_model=list[Barcode])
-async def get_available_barcodes(access_token: str = Depends(bearer_schema)):
+def get_available_barcodes(
+    response: Response,
+    access_token: str = Depends(bearer_schema),
+    page: PageQuery = Depends(),
+):
     staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
     if StaffOperator.has_stock_controller_permission(
         staff_id=staff_id
     ) or StaffOperator.has_engineer_permission(staff_id):
-        return StockOperator.get_all_barcodes()
+        barcodes, next_cursor = StockOperator.get_all_barcodes(page=page)
+        set_next_cursor(response, next_cursor)
+        return barcodes
     raise AppError(message=PERMISSION_ERROR, status_code=401)
 
 
 @op_router.post("/barcode", response_model=Barcode)
-async def add_scan_stock(
+def add_scan_stock(
     data: BarcodeIn,
     access_token: str = Depends(bearer_schema)
 ):
@@ -56,8 +70,34 @@ async def add_scan_stock(
     raise AppError(message=PERMISSION_ERROR, status_code=401)
 
 
+@op_router.post(
+    "/barcodes/import",
+    response_model=BarcodeImportOut,
+    openapi_extra={
+        "requestBody": {
+            "content": {
+                "text/csv": {"schema": {"type": "string"}},
+                "application/x-ndjson": {"schema": {"type": "string"}},
+            },
+            "required": True,
+        }
+    },
+)
+def import_scan_stocks(
+    format: ImportFormat = Query(ImportFormat.csv),
+    body: BinaryIO = Depends(spooled_body),
+    access_token: str = Depends(bearer_schema),
+):
+    staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
+    if StaffOperator.has_stock_controller_permission(
+        staff_id=staff_id
+    ):
+        return BarcodeImportOperator.import_rows(read_rows(body, format))
+    raise AppError(message=PERMISSION_ERROR, status_code=401)
+
+
 @op_router.get("/barcode/{barcode_id}", response_model=Barcode)
-async def get_scan_stock(
+def get_scan_stock(
     barcode_id: int,
     access_token: str = Depends(bearer_schema)
 ):
@@ -70,7 +110,7 @@ async def get_scan_stock(
 
 
 @op_router.delete("/barcode/{barcode_id}", response_model=SuccessOut)
-async def delete_scan_stock(
+def delete_scan_stock(
     barcode_id: int,
     access_token: str = Depends(bearer_schema)
 ):
@@ -84,7 +124,7 @@ async def delete_scan_stock(
 
 
 @op_router.put("/barcode/{barcode_id}", response_model=Barcode)
-async def edit_scan_stock(
+def edit_scan_stock(
     barcode_id: int, data: UpdateIn,
     access_token: str = Depends(bearer_schema)
 ):
@@ -97,7 +137,7 @@ async def edit_scan_stock(
 
 
 @op_router.get("/stock/{id}", response_model=StockOut)
-async def get_stock_by_id(id: int, access_token: str = Depends(bearer_schema)):
+def get_stock_by_id(id: int, access_token: str = Depends(bearer_schema)):
     staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
     if not StaffOperator.has_stock_controller_permission(staff_id=staff_id):
         raise AppError(message=PERMISSION_ERROR, status_code=401)
@@ -108,7 +148,7 @@ async def get_stock_by_id(id: int, access_token: str = Depends(bearer_schema)):
 
 
 @op_router.get("/stock/barcode/{barcode}", response_model=StockOut)
-async def get_stock_by_barcode(
+def get_stock_by_barcode(
     barcode: str, access_token: str = Depends(bearer_schema)
 ):
     staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
@@ -121,25 +161,40 @@ async def get_stock_by_barcode(
 
 
 @op_router.get("/stock-in/history", response_model=list[StockOut])
-async def get_all_stocks_delivered(access_token: str = Depends(bearer_schema)):
+def get_all_stocks_delivered(
+    response: Response,
+    access_token: str = Depends(bearer_schema),
+    page: PageQuery = Depends(),
+):
     staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
     if not StaffOperator.has_stock_controller_permission(staff_id=staff_id):
         raise AppError(message=PERMISSION_ERROR, status_code=401)
-    return StockOperator.get_all_stocks()
+    stocks, next_cursor = StockOperator.get_all_stocks(page=page)
+    set_next_cursor(response, next_cursor)
+    return stocks
 
 
-@op_router.get("/stock-in", response_model=list[Barcode])
-async def get_all_stocks_per_barcode(access_token: str = Depends(bearer_schema)):
+@op_router.get("/stock-in", response_model=list[StockSummaryOut])
+def get_all_stocks_per_barcode(
+    response: Response,
+    access_token: str = Depends(bearer_schema),
+    page: PageQuery = Depends(),
+    with_prices: bool = Query(False),
+):
     staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
     if StaffOperator.has_stock_controller_permission(
         staff_id=staff_id
     ) or StaffOperator.has_engineer_permission(staff_id):
-        return StockOperator.group_all_stock_barcode()
+        summaries, next_cursor = StockOperator.group_all_stock_barcode(
+            page=page, with_prices=with_prices
+        )
+        set_next_cursor(response, next_cursor)
+        return summaries
     raise AppError(message=PERMISSION_ERROR, status_code=401)
 
 
 @op_router.get("/stock-in/{barcode}", response_model=Barcode)
-async def get_all_stocks_per_barcode_with_specific_barcode(
+def get_all_stocks_per_barcode_with_specific_barcode(
     barcode: str, access_token: str = Depends(bearer_schema)
 ):
     staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
@@ -152,15 +207,24 @@ async def get_all_stocks_per_barcode_with_specific_barcode(
 
 
 @op_router.post("/stock", response_model=StockOut)
-async def create_stock(data: StockIn, access_token: str = Depends(bearer_schema)):
+def create_stock(data: StockIn, access_token: str = Depends(bearer_schema)):
     staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
     if not StaffOperator.has_stock_controller_permission(staff_id=staff_id):
         raise AppError(message=PERMISSION_ERROR, status_code=401)
     return StockOperator.add_stock(data, staff_id)
 
 
+@op_router.post("/stock/bulk", response_model=list[StockOut])
+def create_stocks(data: list[StockIn], access_token: str = Depends(bearer_schema)):
+    staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
+    if not StaffOperator.has_stock_controller_permission(staff_id=staff_id):
+        raise AppError(message=PERMISSION_ERROR, status_code=401)
+    stock_ids = StockOperator.add_stocks(data, staff_id)
+    return StockOperator.get_stocks_by_ids(stock_ids)
+
+
 @op_router.put("/stock/{id}", response_model=StockOut)
-async def update_stock_info(
+def update_stock_info(
     id: int, data: StockIn, access_token: str = Depends(bearer_schema)
 ):
     staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
@@ -170,7 +234,7 @@ async def update_stock_info(
 
 
 @op_router.delete("/stock/{id}", response_model=SuccessOut)
-async def delete_stock(id: int, access_token: str = Depends(bearer_schema)):
+def delete_stock(id: int, access_token: str = Depends(bearer_schema)):
     staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
     if not StaffOperator.has_stock_controller_permission(staff_id=staff_id):
         raise AppError(message=PERMISSION_ERROR, status_code=401)
@@ -180,15 +244,21 @@ async def delete_stock(id: int, access_token: str = Depends(bearer_schema)):
 
 
 @op_router.get("/stock-out/history", response_model=list[StockOutOut])
-async def get_stock_outs(access_token: str = Depends(bearer_schema)):
+def get_stock_outs(
+    response: Response,
+    access_token: str = Depends(bearer_schema),
+    page: PageQuery = Depends(),
+):
     staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
     if not StaffOperator.has_stock_controller_permission(staff_id=staff_id):
         raise AppError(message=PERMISSION_ERROR, status_code=401)
-    return StockOutOperator.get_all_stocks()
+    stock_outs, next_cursor = StockOutOperator.get_all_stocks(page=page)
+    set_next_cursor(response, next_cursor)
+    return stock_outs
 
 
 @op_router.get("/stock-out", response_model=list[Barcode])
-async def get_stock_out_group_data(
+def get_stock_out_group_data(
     access_token: str = Depends(bearer_schema),
     query_params: StockQuery = Depends(),
 ):
@@ -199,7 +269,7 @@ async def get_stock_out_group_data(
 
 
 @op_router.get("/stock-out/{stock_id}", response_model=Barcode)
-async def get_stock_out_group_data_by_id(
+def get_stock_out_group_data_by_id(
     stock_id: int, access_token: str = Depends(bearer_schema)
 ):
     staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
@@ -215,7 +285,7 @@ async def get_stock_out_group_data_by_id(
     "/stock-adjustment/{barcode}",
     response_model=SuccessOut,
 )
-async def create_stock_adjustment(
+def create_stock_adjustment(
     barcode: str, data: StockAdjustmentIn, access_token: str = Depends(bearer_schema)
 ):
     staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
@@ -226,15 +296,21 @@ async def create_stock_adjustment(
         return {"message": "Stock adjustment created successfully"}
 
 @op_router.get("/stock-adjustment/history", response_model=list[StockAdjustmentOut])
-async def get_stock_adjustment_history(access_token: str = Depends(bearer_schema)):
+def get_stock_adjustment_history(
+    response: Response,
+    access_token: str = Depends(bearer_schema),
+    page: PageQuery = Depends(),
+):
     staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
     if not StaffOperator.has_stock_controller_permission(staff_id=staff_id):
         raise AppError(message=PERMISSION_ERROR, status_code=401)
-    return SA.get_all_stock_adjustments()
+    adjustments, next_cursor = SA.get_all_stock_adjustments(page=page)
+    set_next_cursor(response, next_cursor)
+    return adjustments
 
 
 @op_router.get("/stock-adjustment", response_model=list[StockAdjustmentGroupOut])
-async def get_stock_adjustment_grouped(
+def get_stock_adjustment_grouped(
     access_token: str = Depends(bearer_schema),
     query_params: StockQuery = Depends(),
 ):
@@ -245,7 +321,7 @@ async def get_stock_adjustment_grouped(
 
 
 @op_router.get("/stock-adjustment/{barcode}", response_model=StockAdjustmentGroupOut)
-async def get_stock_adjustment_grouped_by_stock_id(
+def get_stock_adjustment_grouped_by_stock_id(
     barcode: str, access_token: str = Depends(bearer_schema)
 ):
     staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
@@ -258,7 +334,7 @@ async def get_stock_adjustment_grouped_by_stock_id(
 
 
 @op_router.put("/stock-adjustment/{id}", response_model=StockAdjustmentOut)
-async def edit_stock_adjustment(
+def edit_stock_adjustment(
     id: int, data: UpdateStockAdjustmentIn, access_token: str = Depends(bearer_schema)
 ):
     staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
@@ -268,7 +344,7 @@ async def edit_stock_adjustment(
 
 
 @op_router.delete("/stock-adjustment/{id}", response_model=SuccessOut)
-async def delete_stock_adjustment(id: int, access_token: str = Depends(bearer_schema)):
+def delete_stock_adjustment(id: int, access_token: str = Depends(bearer_schema)):
     staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
     if not StaffOperator.has_stock_controller_permission(staff_id=staff_id):
         raise AppError(message=PERMISSION_ERROR, status_code=401)
@@ -278,7 +354,7 @@ async def delete_stock_adjustment(id: int, access_token: str = Depends(bearer_sc
 
 
 @op_router.get("/stock-running", response_model=list[RunningStockOut])
-async def get_running_stocks(
+def get_running_stocks(
     access_token: str = Depends(bearer_schema),
     query_params: StockQuery = Depends(),
 ):
@@ -290,22 +366,47 @@ async def get_running_stocks(
     raise AppError(message=PERMISSION_ERROR, status_code=401)
 
 
+@op_router.get("/orders/export")
+def export_orders(
+    from_: Optional[str] = Query(None),
+    to_: Optional[str] = Query(None),
+    export_format: ExportFormat = Query(ExportFormat.ndjson, alias="format"),
+    access_token: str = Depends(bearer_schema),
+):
+    staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
+    if not StaffOperator.has_stock_controller_permission(staff_id=staff_id):
+        raise AppError(message=PERMISSION_ERROR, status_code=401)
+    return stream_export(
+        OrderOperator.stream_orders(from_=from_, to_=to_), export_format, "orders"
+    )
+
+
 @op_router.get("/orders", response_model=list[OrderOut])
-async def get_all_orders(
+def get_all_orders(
+    response: Response,
     from_: Optional[str] = Query(None),
     to_: Optional[str] = Query(None),
-    access_token: str = Depends(bearer_schema)
+    access_token: str = Depends(bearer_schema),
+    page: PageQuery = Depends(),
 ):
     staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
     if not StaffOperator.has_stock_controller_permission(staff_id=staff_id):
         raise AppError(message=PERMISSION_ERROR, status_code=401)
-    return OrderOperator.get_all_orders(from_=from_, to_=to_)
+    orders, next_cursor = OrderOperator.get_all_orders(from_=from_, to_=to_, page=page)
+    set_next_cursor(response, next_cursor)
+    return orders
 
 
 @op_router.get("/cost-evaluation", response_model=list[CostEvaluationOut])
-async def get_all_cost_evaluation(access_token: str = Depends(bearer_schema)):
+def get_all_cost_evaluation(
+    response: Response,
+    access_token: str = Depends(bearer_schema),
+    page: PageQuery = Depends(),
+):
     staff_id = Auth.verify_token(token=access_token.credentials, for_="login")
     if not StaffOperator.has_stock_controller_permission(staff_id=staff_id):
         raise AppError(message=PERMISSION_ERROR, status_code=401)
-    return StockOperator.get_all_cost_evaluation_data()
+    evaluations, next_cursor = StockOperator.get_all_cost_evaluation_data(page=page)
+    set_next_cursor(response, next_cursor)
+    return evaluations
 
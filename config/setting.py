@@ -9,6 +9,13 @@ class AppSettings(BaseSettings):
     REDIS_HOST: str
     REDIS_PORT: int
     REDIS_PASSWORD: str
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_POOL_TIMEOUT: float = 2
+    REDIS_SOCKET_TIMEOUT: float = 2
+    REDIS_CONNECT_TIMEOUT: float = 2
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30
+    REDIS_CLIENT_CACHE: bool = False
+    REDIS_CLIENT_CACHE_SIZE: int = 10000
     MAIL_USERNAME: str
     MAIL_PASSWORD: str
     MAIL_FROM: str
@@ -20,6 +27,36 @@ class AppSettings(BaseSettings):
     USE_CREDENTIALS: bool
     VALIDATE_CERTS: str
     MAIL_DEBUG: bool
+    MAIL_TIMEOUT: int = 30
+    EMAIL_TEMPLATE_AUTO_RELOAD: bool = False
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    PRINCIPAL_CACHE_TTL: int = 60
+    AUTH_VERIFY_MODE: str = "redis"
+    AUTH_REVOCATION_CACHE_TTL: int = 30
+    AUTH_REVOCATION_CACHE_SIZE: int = 4096
+    EXPORT_YIELD_PER: int = 1000
+    UPLOAD_SPOOL_SIZE: int = 1024 * 1024
+    BARCODE_IMPORT_CHUNK_SIZE: int = 1000
+    REPORT_CACHE_ENABLED: bool = True
+    REPORT_CACHE_TTL: int = 300
+    REPORT_CACHE_LOCK_TIMEOUT: int = 10
+    REPORT_QUERY_CONCURRENCY: int = 4
+    THREADPOOL_SIZE: int = 15
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 0
+    PASSWORD_HASH_QUEUE_LIMIT: int = 32
+    LOGIN_MAX_ATTEMPTS: int = 5
+    LOGIN_IP_MAX_ATTEMPTS: int = 0
+    LOGIN_THROTTLE_WINDOW: int = 300
+    FORWARDED_ALLOW_IPS: str = "127.0.0.1"
+    REORDER_NOTIFICATION_WINDOW: int = 3600
+    REORDER_DIGEST_DELAY: int = 60
+    RECIPIENTS_CACHE_TTL: int = 3600
+    STOCK_HISTORY_DETAIL_DAYS: int = 90
 
     class Config:
         env_file = ".env"
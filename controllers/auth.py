@@ -8,12 +8,13 @@ from controllers.operations import StaffOperator
 from error import AppError
 from schemas.staff import ChangePasswordIn, LoginIn
 from utils.redis import Cache
+from utils.revocation import RevocationList
 
 
 class Auth:
     @staticmethod
-    def login(data: LoginIn):
-        staff = StaffOperator.validate_staff_credentials(data)
+    def login(data: LoginIn, client_ip: str = None):
+        staff = StaffOperator.validate_staff_credentials(data, client_ip)
         access_token, expires_in = Auth.generate_access_token(
             staff_id=staff.id, for_="login", expires_in_time=1440
         )
@@ -23,7 +24,14 @@ class Auth:
     def verify_token(token: str, for_) -> bool:
         staff_data = Auth.decode_token(token)
         staff_id = staff_data.get("id")
-        value = Cache.get(f"{for_}_{staff_id}")
+        if settings.AUTH_VERIFY_MODE == "stateless":
+            # the signature and exp are checked by decode_token, only
+            # tokens issued before a revocation are rejected here
+            if RevocationList.revoked(staff_id, staff_data.get("iat", 0)):
+                raise AppError(message="Token has expired", status_code=403)
+            return staff_id
+        # token state is not cached, an unavailable Redis fails the request
+        value = Cache._redis.get(f"{for_}_{staff_id}")
         if not value:
             raise AppError(message="Token has expired", status_code=403)
         return staff_id
@@ -32,8 +40,19 @@ class Auth:
     def change_password(staff_id: int, data: ChangePasswordIn):
         status = StaffOperator.change_staff_password(staff_id, data)
         if status:
+            Auth.revoke_tokens(staff_id)
             return {"message": "Password has been changed"}
 
+    @staticmethod
+    def logout(staff_id: int):
+        Auth.revoke_tokens(staff_id)
+        return {"message": "Logged out successfully"}
+
+    @staticmethod
+    def revoke_tokens(staff_id: int) -> None:
+        Cache._redis.delete(f"login_{staff_id}")
+        RevocationList.revoke(staff_id)
+
     @staticmethod
     def generate_access_token(
         staff_id: int,
@@ -42,11 +61,16 @@ class Auth:
     ) -> tuple[str, Any]:
         created_at = datetime.now(timezone.utc)
         expires_in = created_at + timedelta(minutes=expires_in_time)
-        data = {"id": staff_id, "exp": expires_in, "iat": created_at}
+        # issued at to the millisecond, to compare with revocations
+        data = {
+            "id": staff_id,
+            "exp": expires_in,
+            "iat": round(created_at.timestamp(), 3),
+        }
         access_token = jwt.encode(data, settings.APP_SECRET_KEY)
-        Cache.set(
-            key=f"{for_}_{staff_id}",
-            value=access_token,
+        Cache._redis.set(
+            f"{for_}_{staff_id}",
+            access_token,
             ex=timedelta(minutes=expires_in_time),
         )
         return access_token, expires_in_time
@@ -0,0 +1,224 @@
+import argparse
+import json
+from typing import Any, Iterable, Optional
+
+from pydantic import ValidationError
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from config.setting import settings
+from controllers.code_counter import CodeCounterOperator
+from controllers.daily_movement import DailyMovementOperator as DM
+from models.barcode import Barcode
+from models.category import Category
+from schemas.stock import BarcodeIn
+from utils.enum import ImportFormat
+from utils.generate import code_prefix
+from utils.report_cache import ReportCache
+from utils.session import DBSession, commit
+from utils.upload import read_rows
+
+
+class BarcodeImportOperator:
+    @staticmethod
+    def import_rows(
+        rows: Iterable[tuple[int, Optional[dict[str, Any]]]],
+        chunk_size: int = None,
+    ) -> dict[str, Any]:
+        """
+        Insert or update barcodes from rows read one at a time.
+
+        Rows are validated as they come and written in chunks, each chunk in
+        a transaction of its own with a single INSERT ... ON CONFLICT
+        (barcode) DO UPDATE. A barcode already known keeps its code and gets
+        the specification, location, category and ERM code of its row. An
+        invalid row, or a chunk failing to write, is reported and the rows
+        after it are still imported.
+
+        Args:
+            rows: the line number and content of each row, as read_rows
+                yields them
+            chunk_size: rows written per statement,
+                BARCODE_IMPORT_CHUNK_SIZE by default
+
+        Returns:
+            the number of barcodes inserted and updated, and the line,
+            barcode and message of each row not imported
+        """
+        report = {"inserted": 0, "updated": 0, "errors": []}
+        chunk_size = chunk_size or settings.BARCODE_IMPORT_CHUNK_SIZE
+        with DBSession(shared=False) as db:
+            # categories are few, they are looked up once for the whole file
+            categories = dict(
+                db.execute(select(Category.name, Category.id)).all()
+            )
+
+        chunk: dict[str, tuple[int, BarcodeIn]] = {}
+        try:
+            for line, row in rows:
+                barcode = BarcodeImportOperator._validate(
+                    line, row, categories, report["errors"]
+                )
+                if barcode is None:
+                    continue
+                if barcode.barcode in chunk:
+                    report["errors"].append(
+                        {
+                            "line": chunk[barcode.barcode][0],
+                            "barcode": barcode.barcode,
+                            "message": f"Replaced by line {line}",
+                        }
+                    )
+                chunk[barcode.barcode] = (line, barcode)
+                if len(chunk) >= chunk_size:
+                    BarcodeImportOperator._write(chunk, categories, report)
+                    chunk = {}
+        except UnicodeDecodeError as e:
+            report["errors"].append(
+                {
+                    "line": None,
+                    "barcode": None,
+                    "message": f"Invalid file encoding: {e}",
+                }
+            )
+        if chunk:
+            BarcodeImportOperator._write(chunk, categories, report)
+
+        if report["inserted"] or report["updated"]:
+            ReportCache.invalidate("barcodes")
+        report["errors"].sort(key=lambda error: error["line"] or 0)
+        return report
+
+    @staticmethod
+    def _validate(
+        line: int,
+        row: Optional[dict[str, Any]],
+        categories: dict[str, int],
+        errors: list[dict[str, Any]],
+    ) -> Optional[BarcodeIn]:
+        if row is None:
+            errors.append(
+                {"line": line, "barcode": None, "message": "Invalid JSON object"}
+            )
+            return None
+        try:
+            barcode = BarcodeIn.model_validate(row)
+        except ValidationError as e:
+            error = e.errors()[0]
+            errors.append(
+                {
+                    "line": line,
+                    "barcode": row.get("barcode"),
+                    "message": f"invalid {error['loc'][-1]}: {error['msg']}",
+                }
+            )
+            return None
+        if barcode.category not in categories:
+            errors.append(
+                {
+                    "line": line,
+                    "barcode": barcode.barcode,
+                    "message": f"Unknown category: {barcode.category}",
+                }
+            )
+            return None
+        return barcode
+
+    @staticmethod
+    def _write(
+        chunk: dict[str, tuple[int, BarcodeIn]],
+        categories: dict[str, int],
+        report: dict[str, Any],
+    ) -> None:
+        try:
+            with DBSession(shared=False) as db:
+                existing = {
+                    row.barcode: row
+                    for row in db.execute(
+                        select(
+                            Barcode.id, Barcode.barcode, Barcode.code, Barcode.erm_code
+                        ).where(Barcode.barcode.in_(list(chunk)))
+                    )
+                }
+                by_prefix: dict[str, list[str]] = {}
+                for scanned, (_, data) in chunk.items():
+                    if scanned not in existing:
+                        by_prefix.setdefault(code_prefix(data.category), []).append(
+                            scanned
+                        )
+                codes = {scanned: existing[scanned].code for scanned in existing}
+                for prefix in sorted(by_prefix):
+                    reserved = CodeCounterOperator.reserve(
+                        db, prefix, len(by_prefix[prefix])
+                    )
+                    codes.update(zip(by_prefix[prefix], reserved))
+
+                statement = insert(Barcode).values(
+                    [
+                        {
+                            **data.model_dump(exclude={"category"}),
+                            "code": codes[scanned],
+                            "category_id": categories[data.category],
+                        }
+                        for scanned, (_, data) in chunk.items()
+                    ]
+                )
+                db.execute(
+                    statement.on_conflict_do_update(
+                        index_elements=[Barcode.barcode],
+                        set_={
+                            "specification": statement.excluded.specification,
+                            "location": statement.excluded.location,
+                            "category_id": statement.excluded.category_id,
+                            "erm_code": func.coalesce(
+                                statement.excluded.erm_code, Barcode.erm_code
+                            ),
+                        },
+                    )
+                )
+                for scanned, row in existing.items():
+                    erm_code = chunk[scanned][1].erm_code
+                    if erm_code and erm_code != row.erm_code:
+                        DM.rename_erm_code(db, row.id, erm_code)
+                commit(db)
+        except SQLAlchemyError as e:
+            print("Barcode import chunk failed", e)
+            report["errors"].extend(
+                {"line": line, "barcode": scanned, "message": "Could not be saved"}
+                for scanned, (line, _) in chunk.items()
+            )
+            return
+        report["updated"] += len(existing)
+        report["inserted"] += len(chunk) - len(existing)
+
+    @staticmethod
+    def import_file(path: str, import_format: ImportFormat) -> dict[str, Any]:
+        with open(path, "rb") as file:
+            return BarcodeImportOperator.import_rows(read_rows(file, import_format))
+
+
+if __name__ == "__main__":
+    # outside the app, importing the purchase order controller maps every
+    # model related to barcodes
+    import controllers.purchase_order  # noqa: F401
+
+    parser = argparse.ArgumentParser(
+        description="Insert or update barcodes from a CSV or NDJSON file."
+    )
+    parser.add_argument("path")
+    parser.add_argument(
+        "--format",
+        choices=[value.name for value in ImportFormat],
+        help="the format of the file, guessed from its extension by default",
+    )
+    arguments = parser.parse_args()
+    import_format = ImportFormat[
+        arguments.format
+        or ("ndjson" if arguments.path.endswith((".ndjson", ".jsonl")) else "csv")
+    ]
+    print(
+        json.dumps(
+            BarcodeImportOperator.import_file(arguments.path, import_format), indent=2
+        )
+    )
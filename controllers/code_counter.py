@@ -0,0 +1,36 @@
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from models.code_counter import CodeCounter
+from utils.generate import format_code
+
+
+class CodeCounterOperator:
+    @staticmethod
+    def reserve(db: Session, prefix: str, count: int = 1) -> list[str]:
+        """
+        Reserve the next codes of a prefix, in the transaction of ``db``.
+
+        The counter row of the code prefix is created or incremented by a
+        single upsert, which holds its lock until the transaction ends.
+
+        Args:
+            db (Session): The session the barcodes are created with.
+            prefix (str): The code prefix of the category of the barcodes.
+            count (int): The number of codes to reserve.
+
+        Returns:
+            list[str]: The codes reserved, in increasing order.
+        """
+        statement = insert(CodeCounter).values(prefix=prefix, last_value=count)
+        last_value = db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[CodeCounter.prefix],
+                set_={"last_value": CodeCounter.last_value + count},
+            ).returning(CodeCounter.last_value)
+        ).scalar_one()
+        first_value = last_value - count + 1
+        return [
+            format_code(prefix, number)
+            for number in range(first_value, last_value + 1)
+        ]
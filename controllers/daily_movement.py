@@ -0,0 +1,195 @@
+import datetime
+from typing import Any
+
+from sqlalchemy import Date, Select, cast, delete, func, literal, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from models.barcode import Barcode
+from models.daily_movement import DailyMovement, NO_DEPARTMENT, NO_ERM_CODE
+from models.order import Orders
+from models.staff import Staff
+from models.stock import Stock
+from models.stock_adjustment import StockAdjustment
+from utils.report_cache import ReportCache
+from utils.session import DBSession, commit
+
+KEY = ("day", "barcode_id", "department_id", "erm_code")
+
+
+def _add_on_conflict(statement, measures: list[str]):
+    """
+    Sum the measures of rows landing on an existing key into it.
+    """
+    return statement.on_conflict_do_update(
+        index_elements=KEY,
+        set_={
+            measure: getattr(DailyMovement, measure) + statement.excluded[measure]
+            for measure in measures
+        },
+    )
+
+
+class DailyMovementOperator:
+    @staticmethod
+    def record(
+        db: Session,
+        day: datetime.date,
+        barcode_id: int,
+        department_id: int = None,
+        **measures: float,
+    ) -> None:
+        """
+        Add a movement to the rollup of its day, in the transaction of ``db``.
+
+        Args:
+            db (Session): The session the movement is written with.
+            day (date): The day the movement belongs to.
+            barcode_id (int): The barcode moved, its ERM code is looked up.
+            department_id (int): The department the movement is for, if any.
+            **measures: Changes of the rollup measures, e.g. out_quantity=2.
+        """
+        DailyMovementOperator.record_many(
+            db,
+            [
+                {
+                    "day": day,
+                    "barcode_id": barcode_id,
+                    "department_id": department_id,
+                    **measures,
+                }
+            ],
+        )
+
+    @staticmethod
+    def record_many(db: Session, movements: list[dict[str, Any]]) -> None:
+        """
+        Add many movements to the rollup with a single statement.
+
+        Args:
+            db (Session): The session the movements are written with.
+            movements (list[dict]): The day, barcode_id and department_id of
+                each movement with the changes of its measures, as taken
+                by record. Movements on the same key are summed first.
+        """
+        totals: dict[tuple, dict[str, Any]] = {}
+        for movement in movements:
+            measures = dict(movement)
+            key = (
+                measures.pop("day"),
+                measures.pop("barcode_id"),
+                measures.pop("department_id", None) or NO_DEPARTMENT,
+            )
+            total = totals.setdefault(key, {})
+            for measure, value in measures.items():
+                total[measure] = total.get(measure, 0) + value
+        if not totals:
+            return
+
+        measures = sorted({measure for total in totals.values() for measure in total})
+        rows = [
+            {
+                "day": day,
+                "barcode_id": barcode_id,
+                "department_id": department_id,
+                "erm_code": select(func.coalesce(Barcode.erm_code, NO_ERM_CODE))
+                .where(Barcode.id == barcode_id)
+                .scalar_subquery(),
+                **{measure: total.get(measure, 0) for measure in measures},
+            }
+            for (day, barcode_id, department_id), total in totals.items()
+        ]
+        db.execute(_add_on_conflict(insert(DailyMovement).values(rows), measures))
+
+    @staticmethod
+    def rename_erm_code(db: Session, barcode_id: int, erm_code: str) -> None:
+        db.execute(
+            update(DailyMovement)
+            .where(DailyMovement.barcode_id == barcode_id)
+            .values(erm_code=erm_code or NO_ERM_CODE)
+        )
+
+    @staticmethod
+    def _stock_in_rows() -> Select:
+        day = cast(Stock.created_at, Date)
+        erm_code = func.coalesce(Barcode.erm_code, NO_ERM_CODE)
+        return (
+            select(
+                day.label("day"),
+                Stock.barcode_id,
+                literal(NO_DEPARTMENT).label("department_id"),
+                erm_code.label("erm_code"),
+                func.sum(Stock.quantity_initiated).label("in_quantity"),
+                func.sum(Stock.quantity_initiated * Stock.cost).label("in_cost"),
+            )
+            .join(Barcode, Stock.barcode_id == Barcode.id)
+            .where(Stock.cancelled.is_(False))
+            .group_by(day, Stock.barcode_id, erm_code)
+        )
+
+    @staticmethod
+    def _order_rows() -> Select:
+        day = cast(Orders.created_at, Date)
+        department_id = func.coalesce(Staff.department_id, NO_DEPARTMENT)
+        erm_code = func.coalesce(Barcode.erm_code, NO_ERM_CODE)
+        return (
+            select(
+                day.label("day"),
+                Orders.barcode_id,
+                department_id.label("department_id"),
+                erm_code.label("erm_code"),
+                func.count(Orders.id).label("orders"),
+                func.sum(Orders.quantity).label("out_quantity"),
+                func.sum(func.coalesce(Orders.total_cost, 0)).label("out_cost"),
+            )
+            .join(Barcode, Orders.barcode_id == Barcode.id)
+            .outerjoin(Staff, Orders.staff_id == Staff.id)
+            .group_by(day, Orders.barcode_id, department_id, erm_code)
+        )
+
+    @staticmethod
+    def _adjustment_rows() -> Select:
+        day = cast(StockAdjustment.created_at, Date)
+        department_id = func.coalesce(StockAdjustment.department_id, NO_DEPARTMENT)
+        erm_code = func.coalesce(Barcode.erm_code, NO_ERM_CODE)
+        return (
+            select(
+                day.label("day"),
+                StockAdjustment.barcode_id,
+                department_id.label("department_id"),
+                erm_code.label("erm_code"),
+                func.sum(StockAdjustment.quantity).label("adjustment_quantity"),
+                func.sum(StockAdjustment.quantity * StockAdjustment.cost).label(
+                    "adjustment_cost"
+                ),
+            )
+            .join(Barcode, StockAdjustment.barcode_id == Barcode.id)
+            .group_by(day, StockAdjustment.barcode_id, department_id, erm_code)
+        )
+
+    @staticmethod
+    def rebuild() -> int:
+        """
+        Recompute the whole rollup from the raw movement tables.
+
+        Returns:
+            int: The number of rollup rows written.
+        """
+        with DBSession() as db:
+            db.execute(delete(DailyMovement))
+            for rows in (
+                DailyMovementOperator._stock_in_rows(),
+                DailyMovementOperator._order_rows(),
+                DailyMovementOperator._adjustment_rows(),
+            ):
+                columns = [column.name for column in rows.selected_columns]
+                db.execute(
+                    _add_on_conflict(
+                        insert(DailyMovement).from_select(columns, rows),
+                        [column for column in columns if column not in KEY],
+                    )
+                )
+            commit(db)
+            rows = db.query(func.count()).select_from(DailyMovement).scalar()
+        ReportCache.invalidate("orders", "adjustments")
+        return rows
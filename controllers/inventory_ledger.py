@@ -0,0 +1,322 @@
+import datetime
+from typing import Any, Iterable
+
+from sqlalchemy import Subquery, and_, case, func, insert, select, text
+from sqlalchemy.orm import Session
+
+from models.barcode import Barcode
+from models.inventory_movement import InventoryMovement
+from utils.enum import MovementType
+from utils.session import DBSession, commit
+
+REFERENCES = ("stock_id", "order_id", "stock_adjustment_id")
+DEFAULT_PARTITION = "inventory_movements_default"
+
+
+def month_start(day: datetime.date, months: int = 0) -> datetime.date:
+    """The first day of the month ``months`` after the month of ``day``."""
+    month = day.year * 12 + day.month - 1 + months
+    return datetime.date(month // 12, month % 12 + 1, 1)
+
+
+class InventoryLedgerOperator:
+    @staticmethod
+    def record(
+        db: Session,
+        barcode_id: int,
+        movement_type: MovementType,
+        quantity: int,
+        unit_cost: float,
+        **references: int,
+    ) -> None:
+        """
+        Record a movement of stock, in the transaction of ``db``.
+
+        Args:
+            db (Session): The session the change of stock is written with.
+            barcode_id (int): The barcode moved.
+            movement_type (MovementType): What moved the stock.
+            quantity (int): The change of the stock remaining, negative when
+                taken out.
+            unit_cost (float): The cost of a unit moved.
+            **references: The stock_id, order_id or stock_adjustment_id the
+                movement belongs to.
+        """
+        InventoryLedgerOperator.record_many(
+            db,
+            [
+                {
+                    "barcode_id": barcode_id,
+                    "movement_type": movement_type,
+                    "quantity": quantity,
+                    "unit_cost": unit_cost,
+                    **references,
+                }
+            ],
+        )
+
+    @staticmethod
+    def record_many(db: Session, movements: list[dict[str, Any]]) -> None:
+        """
+        Record many movements with a single insert, movements which do not
+        change the stock are left out.
+
+        Args:
+            db (Session): The session the changes of stock are written with.
+            movements (list[dict]): The barcode_id, movement_type, quantity,
+                unit_cost and references of each movement, as taken by
+                record.
+        """
+        created_at = datetime.datetime.now()
+        rows = [
+            {
+                "created_at": created_at,
+                "barcode_id": movement["barcode_id"],
+                "movement_type": movement["movement_type"].name,
+                "quantity": movement["quantity"],
+                "unit_cost": movement["unit_cost"] or 0,
+                **{reference: movement.get(reference) for reference in REFERENCES},
+            }
+            for movement in movements
+            if movement["quantity"]
+        ]
+        if rows:
+            # run as an executemany, batched in pages of rows by the driver
+            # rather than rendered into one statement of any number of rows
+            db.execute(insert(InventoryMovement), rows)
+
+    @staticmethod
+    def ensure_partitions(months_ahead: int = 2) -> list[str]:
+        """
+        Create the monthly partitions of the ledger missing from the current
+        month to ``months_ahead`` months ahead, and those of the months with
+        movements in the default partition when a run was missed, moving
+        those movements to the partition of their month.
+
+        Returns:
+            list[str]: The partitions created.
+        """
+        this_month = month_start(datetime.date.today())
+        months = {month_start(this_month, ahead) for ahead in range(months_ahead + 1)}
+        partitions = []
+        with DBSession(shared=False) as db:
+            months.update(
+                month.date()
+                for month in db.scalars(
+                    text(
+                        f"SELECT DISTINCT date_trunc('month', created_at) "
+                        f"FROM {DEFAULT_PARTITION}"
+                    )
+                )
+            )
+            for start in sorted(months):
+                partition = f"inventory_movements_y{start:%Y}m{start:%m}"
+                if db.scalar(text("SELECT to_regclass(:name)"), {"name": partition}):
+                    continue
+                end = month_start(start, 1)
+                # no movement of the month may be left in, or be inserted into,
+                # the default partition while the partition is attached
+                db.execute(
+                    text("LOCK TABLE inventory_movements IN SHARE ROW EXCLUSIVE MODE")
+                )
+                db.execute(
+                    text(
+                        f"CREATE TABLE {partition} (LIKE inventory_movements "
+                        f"INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+                    )
+                )
+                db.execute(
+                    text(
+                        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+                        f"WHERE created_at >= :start AND created_at < :end "
+                        f"RETURNING *) INSERT INTO {partition} SELECT * FROM moved"
+                    ),
+                    {"start": start, "end": end},
+                )
+                db.execute(
+                    text(
+                        f"ALTER TABLE inventory_movements ATTACH PARTITION {partition} "
+                        f"FOR VALUES FROM ('{start}') TO ('{end}')"
+                    )
+                )
+                partitions.append(partition)
+            commit(db)
+        return partitions
+
+    @staticmethod
+    def _conditions(
+        barcode_ids: Iterable[int] = None, as_of: datetime.datetime = None
+    ) -> list[Any]:
+        conditions = []
+        if barcode_ids is not None:
+            conditions.append(InventoryMovement.barcode_id.in_(list(barcode_ids)))
+        if as_of is not None:
+            conditions.append(InventoryMovement.created_at <= as_of)
+        return conditions
+
+    @staticmethod
+    def running_totals(
+        barcode_ids: Iterable[int] = None, as_of: datetime.datetime = None
+    ) -> Subquery:
+        """
+        The running stock of every barcode projected from the ledger, with
+        the columns of StockRunning.
+
+        Args:
+            barcode_ids: The barcodes projected, all by default.
+            as_of (datetime): The time projected to, now by default.
+        """
+
+        def total(movement_type: MovementType) -> Any:
+            return func.coalesce(
+                func.sum(
+                    case(
+                        (
+                            InventoryMovement.movement_type == movement_type.name,
+                            InventoryMovement.quantity,
+                        ),
+                        else_=0,
+                    )
+                ),
+                0,
+            )
+
+        return (
+            select(
+                InventoryMovement.barcode_id,
+                total(MovementType.stock_in).label("stock_quantity"),
+                (-total(MovementType.stock_out)).label("out_quantity"),
+                (-total(MovementType.adjustment)).label("adjustment_quantity"),
+                func.sum(InventoryMovement.quantity).label("remaining_quantity"),
+                func.sum(
+                    InventoryMovement.quantity * InventoryMovement.unit_cost
+                ).label("cost"),
+            )
+            .where(*InventoryLedgerOperator._conditions(barcode_ids, as_of))
+            .group_by(InventoryMovement.barcode_id)
+            .subquery()
+        )
+
+    @staticmethod
+    def valuation(
+        as_of: datetime.datetime = None, barcode_ids: Iterable[int] = None
+    ) -> list[dict[str, Any]]:
+        """
+        Value the stock remaining of every barcode first in, first out.
+
+        The stock remaining is taken to be the newest units stocked in, as
+        the oldest are collected first, and is valued at the cost of the
+        lots they came in.
+
+        Args:
+            as_of (datetime): The time of the valuation, now by default.
+            barcode_ids: The barcodes valued, all by default.
+
+        Returns:
+            list: The barcode, quantity remaining and value of every barcode
+            stocked in by then.
+        """
+        conditions = InventoryLedgerOperator._conditions(barcode_ids, as_of)
+        lots = (
+            select(
+                InventoryMovement.barcode_id,
+                InventoryMovement.stock_id,
+                InventoryMovement.unit_cost,
+                func.sum(InventoryMovement.quantity).label("quantity"),
+            )
+            .where(
+                and_(
+                    InventoryMovement.movement_type == MovementType.stock_in.name,
+                    *conditions,
+                )
+            )
+            .group_by(
+                InventoryMovement.barcode_id,
+                InventoryMovement.stock_id,
+                InventoryMovement.unit_cost,
+            )
+            .having(func.sum(InventoryMovement.quantity) > 0)
+            .subquery()
+        )
+        remaining = (
+            select(
+                InventoryMovement.barcode_id,
+                func.sum(InventoryMovement.quantity).label("quantity"),
+            )
+            .where(*conditions)
+            .group_by(InventoryMovement.barcode_id)
+            .subquery()
+        )
+        newest_first = (
+            select(
+                lots.c.barcode_id,
+                lots.c.quantity,
+                lots.c.unit_cost,
+                remaining.c.quantity.label("remaining"),
+                # units stocked in by this lot and the lots after it
+                func.sum(lots.c.quantity)
+                .over(
+                    partition_by=lots.c.barcode_id,
+                    order_by=lots.c.stock_id.desc(),
+                    rows=(None, 0),
+                )
+                .label("newer"),
+            )
+            .join(remaining, remaining.c.barcode_id == lots.c.barcode_id)
+            .subquery()
+        )
+        taken = func.greatest(
+            func.least(
+                newest_first.c.quantity,
+                newest_first.c.remaining
+                - (newest_first.c.newer - newest_first.c.quantity),
+            ),
+            0,
+        )
+        with DBSession() as db:
+            rows = db.execute(
+                select(
+                    Barcode.id,
+                    Barcode.barcode,
+                    func.max(newest_first.c.remaining),
+                    func.sum(taken * newest_first.c.unit_cost),
+                )
+                .join(newest_first, newest_first.c.barcode_id == Barcode.id)
+                .group_by(Barcode.id, Barcode.barcode)
+                .order_by(Barcode.id)
+            ).all()
+        return [
+            {
+                "barcode_id": barcode_id,
+                "barcode": barcode,
+                "quantity": int(quantity),
+                "value": round(float(value or 0), 2),
+            }
+            for barcode_id, barcode, quantity, value in rows
+        ]
+
+    @staticmethod
+    def movements_for_barcode(
+        barcode_id: int,
+        from_datetime: datetime.datetime = None,
+        to_datetime: datetime.datetime = None,
+    ) -> list[InventoryMovement]:
+        """
+        The movements of a barcode within a time frame, oldest first, read
+        from the partitions of the time frame only.
+        """
+        conditions = [InventoryMovement.barcode_id == barcode_id]
+        if from_datetime:
+            conditions.append(InventoryMovement.created_at >= from_datetime)
+        if to_datetime:
+            conditions.append(InventoryMovement.created_at <= to_datetime)
+        with DBSession() as db:
+            return (
+                db.execute(
+                    select(InventoryMovement)
+                    .where(and_(*conditions))
+                    .order_by(InventoryMovement.created_at, InventoryMovement.id)
+                )
+                .scalars()
+                .all()
+            )
@@ -1,21 +1,48 @@
-from datetime import timedelta
+import math
 from typing import Union
 
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session, joinedload
+
 import error as err
+from config.setting import settings
 from models.department import Department
 from models.job import Job
+from models.order import Orders
 from models.groups import Groups
 from models.roles import Roles
 from models.staff import Staff
+from models.stock import Stock
 from schemas.operations import JobIn
-from schemas.staff import ChangePasswordIn, LoginIn, StaffIn, UpdateStaffIn, GroupIn
+from schemas.staff import (
+    ChangePasswordIn,
+    LoginIn,
+    StaffIn,
+    UpdateStaffIn,
+    GroupIn,
+    Principal,
+)
 from utils.enum import RolesStatus, GroupStates
+from utils.password import PasswordHasher
 from utils.redis import Cache
-from utils.session import DBSession
+from utils.report_cache import ReportCache
+from utils.revocation import PrincipalCache, RevocationList
+from utils.session import DBSession, after_commit, commit, in_unit_of_work
+from utils.throttle import LoginThrottle
 
 INVALID_CRED = "Invalid Credentials"
 
 
+def staff_out_options() -> tuple:
+    """Load plan for what the Staff and StaffOut schemas serialize."""
+    return (
+        joinedload(Staff.job),
+        joinedload(Staff.department),
+        joinedload(Staff.roles),
+        joinedload(Staff.groups),
+    )
+
+
 class GroupsOperator:
     @staticmethod
     def create_group(data: GroupIn):
@@ -68,7 +95,7 @@ class JobOperator:
         with DBSession() as db:
             job_found = db.merge(job_found)
             db.delete(job_found)
-            db.commit()
+            commit(db)
         return True
 
     @staticmethod
@@ -86,7 +113,9 @@ class DepartmentOperator:
         if DepartmentOperator.get_department(data.name):
             raise ValueError("Department Name already exists")
         new_department = Department(name=data.name)
-        return new_department.save()
+        new_department = new_department.save()
+        ReportCache.invalidate("departments")
+        return new_department
 
     @staticmethod
     def get_all_departments():
@@ -116,7 +145,8 @@ class DepartmentOperator:
         with DBSession() as db:
             dep_found = db.merge(dep_found)
             db.delete(dep_found)
-            db.commit()
+            commit(db)
+        ReportCache.invalidate("departments")
         return True
 
     @staticmethod
@@ -125,7 +155,9 @@ class DepartmentOperator:
         if not dep_found:
             raise ValueError("Department not found")
         dep_found.name = name
-        return dep_found.save(merge=True)
+        dep_found = dep_found.save(merge=True)
+        ReportCache.invalidate("departments")
+        return dep_found
 
 
 class StaffOperator:
@@ -148,22 +180,111 @@ class StaffOperator:
             hash_password=hash_password,
             role_id=data.role_id,
         )
-        return new_staff.save()
+        new_staff = new_staff.save()
+        ReportCache.invalidate("staff")
+        return new_staff
 
     @staticmethod
     def get_staff(name_or_id: Union[str, int]) -> Union[None, Staff]:
         with DBSession() as db:
             if isinstance(name_or_id, int):
                 found_department = (
-                    db.query(Staff).filter(Staff.id == name_or_id).first()
+                    db.query(Staff)
+                    .options(*staff_out_options())
+                    .filter(Staff.id == name_or_id)
+                    .first()
                 )
             else:
                 found_department = (
-                    db.query(Staff).filter(
-                        Staff.staff_id_number == name_or_id).first()
+                    db.query(Staff)
+                    .options(*staff_out_options())
+                    .filter(Staff.staff_id_number == name_or_id)
+                    .first()
                 )
         return found_department
 
+    @staticmethod
+    def get_principal(staff_id: int) -> Union[None, Principal]:
+        """
+        Resolve the role, group and department of a staff member for
+        authorization checks without loading the Staff model.
+
+        The principal is cached in Redis for a short while, in the process as
+        well when tokens are verified statelessly, and kept on the request's
+        session, so a request resolves it at most once. Once the
+        request changed the staff member the cache is bypassed, it holds the
+        principal as it was until the change is committed.
+
+        Args:
+            staff_id (int): The id of the staff member.
+
+        Returns:
+            Principal or None: The principal, or None if the staff member
+            does not exist.
+        """
+        with DBSession() as db:
+            principals = db.info.setdefault("principals", {})
+            if staff_id in principals:
+                return principals[staff_id]
+            changed = staff_id in db.info.get("changed_principals", ())
+            local = not changed and settings.AUTH_VERIFY_MODE == "stateless"
+            principal = PrincipalCache.get(staff_id) if local else None
+            if principal is None:
+                principal = StaffOperator._load_principal(db, staff_id, changed)
+                if principal is None:
+                    return None
+                if local:
+                    PrincipalCache.put(staff_id, principal)
+            principals[staff_id] = principal
+        return principal
+
+    @staticmethod
+    def _load_principal(
+        db: Session, staff_id: int, changed: bool
+    ) -> Union[None, Principal]:
+        cached = None if changed else Cache.get(f"principal_{staff_id}")
+        if cached:
+            return Principal.model_validate_json(cached)
+        found = db.execute(
+            select(
+                Staff.id,
+                Roles.name.label("role"),
+                Groups.group,
+                Staff.department_id,
+            )
+            .outerjoin(Roles, Roles.id == Staff.role_id)
+            .outerjoin(Groups, Groups.id == Staff.group_id)
+            .where(Staff.id == staff_id)
+        ).first()
+        if not found:
+            return None
+        principal = Principal.model_validate(found._asdict())
+        if not changed:
+            Cache.set(
+                key=f"principal_{staff_id}",
+                value=principal.model_dump_json(),
+                ex=settings.PRINCIPAL_CACHE_TTL,
+            )
+        return principal
+
+    @staticmethod
+    def invalidate_principal(staff_id: int) -> None:
+        """
+        Drop the principal of a staff member changed, from the request at
+        once and from Redis once the change is committed, so a concurrent
+        request cannot cache it again as it was before the change.
+        """
+        with DBSession() as db:
+            db.info.get("principals", {}).pop(staff_id, None)
+            if in_unit_of_work(db):
+                db.info.setdefault("changed_principals", set()).add(staff_id)
+            after_commit(db, lambda: StaffOperator._drop_principal(staff_id))
+
+    @staticmethod
+    def _drop_principal(staff_id: int) -> None:
+        Cache.delete(f"principal_{staff_id}")
+        PrincipalCache.invalidate(staff_id)
+
     @staticmethod
     def update_staff_by_id(staff_id: int, data: UpdateStaffIn) -> Staff:
         staff = StaffOperator.get_staff(staff_id)
@@ -173,7 +294,10 @@ class StaffOperator:
         staff.role_id = data.role_id
         staff.department_id = data.department_id
         staff.job_id = data.job_id
-        return staff.save(merge=True)
+        staff = staff.save(merge=True)
+        StaffOperator.invalidate_principal(staff_id)
+        ReportCache.invalidate("staff")
+        return staff
 
     @staticmethod
     def delete_staff_by_id(staff_id: int) -> bool:
@@ -181,15 +305,40 @@ class StaffOperator:
         if not staff:
             raise ValueError("Staff not found")
         with DBSession() as db:
+            # detach the staff member's stocks and orders without loading them
+            db.execute(
+                update(Stock)
+                .where(Stock.created_by == staff_id)
+                .values(created_by=None)
+            )
+            db.execute(
+                update(Stock)
+                .where(Stock.updated_by == staff_id)
+                .values(updated_by=None)
+            )
+            db.execute(
+                update(Orders)
+                .where(Orders.staff_id == staff_id)
+                .values(staff_id=None)
+            )
             staff = db.merge(staff)
             db.delete(staff)
-            db.commit()
+            commit(db)
+            # signed out only once the deletion is committed
+            after_commit(db, lambda: StaffOperator._revoke_tokens(staff_id))
+        StaffOperator.invalidate_principal(staff_id)
+        ReportCache.invalidate("staff")
         return True
 
+    @staticmethod
+    def _revoke_tokens(staff_id: int) -> None:
+        Cache.delete(f"login_{staff_id}")
+        RevocationList.revoke(staff_id)
+
     @staticmethod
     def get_all_staff_members() -> list[Staff]:
         with DBSession() as db:
-            data = db.query(Staff).all()
+            data = db.query(Staff).options(*staff_out_options()).all()
         return data
 
     @staticmethod
@@ -199,33 +348,36 @@ class StaffOperator:
         return data
 
     @staticmethod
-    def validate_staff_credentials(data: LoginIn) -> Staff:
+    def validate_staff_credentials(data: LoginIn, client_ip: str = None) -> Staff:
+        """
+        Check the credentials of a login.
+
+        The attempt is counted against the staff id number and the client IP
+        before the password is checked and taken back when it succeeds, so
+        at most LOGIN_MAX_ATTEMPTS failed logins per staff id number, and
+        LOGIN_IP_MAX_ATTEMPTS per client IP when set, are checked per window.
+        """
+        retry_after = LoginThrottle.attempt(data.staff_id_number, client_ip)
+        if retry_after:
+            raise err.AppError(
+                message="Too many attempts to login, Please try again in "
+                f"{math.ceil(retry_after / 60)} minutes",
+                status_code=429,
+                headers={"Retry-After": str(retry_after)},
+            )
         staff = StaffOperator.get_staff(data.staff_id_number)
         if not staff:
             raise err.AppError(message=INVALID_CRED, status_code=400)
-        if not Staff.verify_hash_password(staff.hash_password, data.password):
-            set_handler = Cache.get(
-                f"handle_number_of_retries_for_{data.staff_id_number}"
-            )
-            if not set_handler:
-                Cache.set(
-                    key=f"handle_number_of_retries_for_{data.staff_id_number}",
-                    value=1,
-                    ex=timedelta(minutes=5),
-                )
-            else:
-                Cache.incr(
-                    f"handle_number_of_retries_for_{data.staff_id_number}")
-            if (
-                int(Cache.get(
-                    f"handle_number_of_retries_for_{data.staff_id_number}"))
-                > 5
-            ):
-                raise err.AppError(
-                    message="Too many attempts to login, Please try again in 5 minutes",
-                    status_code=400,
-                )
+        verified, new_hash = PasswordHasher.verify_and_update(
+            staff.hash_password, data.password
+        )
+        if not verified:
             raise err.AppError(message=INVALID_CRED, status_code=400)
+        LoginThrottle.succeeded(data.staff_id_number, client_ip)
+        if new_hash:
+            # the hash was made with another bcrypt cost than configured
+            staff.hash_password = new_hash
+            staff = staff.save(merge=True)
         return staff
 
     @staticmethod
@@ -241,33 +393,33 @@ class StaffOperator:
 
     @staticmethod
     def has_stock_controller_permission(staff_id: int) -> bool:
-        staff_found = StaffOperator.get_staff(staff_id)
-        if not staff_found:
+        principal = StaffOperator.get_principal(staff_id)
+        if not principal:
             raise err.AppError(
                 message="You do not have permission to perform this operation",
                 status_code=401,
             )
-        return staff_found.roles.name.name == RolesStatus.stock_controller.name
+        return principal.role == RolesStatus.stock_controller
 
     @staticmethod
     def has_engineer_permission(staff_id: int) -> bool:
-        staff_found = StaffOperator.get_staff(staff_id)
-        if not staff_found:
+        principal = StaffOperator.get_principal(staff_id)
+        if not principal:
             raise err.AppError(
                 message="You do not have permission to perform this operation",
                 status_code=401,
             )
-        return staff_found.roles.name.name == RolesStatus.engineer.name
+        return principal.role == RolesStatus.engineer
 
     @staticmethod
     def has_manager_permission(staff_id: int):
-        staff_found = StaffOperator.get_staff(staff_id)
-        if not staff_found:
+        principal = StaffOperator.get_principal(staff_id)
+        if not principal:
             raise err.AppError(
                 message="You do not have permission to perform this operation",
                 status_code=401,
             )
-        return staff_found.groups.group.name == GroupStates.managers.name
+        return principal.group == GroupStates.managers
 
     @staticmethod
     def assign_group_to_staff(staff_id: int, group_id: int):
@@ -279,7 +431,9 @@ class StaffOperator:
             raise ValueError(
                 "Can't assign groups to non stock controller users")
         staff_found.group_id = group_id
-        return staff_found.save(merge=True)
+        staff_found = staff_found.save(merge=True)
+        StaffOperator.invalidate_principal(staff_id)
+        return staff_found
     
     @staticmethod
     def remove_user_from_any_group(staff_id: int):
@@ -287,4 +441,6 @@ class StaffOperator:
         if not staff_found:
             raise ValueError("No staff found")
         staff_found.group_id = None
-        return staff_found.save(merge=True)
\ No newline at end of file
+        staff_found = staff_found.save(merge=True)
+        StaffOperator.invalidate_principal(staff_id)
+        return staff_found
\ No newline at end of file
@@ -1,16 +1,25 @@
+from controllers.daily_movement import DailyMovementOperator as DM
+from controllers.operations import StaffOperator, staff_out_options
 from controllers.stock import StockOperator
-from controllers.stock_out import StockOutOperator as SO
 from controllers.stock_running import StockRunningOperator as SR
-from models.email import Recipients
 from models.order import Orders
 from models.barcode import Barcode
-from schemas.order import OrderIn
+from models.staff import Staff
+from models.stock_running import StockRunning
+from schemas.order import BatchOrderIn, OrderIn
+from schemas.stock import PageQuery
+from utils.countFilter import KeysetFilter
 from utils.enum import OrderStatus
 from utils.enum import RunningStockStatus as RS
-from utils.session import DBSession
-from cron.task import send_email
+from utils.notification import ReorderNotifications
+from utils.report_cache import ReportCache
+from utils.session import DBSession, after_commit, commit
+from cron.task import flush_reorder_notifications
+from config.setting import settings
 from datetime import datetime, timedelta
-from sqlalchemy import and_
+from typing import Any, Iterator
+from sqlalchemy import and_, func, select
+from sqlalchemy.orm import selectinload
 
 
 class OrderOperator:
@@ -31,7 +40,7 @@ class OrderOperator:
         }
 
     @staticmethod
-    def get_all_orders(from_: str = None, to_: str = None):
+    def date_filters(from_: str = None, to_: str = None) -> list:
         filters = []
         if from_:
             from_datetime = datetime.strptime(from_, '%Y-%m-%d')
@@ -41,72 +50,245 @@ class OrderOperator:
             to_datetime = datetime.strptime(to_, '%Y-%m-%d')
             filters.append(Orders.created_at <= to_datetime +
                            timedelta(hours=23, minutes=59, seconds=59))
+        return filters
 
+    @staticmethod
+    def get_all_orders(from_: str = None, to_: str = None, page: PageQuery = None):
+        filters = OrderOperator.date_filters(from_, to_)
         with DBSession() as db:
-            if not filters:
-                return db.query(Orders).order_by(Orders.id.desc()).all()
-            return db.query(Orders).filter(and_(*filters)).order_by(Orders.id.desc()).all()
+            query = db.query(Orders).options(
+                selectinload(Orders.barcode),
+                selectinload(Orders.staff).options(*staff_out_options()),
+            )
+            if filters:
+                query = query.filter(and_(*filters))
+        return KeysetFilter(page, query, Orders.id, Orders.created_at).apply()
+
+    @staticmethod
+    def stream_orders(from_: str = None, to_: str = None) -> Iterator[dict[str, Any]]:
+        """
+        Yield the orders of a date range one at a time for exports.
+
+        The rows are read through a server side cursor on a session of their
+        own, so the generator can be consumed after the request has ended.
+        """
+        filters = OrderOperator.date_filters(from_, to_)
+        query = (
+            select(
+                Orders.id,
+                Orders.created_at,
+                Orders.job_number,
+                Orders.part_name,
+                Orders.quantity,
+                Orders.total_cost,
+                Orders.available_quantity,
+                Orders.restrictions,
+                Barcode.barcode,
+                Barcode.code,
+                Barcode.specification,
+                Barcode.erm_code,
+                Staff.name.label("staff"),
+            )
+            .join(Barcode, Orders.barcode_id == Barcode.id)
+            .outerjoin(Staff, Orders.staff_id == Staff.id)
+            .where(*filters)
+            .order_by(Orders.id.desc())
+            .execution_options(yield_per=settings.EXPORT_YIELD_PER)
+        )
+        with DBSession(shared=False) as db:
+            for row in db.execute(query):
+                order = row._asdict()
+                order["created_at"] = order["created_at"].isoformat()
+                order["restrictions"] = order["restrictions"].name
+                yield order
 
     @staticmethod
     def get_number_of_orders():
-        return len(OrderOperator.get_all_orders())
+        with DBSession() as db:
+            return db.query(func.count(Orders.id)).scalar()
 
     @staticmethod
     def create_order_for_stock_with(
         barcode: str, data: OrderIn, user_id: int
-    ):
-        running_stock = SR.get_stock_in_inventory(barcode)
-        if not running_stock:
-            raise ValueError("Sorry, item not found")
-
-        if data.quantity > running_stock.remaining_quantity:
-            raise ValueError("Sorry, we are currently out of stock")
-
-        # create order
-        new_order = Orders(
-            barcode_id=running_stock.barcode_id,
-            staff_id=user_id,
-            job_number=data.job_number,
-            part_name=data.part_name,
-            quantity=data.quantity,
-            available_quantity=running_stock.remaining_quantity,
-            restrictions=OrderStatus.part_available.name,
-        )
-        created_order = new_order.save()
+    ) -> Orders:
+        """
+        Collect a part, as a batch of one so its running stock and lots are
+        locked in the same order as by any other collection.
+        """
+        return OrderOperator.create_orders_for_stocks(
+            [BatchOrderIn(barcode=barcode, **data.model_dump())], user_id
+        )[0]
 
-        total_cost = StockOperator.update_stock_and_cost(
-            quantity=data.quantity,
-            barcode_id=running_stock.barcode_id,
-            order_id=created_order.id
-        )
+    @staticmethod
+    def create_orders_for_stocks(
+        lines: list[BatchOrderIn], user_id: int
+    ) -> list[Orders]:
+        """
+        Collect many parts at once, in a single transaction.
 
-        value = SO.get_group_all_stock_ids_data_by_stock_id(barcode)
+        The running stocks of all the barcodes are locked and checked by one
+        query, in barcode id order like the stock lots consumed afterwards,
+        so concurrent batches always lock rows in the same order and cannot
+        deadlock. Either every line is collected or none is.
 
-        stock_runner = SR.create_running_stock(
-            barcode,
-            stock_operator=StockOperator,
-            out_quantity=value.get("quantity", 0),
-            order_quantity=data.quantity,
-        )
-        if stock_runner.status.value == RS.re_order.value:
-            # send email to recipients
-            OrderOperator.notify_stock_controllers(
-                recipients=Recipients.get_all_recipients(),
-                barcode=stock_runner.barcode,
+        Args:
+            lines (list[BatchOrderIn]): The barcode, quantity and job of each
+                part collected.
+            user_id (int): The engineer collecting the parts.
+
+        Returns:
+            list[Orders]: The orders created, one per line, in barcode order.
+        """
+        if not lines:
+            raise ValueError("No parts provided to collect")
+        department_id = StaffOperator.get_principal(user_id).department_id
+        codes = {line.barcode for line in lines}
+        with DBSession() as db:
+            running_stocks = db.execute(
+                select(
+                    StockRunning.barcode_id,
+                    StockRunning.remaining_quantity,
+                    Barcode.barcode,
+                )
+                .join(Barcode, StockRunning.barcode_id == Barcode.id)
+                .where(Barcode.barcode.in_(codes))
+                .order_by(StockRunning.barcode_id.asc())
+                .with_for_update(of=StockRunning)
+            ).all()
+            available = {row.barcode: row for row in running_stocks}
+            not_found = codes - available.keys()
+            if not_found:
+                raise ValueError(
+                    f"Sorry, item not found: {', '.join(sorted(not_found))}"
+                )
+            requested: dict[str, int] = {}
+            for line in lines:
+                requested[line.barcode] = requested.get(line.barcode, 0) + line.quantity
+            out_of_stock = [
+                code
+                for code, quantity in requested.items()
+                if quantity > available[code].remaining_quantity
+            ]
+            if out_of_stock:
+                raise ValueError(
+                    "Sorry, we are currently out of stock: "
+                    f"{', '.join(sorted(out_of_stock))}"
+                )
+
+            remaining = {
+                code: row.remaining_quantity for code, row in available.items()
+            }
+            orders = []
+            by_barcode_id = sorted(
+                lines, key=lambda line: available[line.barcode].barcode_id
+            )
+            for line in by_barcode_id:
+                orders.append(
+                    Orders(
+                        barcode_id=available[line.barcode].barcode_id,
+                        staff_id=user_id,
+                        job_number=line.job_number,
+                        part_name=line.part_name,
+                        quantity=line.quantity,
+                        available_quantity=remaining[line.barcode],
+                        restrictions=OrderStatus.part_available.name,
+                    )
+                )
+                remaining[line.barcode] -= line.quantity
+            db.add_all(orders)
+            db.flush()
+
+            total_costs = StockOperator.consume_fifo(
+                db,
+                [
+                    {
+                        "barcode_id": order.barcode_id,
+                        "order_id": order.id,
+                        "quantity": order.quantity,
+                    }
+                    for order in orders
+                ],
+            )
+            for order in orders:
+                order.total_cost = total_costs[order.id]
+            running_stocks = SR.apply_movements(
+                db,
+                [
+                    {
+                        "barcode_id": order.barcode_id,
+                        "out_quantity": order.quantity,
+                        "cost": -(order.total_cost or 0),
+                    }
+                    for order in orders
+                ],
+            )
+            DM.record_many(
+                db,
+                [
+                    {
+                        "day": order.created_at.date(),
+                        "barcode_id": order.barcode_id,
+                        "department_id": department_id,
+                        "orders": 1,
+                        "out_quantity": order.quantity,
+                        "out_cost": round(order.total_cost or 0),
+                    }
+                    for order in orders
+                ],
+            )
+            commit(db)
+            order_ids = [order.id for order in orders]
+            re_order = [
+                running_stock.barcode_id
+                for running_stock in running_stocks
+                if running_stock.status == RS.re_order
+            ]
+        ReportCache.invalidate("orders")
+
+        with DBSession() as db:
+            if re_order:
+                OrderOperator.notify_stock_controllers(
+                    barcodes=db.query(Barcode)
+                    .filter(Barcode.id.in_(re_order))
+                    .order_by(Barcode.id.asc())
+                    .all(),
+                )
+            created = (
+                db.query(Orders)
+                .options(
+                    selectinload(Orders.barcode),
+                    selectinload(Orders.staff).options(*staff_out_options()),
+                )
+                .filter(Orders.id.in_(order_ids))
+                .all()
             )
-        created_order.total_cost = total_cost
-        created_order.save(merge=True)
-        return created_order
+        by_id = {order.id: order for order in created}
+        return [by_id[order_id] for order_id in order_ids]
 
     @staticmethod
-    def notify_stock_controllers(recipients: list[Recipients], barcode: Barcode):
-        emails = [recipient.email for recipient in recipients]
-        send_email.delay(
-            email=emails,
-            subject="Stock Re-Order Notification Alert",
-            content={
+    def notify_stock_controllers(barcodes: list[Barcode]):
+        """
+        Queue a re-order notification for the barcodes given, once the
+        collection is committed.
+
+        Barcodes notified within REORDER_NOTIFICATION_WINDOW are skipped and
+        the others are sent to the recipients in a single digest, once
+        REORDER_DIGEST_DELAY seconds have passed.
+        """
+        items = [
+            {
                 "barcode": barcode.barcode,
                 "location": barcode.location,
                 "specification": barcode.specification,
-            },
-        )
+            }
+            for barcode in barcodes
+        ]
+        with DBSession() as db:
+            after_commit(db, lambda: OrderOperator._queue_notifications(items))
+
+    @staticmethod
+    def _queue_notifications(items: list[dict[str, Any]]) -> None:
+        if ReorderNotifications.enqueue(items):
+            flush_reorder_notifications.apply_async(
+                countdown=settings.REORDER_DIGEST_DELAY
+            )
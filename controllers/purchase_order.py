@@ -1,9 +1,12 @@
+from sqlalchemy import update
+from sqlalchemy.orm import joinedload, selectinload
+
 from models.purchase_order import PurchaseOrders
 from models.purchase_order_type import PurchaseOrderTypes
 from models.purchase_order_items import PurchaseOrderItems
 from models.payment_terms import PaymentTerms
 from models.suppliers import Suppliers
-from utils.session import DBSession
+from utils.session import DBSession, commit
 from utils.enum import PurchaseOrderStates
 from error import AppError
 from schemas.purchase_order import (
@@ -21,13 +24,33 @@ from controllers.operations import StaffOperator
 
 MESSAGE = "Purchase order item can only be created when in draft state"
 
+def purchase_order_item_out_options() -> tuple:
+    """Load plan for what the PurchaseOrderItemOut schema serializes."""
+    return (
+        joinedload(PurchaseOrderItems.barcode),
+        joinedload(PurchaseOrderItems.requested_by_staff),
+    )
+
+
+def purchase_order_out_options() -> tuple:
+    """Load plan for what the PurchaseOrderOut schema serializes."""
+    return (
+        joinedload(PurchaseOrders.payment_terms),
+        joinedload(PurchaseOrders.suppliers),
+        selectinload(PurchaseOrders.purchase_order_items).options(
+            *purchase_order_item_out_options()
+        ),
+    )
+
 
 class PurchaseOrderController:
     @staticmethod
     def get_all_purchase_orders(q: dict):
         with DBSession() as db:
             q["sort"] = "-id"
-            filter_data = FilterSort(PurchaseOrders, q, db)
+            filter_data = FilterSort(
+                PurchaseOrders, q, db, options=purchase_order_out_options()
+            )
             return filter_data.filter_and_sort()
 
     @staticmethod
@@ -40,6 +63,7 @@ class PurchaseOrderController:
         with DBSession() as db:
             value = (
                 db.query(PurchaseOrders)
+                .options(*purchase_order_out_options())
                 .filter(PurchaseOrders.id == purchase_order_id)
                 .first()
             )
@@ -139,16 +163,27 @@ class PurchaseOrderController:
             purchase_order_done.state.name == PurchaseOrderStates.validated.name
             and is_manager
         ):
-            for purchase_order_item_data in purchase_order_done.purchase_order_items:
-                stock_in_data = StockIn(
-                    barcode_id=purchase_order_item_data.barcode_id,
-                    quantity=purchase_order_item_data.quantity,
-                    cost=purchase_order_item_data.price,
-                )
-                stock = StockOperator.add_stock(
-                    stock_in_data, purchase_order_item_data.requested_by
+            items = purchase_order_done.purchase_order_items
+            stock_ids = StockOperator.add_stocks(
+                [
+                    StockIn(
+                        barcode_id=item.barcode_id,
+                        quantity=item.quantity,
+                        cost=item.price,
+                    )
+                    for item in items
+                ],
+                [item.requested_by for item in items],
+            )
+            with DBSession() as db:
+                db.execute(
+                    update(PurchaseOrderItems),
+                    [
+                        {"id": item.id, "stock_id": stock_id}
+                        for item, stock_id in zip(items, stock_ids)
+                    ],
                 )
-                purchase_order_item_data.update({"stock_id": stock.id})
+                commit(db)
         return purchase_order_done
 
     @staticmethod
@@ -169,6 +204,7 @@ class PurchaseOrderController:
         with DBSession() as db:
             data = (
                 db.query(PurchaseOrders)
+                .options(*purchase_order_out_options())
                 .filter(PurchaseOrders.id == purchase_order_by_id)
                 .first()
             )
@@ -230,8 +266,10 @@ class PurchaseOrderItemController:
     def get_purchase_order_item_by_id(id: int):
         with DBSession() as db:
             value = (
-                db.query(PurchaseOrderItems).filter(
-                    PurchaseOrderItems.id == id).first()
+                db.query(PurchaseOrderItems)
+                .options(*purchase_order_item_out_options())
+                .filter(PurchaseOrderItems.id == id)
+                .first()
             )
             if not value:
                 raise AppError(
@@ -243,7 +281,11 @@ class PurchaseOrderItemController:
     @staticmethod
     def get_all_purchase_order_items():
         with DBSession() as db:
-            return db.query(PurchaseOrderItems).all()
+            return (
+                db.query(PurchaseOrderItems)
+                .options(*purchase_order_item_out_options())
+                .all()
+            )
 
     @staticmethod
     def update_purchase_order_item(id: int, data: PurchaseOrderItemIn):
@@ -3,21 +3,43 @@ from models.department import Department
 from models.stock_adjustment import StockAdjustment
 from models.order import Orders
 from models.barcode import Barcode
+from models.daily_movement import DailyMovement, NO_ERM_CODE
 from models.stock import Stock
 from models.purchase_order import PurchaseOrders
+from models.stock_out import StockOut
+from controllers.inventory_ledger import InventoryLedgerOperator
 from controllers.stock_running import StockRunningOperator
-from controllers.stock_out import StockOutOperator
 from controllers.stock import StockOperator
-from controllers.stock_adjustment import StockAdjustmentOperator
+from controllers.order import OrderOperator
+from controllers.purchase_order import purchase_order_out_options
+from config.setting import settings
+from utils.concurrency import run_report_queries
+from utils.enum import MovementType
+from utils.report_cache import ReportCache
 from utils.session import DBSession
-from sqlalchemy import func, and_, select, extract
+from sqlalchemy import Row, Select, func, and_, select, extract
+from sqlalchemy.orm import selectinload
 from parser.report import ReportParser
-from typing import Any
+from typing import Any, Iterator
 from datetime import datetime, timedelta
 
 
 class ReportDashboard:
     @staticmethod
+    def get_stock_reports() -> dict[str, Any]:
+        engineers, adjustment_orders, quantity_orders = run_report_queries(
+            ReportDashboard.get_number_of_engineers_in_each_department,
+            ReportDashboard.get_department_adjustment_order,
+            ReportDashboard.get_number_and_quantity_orders_each_department,
+        )
+        return {
+            "department_engineer": engineers,
+            "department_adjustment_order": adjustment_orders,
+            "department_number_quantity_order": quantity_orders,
+        }
+
+    @staticmethod
+    @ReportCache.cached("department_engineer", tags=("staff", "departments"), ttl=3600)
     def get_number_of_engineers_in_each_department():
         with DBSession() as db:
             data = (
@@ -29,54 +51,40 @@ class ReportDashboard:
         return ReportParser.convert_engineers_to_departments_data(data)
 
     @staticmethod
+    @ReportCache.cached(
+        "department_adjustment_order", tags=("orders", "adjustments", "departments")
+    )
     def get_department_adjustment_order():
         with DBSession() as db:
-            subq_adjustments = (
-                db.query(
-                    StockAdjustment.department_id,
-                    func.sum(StockAdjustment.quantity).label(
-                        "adjustment_amount"),
-                )
-                .group_by(StockAdjustment.department_id)
-                .subquery()
-            )
-
-            subq_orders = (
-                db.query(
-                    Staff.department_id, func.sum(
-                        Orders.quantity).label("sale_amount")
-                )
-                .join(Orders, Staff.id == Orders.staff_id)
-                .group_by(Staff.department_id)
-                .subquery()
-            )
-
-            query = (
+            data = (
                 db.query(
                     Department.name,
-                    subq_adjustments.c.adjustment_amount,
-                    subq_orders.c.sale_amount,
+                    func.sum(DailyMovement.adjustment_quantity),
+                    func.sum(DailyMovement.out_quantity),
                 )
                 .outerjoin(
-                    subq_adjustments, Department.id == subq_adjustments.c.department_id
+                    DailyMovement, DailyMovement.department_id == Department.id
                 )
-                .outerjoin(subq_orders, Department.id == subq_orders.c.department_id)
+                .group_by(Department.id, Department.name)
+                .all()
             )
-
-        return ReportParser.convert_department_adjustment_orders_data(data=query.all())
+        return ReportParser.convert_department_adjustment_orders_data(data=data)
 
     @staticmethod
+    @ReportCache.cached(
+        "department_number_quantity_order", tags=("orders", "departments")
+    )
     def get_number_and_quantity_orders_each_department():
         with DBSession() as db:
             data = (
                 db.query(
-                    Department.name, func.count(
-                        Orders.id), func.sum(Orders.quantity),
-                    func.sum(Orders.total_cost)
+                    Department.name,
+                    func.sum(DailyMovement.orders),
+                    func.sum(DailyMovement.out_quantity),
+                    func.sum(DailyMovement.out_cost),
                 )
                 .outerjoin(
-                    Orders, Orders.staff.has(
-                        Staff.department_id == Department.id)
+                    DailyMovement, DailyMovement.department_id == Department.id
                 )
                 .group_by(Department.name)
                 .all()
@@ -84,13 +92,14 @@ class ReportDashboard:
         return ReportParser.convert_number_and_quantity_orders_data(data)
 
     @staticmethod
+    @ReportCache.cached("erm_code_quantity", tags=("orders", "barcodes"))
     def get_quantity_for_erm_codes():
         with DBSession() as db:
             query = (
-                db.query(Barcode.erm_code, func.sum(Orders.quantity))
-                .join(Barcode, Orders.barcode_id == Barcode.id)
-                .group_by(Barcode.erm_code)
-                .filter(Barcode.erm_code.is_not(None))
+                db.query(DailyMovement.erm_code, func.sum(DailyMovement.out_quantity))
+                .filter(DailyMovement.erm_code != NO_ERM_CODE)
+                .group_by(DailyMovement.erm_code)
+                .having(func.sum(DailyMovement.orders) > 0)
                 .all()
             )
             if len(query) == 0:
@@ -101,55 +110,59 @@ class ReportDashboard:
             ]
 
     @staticmethod
-    def get_erm_report_data(from_: str = None, to_: str = None):
-        filters = []
-        if from_:
-            from_datetime = datetime.strptime(from_, "%Y-%m-%d")
-            filters.append(
-                Orders.created_at
-                >= from_datetime + timedelta(hours=0, minutes=0, seconds=0)
+    def erm_report_query(from_: str = None, to_: str = None) -> Select:
+        return (
+            select(
+                Orders.id,
+                Orders.created_at,
+                Orders.job_number,
+                Barcode.barcode,
+                Orders.part_name,
+                Barcode.specification,
+                Orders.quantity,
+                Barcode.erm_code,
             )
-        if to_:
-            to_datetime = datetime.strptime(to_, "%Y-%m-%d")
-            filters.append(
-                Orders.created_at
-                <= to_datetime + timedelta(hours=23, minutes=59, seconds=59)
+            .join(Barcode, Orders.barcode_id == Barcode.id)
+            .where(
+                Barcode.erm_code.is_not(None),
+                *OrderOperator.date_filters(from_, to_),
             )
+            .order_by(Orders.id.desc())
+        )
 
+    @staticmethod
+    def erm_report_row(row: Row) -> dict[str, Any]:
+        return {
+            "id": row.id,
+            "date": row.created_at.isoformat(),
+            "event_number": row.job_number,
+            "part_code": row.barcode,
+            "part_type": row.part_name,
+            "part_description": row.specification,
+            "quantity": row.quantity,
+            "erm_code": row.erm_code,
+        }
+
+    @staticmethod
+    def get_erm_report_data(from_: str = None, to_: str = None):
         with DBSession() as db:
-            if not filters:
-                orders = (
-                    db.query(Orders)
-                    .filter(Orders.barcode.has(Barcode.erm_code.is_not(None)))
-                    .order_by(Orders.id.desc())
-                    .all()
-                )
-            else:
-                orders = (
-                    db.query(Orders)
-                    .filter(
-                        Orders.barcode.has(
-                            Barcode.erm_code.is_not(None)), and_(*filters)
-                    )
-                    .order_by(Orders.id.desc())
-                    .all()
-                )
+            rows = db.execute(ReportDashboard.erm_report_query(from_, to_)).all()
+        return [ReportDashboard.erm_report_row(row) for row in rows]
 
-        if len(orders) == 0:
-            return []
-        return [
-            {
-                "id": order.id,
-                "date": order.created_at.isoformat(),
-                "event_number": order.job_number,
-                "part_code": order.barcode.barcode,
-                "part_type": order.part_name,
-                "part_description": order.barcode.specification,
-                "quantity": order.quantity,
-                "erm_code": order.barcode.erm_code,
-            }
-            for order in orders
-        ]
+    @staticmethod
+    def stream_erm_report_data(
+        from_: str = None, to_: str = None
+    ) -> Iterator[dict[str, Any]]:
+        """
+        Yield the ERM report rows one at a time for exports, read through a
+        server side cursor on a session outliving the request.
+        """
+        query = ReportDashboard.erm_report_query(from_, to_).execution_options(
+            yield_per=settings.EXPORT_YIELD_PER
+        )
+        with DBSession(shared=False) as db:
+            for row in db.execute(query):
+                yield ReportDashboard.erm_report_row(row)
 
     @staticmethod
     def get_analysis_for_barcode(
@@ -166,18 +179,17 @@ class ReportDashboard:
         if from_datetime:
             from_datetime = from_datetime + \
                 timedelta(hours=0, minutes=0, seconds=0)
-        running_stock = StockRunningOperator.get_running_stock_report(
-            barcode, to_datetime
-        )
-        stock_out = StockOutOperator.get_stock_out_data_for_barcode(
-            barcode, from_datetime, to_datetime
-        )
-        stock_adjustment = StockAdjustmentOperator.get_stock_adjustment_data_for_barcode(
-            barcode=barcode, from_datetime=from_datetime, to_datetime=to_datetime
+        running_stock, movements = run_report_queries(
+            lambda: StockRunningOperator.get_running_stock_report(
+                barcode, to_datetime
+            ),
+            lambda: InventoryLedgerOperator.movements_for_barcode(
+                barcode_found.id, from_datetime, to_datetime
+            ),
         )
-
-        stocks = StockOperator.get_stock_report(
-            barcode, from_datetime, to_datetime)
+        by_type = {movement_type: [] for movement_type in MovementType}
+        for movement in movements:
+            by_type[movement.movement_type].append(movement)
         return {
             "description": {
                 "barcode": barcode,
@@ -191,37 +203,30 @@ class ReportDashboard:
                 if running_stock
                 else {}
             ),
-            "stock_out": (
-                [
-                    {
-                        "created_at": stock.created_at.isoformat(),
-                        "quantity": stock.quantity,
-                        "cost": stock.cost,
-                    }
-                    for stock in stock_out
-                ]
-                if stock_out
-                else []
-            ),
-            "stock_in": (
-                [
-                    {
-                        "quantity": stock.quantity_initiated,
-                        "cost": stock.cost,
-                        "created_at": stock.created_at.isoformat(),
-                    }
-                    for stock in stocks
-                ]
-                if stocks
-                else []
-            ),
+            "stock_out": [
+                {
+                    "created_at": movement.created_at.isoformat(),
+                    "quantity": -movement.quantity,
+                    "cost": movement.unit_cost,
+                }
+                for movement in by_type[MovementType.stock_out]
+            ],
+            "stock_in": [
+                {
+                    "quantity": movement.quantity,
+                    "cost": movement.unit_cost,
+                    "created_at": movement.created_at.isoformat(),
+                }
+                for movement in by_type[MovementType.stock_in]
+            ],
             "stock_adjustment": [
                 {
-                    "quantity": stock_adj.quantity,
-                    "cost": stock_adj.cost,
-                    "created_at": stock_adj.created_at.isoformat(),
-                } for stock_adj in stock_adjustment
-            ] if stock_adjustment else []
+                    "quantity": -movement.quantity,
+                    "cost": movement.unit_cost,
+                    "created_at": movement.created_at.isoformat(),
+                }
+                for movement in by_type[MovementType.adjustment]
+            ],
         }
 
     @staticmethod
@@ -253,6 +258,9 @@ class ReportDashboard:
                         Staff.department_id == Department.id
                     )
                 )
+                .options(
+                    selectinload(Orders.stock_out).joinedload(StockOut.barcode)
+                )
                 .filter(Department.id == department_id, and_(*filters))
                 .all()
             )
@@ -276,18 +284,20 @@ class ReportDashboard:
             ]
 
     @staticmethod
+    @ReportCache.cached("monthly_collection", tags=("orders",))
     def monthly_collection_report(year: int):
         if not year:
             year = datetime.now().year
         with DBSession() as db:
             stmt = (
                 select(
-                    func.date_trunc('month', Orders.created_at).label('month'),
-                    func.count(Orders.id).label('total_orders'),
-                    func.sum(Orders.quantity).label('total_quantity'),
+                    func.date_trunc('month', DailyMovement.day).label('month'),
+                    func.sum(DailyMovement.orders).label('total_orders'),
+                    func.sum(DailyMovement.out_quantity).label('total_quantity'),
                 )
                 .where(
-                    extract('year', Orders.created_at) == year
+                    extract('year', DailyMovement.day) == year,
+                    DailyMovement.orders > 0,
                 )
                 .group_by('month')
             )
@@ -303,12 +313,14 @@ class ReportDashboard:
         ]
 
     @staticmethod
+    @ReportCache.cached("collection_years", tags=("orders",), ttl=3600)
     def get_collection_yearly_values():
         with DBSession() as db:
             stmt = (
                 select(
-                    func.date_trunc('year', Orders.created_at).label('year'),
+                    func.date_trunc('year', DailyMovement.day).label('year'),
                 )
+                .where(DailyMovement.orders > 0)
                 .group_by('year')
             )
 
@@ -350,12 +362,14 @@ class ReportDashboard:
             if not order_filters:
                 orders = (
                     db.query(Orders)
+                    .options(selectinload(Orders.stock_out))
                     .filter(Orders.barcode.has(Barcode.erm_code == erm_code))
                     .all()
                 )
             else:
                 orders = (
                     db.query(Orders)
+                    .options(selectinload(Orders.stock_out))
                     .filter(
                         Orders.barcode.has(
                             Barcode.erm_code == erm_code), and_(*order_filters)
@@ -426,6 +440,7 @@ class ReportDashboard:
             )
         with DBSession() as db:
             return db.query(PurchaseOrders) \
+                .options(*purchase_order_out_options()) \
                 .filter(
                     PurchaseOrders.supplier_id == supplier_id,
                     and_(
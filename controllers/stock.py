@@ -1,18 +1,39 @@
 import datetime
+from collections import Counter
+from types import SimpleNamespace
 from typing import Any, Union
 
-from sqlalchemy import and_, func
+from sqlalchemy import and_, case, func, insert, select, update
+from sqlalchemy.orm import Session, selectinload
 
+from controllers.operations import staff_out_options
+
+from controllers.code_counter import CodeCounterOperator
+from controllers.daily_movement import DailyMovementOperator as DM
+from controllers.inventory_ledger import InventoryLedgerOperator as IL
 from controllers.stock_running import StockRunningOperator as SR
-from controllers.stock_out import StockOutOperator as SO
+from controllers.stock_summary import StockSummaryOperator
 from error import AppError
 from models.barcode import Barcode
 from models.stock import Stock
 from models.category import Category
 from models.evaluation import CostEvaluation
-from schemas.stock import StockIn, BarcodeIn, UpdateIn
-from utils.generate import generate_codes
-from utils.session import DBSession
+from models.stock_out import StockOut
+from schemas.stock import StockIn, BarcodeIn, PageQuery, UpdateIn
+from utils.countFilter import KeysetFilter
+from utils.enum import MovementType
+from utils.generate import code_prefix
+from utils.report_cache import ReportCache
+from utils.session import DBSession, commit
+
+
+def stock_out_options() -> tuple:
+    """Load plan for what the StockOut schema serializes."""
+    return (
+        selectinload(Stock.barcode),
+        selectinload(Stock.creator).options(*staff_out_options()),
+        selectinload(Stock.modifier).options(*staff_out_options()),
+    )
 
 
 def parse_stock_data(stock_data: Union[Any, list, None]):
@@ -43,16 +64,131 @@ def parse_stock_data(stock_data: Union[Any, list, None]):
     }
 
 
+def allocate_fifo(lots: list[Any], quantity: int) -> list[dict[str, Any]]:
+    """
+    Allocate ``quantity`` over stock lots in the order given.
+
+    Args:
+        lots (list): Rows exposing ``id``, ``quantity`` and ``cost``,
+        oldest lot first.
+        quantity (int): The quantity to consume.
+
+    Returns:
+        list: One entry per lot touched with the quantity taken from it and
+        the quantity left on it.
+    """
+    allocations = []
+    for lot in lots:
+        taken = min(lot.quantity, quantity)
+        allocations.append(
+            {
+                "stock_id": lot.id,
+                "cost": lot.cost,
+                "quantity": taken,
+                "remaining": lot.quantity - taken,
+            }
+        )
+        quantity -= taken
+        if quantity <= 0:
+            break
+    return allocations
+
+
+def lock_open_lots(db: Session, wanted: dict[int, int]) -> list[Any]:
+    """
+    Lock the unsold stock lots of barcodes, cancelled ones aside, oldest
+    lot first, stopping at the lots which cover the quantity wanted.
+
+    A lot is locked while the lots before it hold less than the quantity
+    wanted of its barcode. Lots consumed by a concurrent collection while
+    waiting for their lock are short of what was expected, so the lots
+    after them are locked in turn until the quantity is covered or no lot
+    is left. Lots are locked ordered by barcode id then lot id so
+    concurrent collections lock them in the same order.
+
+    Args:
+        db (Session): The session the lots are locked in.
+        wanted (dict): The quantity wanted of each barcode id.
+
+    Returns:
+        list: The id, barcode_id, quantity and cost of the lots locked,
+        ordered by barcode id then lot id.
+    """
+    locked = []
+    after: dict[int, int] = {}
+    while wanted:
+        open_lots = and_(
+            Stock.barcode_id.in_(wanted),
+            Stock.sold.is_(False),
+            Stock.cancelled.is_(False),
+        )
+        if after:
+            open_lots = and_(
+                open_lots, Stock.id > case(after, value=Stock.barcode_id, else_=0)
+            )
+        earlier = (
+            select(
+                Stock.id,
+                Stock.barcode_id,
+                # units of the lots before this one
+                (
+                    func.sum(Stock.quantity).over(
+                        partition_by=Stock.barcode_id,
+                        order_by=Stock.id,
+                        rows=(None, 0),
+                    )
+                    - Stock.quantity
+                ).label("before"),
+            )
+            .where(open_lots)
+            .subquery()
+        )
+        rows = db.execute(
+            select(Stock.id, Stock.barcode_id, Stock.quantity, Stock.cost)
+            .where(
+                and_(
+                    Stock.id.in_(
+                        select(earlier.c.id).where(
+                            earlier.c.before
+                            < case(wanted, value=earlier.c.barcode_id)
+                        )
+                    ),
+                    open_lots,
+                )
+            )
+            .order_by(Stock.barcode_id.asc(), Stock.id.asc())
+            .with_for_update()
+        ).all()
+        locked.extend(rows)
+        found = Counter()
+        for row in rows:
+            found[row.barcode_id] += row.quantity
+            after[row.barcode_id] = row.id
+        wanted = {
+            barcode_id: quantity - found[barcode_id]
+            for barcode_id, quantity in wanted.items()
+            if barcode_id in found and quantity > found[barcode_id]
+        }
+    locked.sort(key=lambda row: (row.barcode_id, row.id))
+    return locked
+
+
 class StockOperator:
     @staticmethod
-    def get_all_stocks():
+    def get_all_stocks(page: PageQuery = None):
         with DBSession() as db:
-            return db.query(Stock).filter(Stock.cancelled.is_(False)).order_by(Stock.id.desc()).all()
+            query = (
+                db.query(Stock)
+                .options(*stock_out_options())
+                .filter(Stock.cancelled.is_(False))
+            )
+        return KeysetFilter(page, query, Stock.id).apply()
 
     @staticmethod
-    def get_all_barcodes():
+    def get_all_barcodes(page: PageQuery = None):
         with DBSession() as db:
-            return db.query(Barcode).order_by(Barcode.id.desc()).all()
+            query = db.query(Barcode)
+        return KeysetFilter(page, query, Barcode.id).apply()
 
     @staticmethod
     def add_stock(data: StockIn, staff_id: int):
@@ -68,75 +204,234 @@ class StockOperator:
             quantity=quantity_allocated,
             quantity_initiated=quantity_allocated,
         )
-        value = new_stock.save()
-        SR.create_running_stock(
-            barcode=barcode_found.barcode,
-            stock_operator=StockOperator,
-            add_stock_quantity=quantity_allocated,
-        )
-        return value
+        with DBSession() as db:
+            db.add(new_stock)
+            db.flush()
+            SR.apply_movement(
+                db,
+                barcode_found.id,
+                stock_quantity=quantity_allocated,
+                cost=quantity_allocated * cost_allocated,
+            )
+            DM.record(
+                db,
+                new_stock.created_at.date(),
+                barcode_found.id,
+                in_quantity=quantity_allocated,
+                in_cost=quantity_allocated * cost_allocated,
+            )
+            IL.record(
+                db,
+                barcode_found.id,
+                MovementType.stock_in,
+                quantity_allocated,
+                cost_allocated,
+                stock_id=new_stock.id,
+            )
+            StockSummaryOperator.refresh(db, [barcode_found.id])
+            commit(db, new_stock)
+        return new_stock
+
+    @staticmethod
+    def add_stocks(data: list[StockIn], staff_id: Union[int, list[int]]) -> list[int]:
+        """
+        Stock in many lots in one transaction.
+
+        The lots are written with a single multi-row insert, and the running
+        stocks and the daily movements of their barcodes with one statement
+        each, whatever the number of lots.
+
+        Args:
+            data (list[StockIn]): The lots to stock in.
+            staff_id (int or list[int]): The staff member creating the lots,
+                or the creator of each lot in the order of ``data``.
+
+        Returns:
+            list[int]: The ids of the new lots, in the order of ``data``.
+        """
+        if not data:
+            return []
+        creators = staff_id if isinstance(staff_id, list) else [staff_id] * len(data)
+        barcode_ids = {stock_in.barcode_id for stock_in in data}
+        with DBSession() as db:
+            found = db.execute(
+                select(Barcode.id).where(Barcode.id.in_(barcode_ids))
+            ).scalars().all()
+            if len(found) != len(barcode_ids):
+                raise AppError(message="Invalid Barcode Provided", status_code=400)
+            lots = db.execute(
+                insert(Stock).returning(
+                    Stock.id, Stock.created_at, sort_by_parameter_order=True
+                ),
+                [
+                    {
+                        "barcode_id": stock_in.barcode_id,
+                        "created_by": creator,
+                        "cost": stock_in.cost,
+                        "quantity": stock_in.quantity,
+                        "quantity_initiated": stock_in.quantity,
+                    }
+                    for stock_in, creator in zip(data, creators)
+                ],
+            ).all()
+            SR.apply_movements(
+                db,
+                [
+                    {
+                        "barcode_id": stock_in.barcode_id,
+                        "stock_quantity": stock_in.quantity,
+                        "cost": stock_in.quantity * stock_in.cost,
+                    }
+                    for stock_in in data
+                ],
+            )
+            DM.record_many(
+                db,
+                [
+                    {
+                        "day": lot.created_at.date(),
+                        "barcode_id": stock_in.barcode_id,
+                        "in_quantity": stock_in.quantity,
+                        "in_cost": stock_in.quantity * stock_in.cost,
+                    }
+                    for stock_in, lot in zip(data, lots)
+                ],
+            )
+            IL.record_many(
+                db,
+                [
+                    {
+                        "barcode_id": stock_in.barcode_id,
+                        "movement_type": MovementType.stock_in,
+                        "quantity": stock_in.quantity,
+                        "unit_cost": stock_in.cost,
+                        "stock_id": lot.id,
+                    }
+                    for stock_in, lot in zip(data, lots)
+                ],
+            )
+            StockSummaryOperator.refresh(db, barcode_ids)
+            commit(db)
+        return [lot.id for lot in lots]
 
     @staticmethod
-    def update_stock_and_cost(
-        quantity: int,
-        barcode_id: int,
-        order_id: int,
-    ) -> Union[float, None]:
-        total_cost = 0
+    def get_stocks_by_ids(stock_ids: list[int]) -> list[Stock]:
         with DBSession() as db:
             stocks = (
                 db.query(Stock)
-                .filter(and_(Stock.barcode_id == barcode_id, Stock.sold.is_(False)))
-                .order_by(Stock.id.asc())
+                .options(*stock_out_options())
+                .filter(Stock.id.in_(stock_ids))
                 .all()
             )
-            if len(stocks) == 0:
-                return
-            for stock in stocks:
-                should_break = False
-                if stock.quantity >= quantity:
-                    stock.quantity -= quantity
-                    StockOperator.add_cost_evaluation_data(
-                        stock_obj=stock, quantity=quantity
-                    )
-                    if stock.quantity == 0:
-                        stock.sold = True
-                    stock.sold_at = datetime.datetime.now()
-                    db.add(stock)
-                    db.commit()
-                    db.refresh(stock)
-                    SO.create_stock_out(
-                        barcode_id=barcode_id,
-                        quantity=quantity,
-                        order_id=order_id,
-                        cost=stock.cost
-                    )
-                    total_cost += stock.cost * quantity
-                    should_break = True
-
-                else:
-                    old_quantity = stock.quantity
-                    quantity = quantity - stock.quantity
-                    stock.quantity = 0
-                    stock.sold = True
-                    stock.sold_at = datetime.datetime.now()
-                    db.add(stock)
-                    db.commit()
-                    db.refresh(stock)
-                    StockOperator.add_cost_evaluation_data(
-                        stock_obj=stock,
-                        quantity=old_quantity,
-                    )
-                    SO.create_stock_out(
-                        barcode_id=barcode_id,
-                        quantity=old_quantity,
-                        order_id=order_id,
-                        cost=stock.cost
-                    )
-                    total_cost += stock.cost * old_quantity
-                if should_break:
-                    break
-        return total_cost
+        by_id = {stock.id: stock for stock in stocks}
+        return [by_id[stock_id] for stock_id in stock_ids]
+
+    @staticmethod
+    def consume_fifo(
+        db: Session, collections: list[dict[str, Any]]
+    ) -> dict[int, Union[float, None]]:
+        """
+        Consume the quantities collected by orders from the unsold stock lots
+        of their barcodes, cancelled ones aside, oldest lot first, in the
+        transaction of ``db``.
+
+        Only the oldest lots covering the quantities collected are locked,
+        by lock_open_lots. The allocation is computed in one pass over the
+        collections, in the order given, and the lot updates, cost
+        evaluation and stock out rows are written as bulk statements.
+
+        Args:
+            db (Session): The session the collections are written with.
+            collections (list[dict]): The barcode_id, order_id and quantity
+                of each collection.
+
+        Returns:
+            dict: The total cost of each order, or None when its barcode has
+            no unsold stock.
+        """
+        wanted = Counter()
+        for collection in collections:
+            wanted[collection["barcode_id"]] += collection["quantity"]
+        rows = lock_open_lots(db, dict(wanted))
+        lots: dict[int, list[SimpleNamespace]] = {}
+        for row in rows:
+            lots.setdefault(row.barcode_id, []).append(
+                SimpleNamespace(id=row.id, quantity=row.quantity, cost=row.cost)
+            )
+
+        total_costs: dict[int, Union[float, None]] = {}
+        updates: dict[int, dict[str, Any]] = {}
+        consumed: list[dict[str, Any]] = []
+        sold_at = datetime.datetime.now()
+        for collection in collections:
+            barcode_lots = lots.get(collection["barcode_id"])
+            if not barcode_lots:
+                total_costs[collection["order_id"]] = None
+                continue
+            allocations = allocate_fifo(barcode_lots, collection["quantity"])
+            for lot, allocation in zip(barcode_lots, allocations):
+                # later collections of the barcode see what this one left
+                lot.quantity = allocation["remaining"]
+                updates[lot.id] = {
+                    "id": lot.id,
+                    "quantity": allocation["remaining"],
+                    "sold": allocation["remaining"] == 0,
+                    "sold_at": sold_at,
+                }
+                if allocation["quantity"]:
+                    consumed.append({**collection, **allocation})
+            lots[collection["barcode_id"]] = [
+                lot for lot in barcode_lots if lot.quantity
+            ]
+            total_costs[collection["order_id"]] = sum(
+                allocation["cost"] * allocation["quantity"]
+                for allocation in allocations
+            )
+
+        if updates:
+            db.execute(update(Stock), list(updates.values()))
+        if consumed:
+            IL.record_many(
+                db,
+                [
+                    {
+                        "barcode_id": allocation["barcode_id"],
+                        "movement_type": MovementType.stock_out,
+                        "quantity": -allocation["quantity"],
+                        "unit_cost": allocation["cost"],
+                        "stock_id": allocation["stock_id"],
+                        "order_id": allocation["order_id"],
+                    }
+                    for allocation in consumed
+                ],
+            )
+            db.execute(
+                insert(CostEvaluation),
+                [
+                    {
+                        "barcode_id": allocation["barcode_id"],
+                        "cost": allocation["cost"],
+                        "quantity": allocation["quantity"],
+                        "total": round(
+                            float(allocation["quantity"] * allocation["cost"]), 2
+                        ),
+                    }
+                    for allocation in consumed
+                ],
+            )
+            db.execute(
+                insert(StockOut),
+                [
+                    {
+                        "barcode_id": allocation["barcode_id"],
+                        "order_id": allocation["order_id"],
+                        "quantity": allocation["quantity"],
+                        "cost": allocation["cost"],
+                    }
+                    for allocation in consumed
+                ],
+            )
+        return total_costs
 
     @staticmethod
     def get_all_stocks_not_sold(barcode_id: int) -> list[Stock]:
@@ -147,34 +442,16 @@ class StockOperator:
                 .all()
 
     @staticmethod
-    def add_cost_evaluation_data(stock_obj: Stock, quantity: int):
-        new_cost_data = CostEvaluation(
-            barcode_id=stock_obj.barcode_id,
-            cost=stock_obj.cost,
-            quantity=quantity,
-            total=round(float(quantity * stock_obj.cost), 2),
-        )
-        new_cost_data.save()
-
-    @staticmethod
-    def get_all_cost_evaluation_data():
+    def get_all_cost_evaluation_data(page: PageQuery = None):
         with DBSession() as db:
-            return db.query(CostEvaluation).order_by(CostEvaluation.id.desc()).all()
+            query = db.query(CostEvaluation).options(
+                selectinload(CostEvaluation.barcode)
+            )
+        return KeysetFilter(page, query, CostEvaluation.id).apply()
 
     @staticmethod
-    def group_all_stock_barcode():
-        with DBSession() as db:
-            query = (
-                db.query(
-                    Barcode,
-                    func.sum(Stock.quantity_initiated).label("total_quantity"),
-                    func.array_agg(Stock.cost).label("cost_list"),
-                )
-                .join(Stock, Barcode.id == Stock.barcode_id)
-                .filter(Stock.cancelled.is_(False))
-                .group_by(Barcode)
-            )
-        return parse_stock_data(query.all())
+    def group_all_stock_barcode(page: PageQuery = None, with_prices: bool = False):
+        return StockSummaryOperator.get_summaries(page, with_prices)
 
     @staticmethod
     def get_grouped_stocks_with_stock_barcode(barcode: str):
@@ -245,7 +522,12 @@ class StockOperator:
     @staticmethod
     def get_stock_by(id_or_barcode: Union[str, int]):
         with DBSession() as db:
-            return db.query(Stock).filter(and_(Stock.id == id_or_barcode, Stock.cancelled.is_(False))).first()
+            return (
+                db.query(Stock)
+                .options(*stock_out_options())
+                .filter(and_(Stock.id == id_or_barcode, Stock.cancelled.is_(False)))
+                .first()
+            )
 
     @staticmethod
     def get_barcode(barcode: Union[str, int]):
@@ -266,6 +548,9 @@ class StockOperator:
                 message="Sorry, can't update this stock info, it is in use",
                 status_code=400,
             )
+        previous_barcode_id = stock_found.barcode_id
+        previous_quantity = stock_found.quantity_initiated
+        previous_cost = stock_found.cost
         # update stock details
         stock_found.updated_at = datetime.datetime.now()
         stock_found.barcode_id = data.barcode_id
@@ -274,11 +559,59 @@ class StockOperator:
         stock_found.quantity_initiated = quantity
         stock_found.updated_at = datetime.datetime.now()
         stock_found.cost = data.cost
-        SR.create_running_stock(
-            barcode=stock_found.barcode.barcode,
-            stock_operator=StockOperator,
-        )
-        stock_found.save(merge=True)
+        with DBSession() as db:
+            stock_found = db.merge(stock_found)
+            SR.apply_movement(
+                db,
+                previous_barcode_id,
+                stock_quantity=-previous_quantity,
+                cost=-previous_quantity * previous_cost,
+            )
+            SR.apply_movement(
+                db,
+                stock_found.barcode_id,
+                stock_quantity=quantity,
+                cost=quantity * data.cost,
+            )
+            day = stock_found.created_at.date()
+            DM.record(
+                db,
+                day,
+                previous_barcode_id,
+                in_quantity=-previous_quantity,
+                in_cost=-previous_quantity * previous_cost,
+            )
+            DM.record(
+                db,
+                day,
+                stock_found.barcode_id,
+                in_quantity=quantity,
+                in_cost=quantity * data.cost,
+            )
+            IL.record_many(
+                db,
+                [
+                    {
+                        "barcode_id": previous_barcode_id,
+                        "movement_type": MovementType.stock_in,
+                        "quantity": -previous_quantity,
+                        "unit_cost": previous_cost,
+                        "stock_id": stock_id,
+                    },
+                    {
+                        "barcode_id": stock_found.barcode_id,
+                        "movement_type": MovementType.stock_in,
+                        "quantity": quantity,
+                        "unit_cost": data.cost,
+                        "stock_id": stock_id,
+                    },
+                ],
+            )
+            db.flush()
+            StockSummaryOperator.refresh(
+                db, [previous_barcode_id, stock_found.barcode_id]
+            )
+            commit(db, stock_found)
         return stock_found
 
     @staticmethod
@@ -292,16 +625,31 @@ class StockOperator:
                     message="Sorry, can't delete this stock, it is in use",
                     status_code=400,
                 )
-            quantity = stock_found.quantity
-            barcode_value = stock_found.barcode.barcode
-            SR.create_running_stock(
-                barcode=barcode_value,
-                stock_operator=StockOperator,
-                should_delete_quantity=True,
-                order_quantity=quantity,
+            SR.apply_movement(
+                db,
+                stock_found.barcode_id,
+                stock_quantity=-stock_found.quantity_initiated,
+                cost=-stock_found.quantity_initiated * stock_found.cost,
+            )
+            DM.record(
+                db,
+                stock_found.created_at.date(),
+                stock_found.barcode_id,
+                in_quantity=-stock_found.quantity_initiated,
+                in_cost=-stock_found.quantity_initiated * stock_found.cost,
+            )
+            IL.record(
+                db,
+                stock_found.barcode_id,
+                MovementType.stock_in,
+                -stock_found.quantity_initiated,
+                stock_found.cost,
+                stock_id=stock_found.id,
             )
             db.delete(stock_found)
-            db.commit()
+            db.flush()
+            StockSummaryOperator.refresh(db, [stock_found.barcode_id])
+            commit(db)
         return True
 
     @staticmethod
@@ -309,46 +657,108 @@ class StockOperator:
         stock_found = StockOperator.get_stock_by(stock_id)
         if not stock_found:
             raise AppError(message="Stock not found", status_code=404)
-        stock_found.update({"cancelled": True})
-        barcode_value = stock_found.barcode.barcode
-        SR.handle_cancelled_stocks(
-            barcode=barcode_value,
-            quantity=stock_found.quantity_initiated,
-        )
+        with DBSession() as db:
+            stock_found = db.merge(stock_found)
+            stock_found.cancelled = True
+            db.flush()
+            SR.apply_movement(
+                db,
+                stock_found.barcode_id,
+                stock_quantity=-stock_found.quantity_initiated,
+                cost=-stock_found.quantity_initiated * stock_found.cost,
+            )
+            DM.record(
+                db,
+                stock_found.created_at.date(),
+                stock_found.barcode_id,
+                in_quantity=-stock_found.quantity_initiated,
+                in_cost=-stock_found.quantity_initiated * stock_found.cost,
+            )
+            IL.record(
+                db,
+                stock_found.barcode_id,
+                MovementType.stock_in,
+                -stock_found.quantity_initiated,
+                stock_found.cost,
+                stock_id=stock_found.id,
+            )
+            StockSummaryOperator.refresh(db, [stock_found.barcode_id])
+            commit(db)
         return True
 
 
 class ScanStock:
     @staticmethod
     def add_barcode(data: BarcodeIn) -> Barcode:
-        with DBSession() as db:
-            found_barcode = (
-                db.query(Barcode).filter(
-                    Barcode.barcode == data.barcode).first()
+        return ScanStock.add_barcodes([data])[0]
+
+    @staticmethod
+    def add_barcodes(barcodes: list[BarcodeIn]) -> list[Barcode]:
+        """
+        Add barcodes in a single transaction, either all or none of them.
+
+        The codes of each category are reserved as one block from its
+        counter, the counters being locked in prefix order so concurrent
+        imports cannot deadlock.
+
+        Returns:
+            list[Barcode]: The barcodes added, in the order given.
+        """
+        scanned = [data.barcode for data in barcodes]
+        repeated = sorted(
+            {barcode for barcode, seen in Counter(scanned).items() if seen > 1}
+        )
+        if repeated:
+            raise AppError(
+                message=f"Scan Barcode repeated: {', '.join(repeated)}",
+                status_code=400,
             )
-            if found_barcode:
+        with DBSession() as db:
+            existing = db.scalars(
+                select(Barcode.barcode).where(Barcode.barcode.in_(scanned))
+            ).all()
+            if existing:
                 raise AppError(
-                    message="Scan Barcode already exists", status_code=400)
-            # get the last barcode added
-            last_barcode = (
-                db.query(Barcode)
-                .filter(Barcode.code.ilike(f"%SK{data.category.upper()[0]}%"))
-                .order_by(Barcode.id.desc())
-                .first()
+                    message="Scan Barcode already exists: "
+                    f"{', '.join(sorted(existing))}",
+                    status_code=400,
+                )
+            names = {data.category for data in barcodes}
+            categories = dict(
+                db.execute(
+                    select(Category.name, Category.id).where(
+                        Category.name.in_(names)
+                    )
+                ).all()
             )
-        category_found = Category.get(data.category)
-        if not category_found:
-            raise ValueError(
-                "Please enter a category before you add a barcode")
-
-        data.__dict__["code"] = generate_codes(
-            previous_code=last_barcode.code if last_barcode else None,
-            category=data.category,
-        )
-        data.__dict__["category_id"] = category_found.id
-        data.__dict__.pop("category")
-        scan_created = Barcode(**data.__dict__)
-        return scan_created.save()
+            if names - categories.keys():
+                raise ValueError("Please enter a category before you add a barcode")
+
+            by_prefix: dict[str, list[int]] = {}
+            for index, data in enumerate(barcodes):
+                by_prefix.setdefault(code_prefix(data.category), []).append(index)
+            codes = [None] * len(barcodes)
+            for prefix in sorted(by_prefix):
+                indexes = by_prefix[prefix]
+                reserved = CodeCounterOperator.reserve(db, prefix, len(indexes))
+                for index, code in zip(indexes, reserved):
+                    codes[index] = code
+
+            barcode_ids = db.scalars(
+                insert(Barcode).returning(Barcode.id, sort_by_parameter_order=True),
+                [
+                    {
+                        **data.model_dump(exclude={"category"}),
+                        "code": code,
+                        "category_id": categories[data.category],
+                    }
+                    for data, code in zip(barcodes, codes)
+                ],
+            ).all()
+            commit(db)
+            added = db.query(Barcode).filter(Barcode.id.in_(barcode_ids)).all()
+        by_id = {barcode.id: barcode for barcode in added}
+        return [by_id[barcode_id] for barcode_id in barcode_ids]
 
     @staticmethod
     def get_barcode(barcode_id: int) -> Barcode:
@@ -366,8 +776,15 @@ class ScanStock:
         barcode_found.barcode = data.barcode
         barcode_found.location = data.location
         barcode_found.specification = data.specification
+        erm_code_changed = bool(data.erm_code) and data.erm_code != barcode_found.erm_code
         barcode_found.erm_code = data.erm_code or barcode_found.erm_code
-        return barcode_found.save(merge=True)
+        barcode_found = barcode_found.save(merge=True)
+        if erm_code_changed:
+            with DBSession() as db:
+                DM.rename_erm_code(db, barcode_found.id, barcode_found.erm_code)
+                commit(db)
+            ReportCache.invalidate("barcodes")
+        return barcode_found
 
     @staticmethod
     def delete_barcode(barcode_id: int) -> bool:
@@ -387,5 +804,5 @@ class ScanStock:
                     status_code=400,
                 )
             db.delete(found_barcode)
-            db.commit()
+            commit(db)
         return True
@@ -2,18 +2,24 @@ import datetime
 from typing import Any, Union
 
 from sqlalchemy import func, and_
+from sqlalchemy.orm import selectinload
 
+from controllers.daily_movement import DailyMovementOperator as DM
+from controllers.inventory_ledger import InventoryLedgerOperator as IL
 from controllers.stock import StockOperator as SO
 from controllers.stock_running import StockRunningOperator as SR
 from models.barcode import Barcode
 from models.stock_adjustment import StockAdjustment
 from schemas.stock import (
     StockAdjustmentIn,
+    PageQuery,
     UpdateStockAdjustmentIn,
     StockQuery
 )
-from utils.session import DBSession
-from utils.countFilter import StockFilter
+from utils.enum import MovementType
+from utils.report_cache import ReportCache
+from utils.session import DBSession, commit
+from utils.countFilter import KeysetFilter, StockFilter
 
 
 def parse_stock_adjustment_data(data: Union[Any, list, None]):
@@ -45,11 +51,12 @@ def parse_stock_adjustment_data(data: Union[Any, list, None]):
 
 class StockAdjustmentOperator:
     @staticmethod
-    def get_all_stock_adjustments():
+    def get_all_stock_adjustments(page: PageQuery = None):
         with DBSession() as db:
-            data = db.query(StockAdjustment).order_by(
-                StockAdjustment.id.desc()).all()
-        return data
+            query = db.query(StockAdjustment).options(
+                selectinload(StockAdjustment.barcode)
+            )
+        return KeysetFilter(page, query, StockAdjustment.id).apply()
 
     @staticmethod
     def create_stock_adjustment(
@@ -72,6 +79,9 @@ class StockAdjustmentOperator:
         all_stocks = SO.get_all_stocks_not_sold(barcode_found.id)
         if not all_stocks:
             raise ValueError("No Stocks available to be adjusted")
+        adjusted_quantity = 0
+        adjusted_value = 0
+        movements = []
         for stock in all_stocks:
             if stock.quantity <= data.quantity:
                 stock_aj = StockAdjustment(
@@ -94,30 +104,41 @@ class StockAdjustmentOperator:
                 stock.quantity -= data.quantity
                 stock.save(merge=True)
                 stock_aj.save()
+                data.quantity = 0
+            adjusted_quantity += stock_aj.quantity
+            adjusted_value += stock_aj.quantity * stock_aj.cost
+            movements.append(
+                {
+                    "barcode_id": barcode_found.id,
+                    "movement_type": MovementType.adjustment,
+                    "quantity": -stock_aj.quantity,
+                    "unit_cost": stock_aj.cost,
+                    "stock_id": stock.id,
+                    "stock_adjustment_id": stock_aj.id,
+                }
+            )
+            if not data.quantity:
                 break
 
-        grouped_data: dict[str, Any] = (
-            StockAdjustmentOperator.get_grouped_stock_adjustments_by_barcode(
-                barcode)
-        )
-        SR.create_running_stock(
-            barcode,
-            stock_operator=SO,
-            adjustment_quantity=grouped_data.get("quantity"),
-            order_quantity=data.quantity,
-            stock_adjustment_op=StockAdjustmentOperator
-        )
-        return True
-    
-    @staticmethod
-    def get_stock_adjustments_value(barcode: str):
         with DBSession() as db:
-            value = db.query(
-                func.sum(StockAdjustment.quantity * StockAdjustment.cost)
-                ).filter(
-                StockAdjustment.barcode.has(Barcode.barcode == barcode)
-            ).first()
-            return value[0]
+            SR.apply_movement(
+                db,
+                barcode_found.id,
+                adjustment_quantity=adjusted_quantity,
+                cost=-adjusted_value,
+            )
+            DM.record(
+                db,
+                stock_aj.created_at.date(),
+                barcode_found.id,
+                data.department_id,
+                adjustment_quantity=adjusted_quantity,
+                adjustment_cost=adjusted_value,
+            )
+            IL.record_many(db, movements)
+            commit(db)
+        ReportCache.invalidate("adjustments")
+        return True
 
     @staticmethod
     def update_stock_adjustment(id: int, data: UpdateStockAdjustmentIn, staff_id: int):
@@ -128,24 +149,45 @@ class StockAdjustmentOperator:
             )
             if not stock_adj_found:
                 raise ValueError("Stock Adjustment record not found")
+            SR.apply_movement(
+                db,
+                stock_adj_found.barcode_id,
+                adjustment_quantity=data.quantity - stock_adj_found.quantity,
+                cost=(stock_adj_found.quantity - data.quantity) * stock_adj_found.cost,
+            )
+            day = stock_adj_found.created_at.date()
+            DM.record(
+                db,
+                day,
+                stock_adj_found.barcode_id,
+                stock_adj_found.department_id,
+                adjustment_quantity=-stock_adj_found.quantity,
+                adjustment_cost=-stock_adj_found.quantity * stock_adj_found.cost,
+            )
+            DM.record(
+                db,
+                day,
+                stock_adj_found.barcode_id,
+                data.department_id,
+                adjustment_quantity=data.quantity,
+                adjustment_cost=data.quantity * stock_adj_found.cost,
+            )
+            IL.record(
+                db,
+                stock_adj_found.barcode_id,
+                MovementType.adjustment,
+                stock_adj_found.quantity - data.quantity,
+                stock_adj_found.cost,
+                stock_adjustment_id=stock_adj_found.id,
+            )
             stock_adj_found.department_id = data.department_id
             stock_adj_found.quantity = data.quantity
             stock_adj_found.updated_at = datetime.datetime.now()
             stock_adj_found.updated_by = staff_id
             stock_adj_found.updated_at = datetime.datetime.now()
             db.add(stock_adj_found)
-            db.commit()
-            db.refresh(stock_adj_found)
-        grouped_data: dict[str, Any] = (
-            StockAdjustmentOperator.get_grouped_stock_adjustments_by_barcode(
-                stock_adj_found.barcode.barcode
-            )
-        )
-        SR.create_running_stock(
-            stock_adj_found.barcode.barcode,
-            stock_operator=SO,
-            adjustment_quantity=grouped_data.get("quantity"),
-        )
+            commit(db, stock_adj_found)
+        ReportCache.invalidate("adjustments")
         return stock_adj_found
 
     @staticmethod
@@ -157,21 +199,31 @@ class StockAdjustmentOperator:
             )
             if not stock_adj_found:
                 raise ValueError("Stock Adjustment record not found")
-            barcode = stock_adj_found.barcode.barcode
+            SR.apply_movement(
+                db,
+                stock_adj_found.barcode_id,
+                adjustment_quantity=-stock_adj_found.quantity,
+                cost=stock_adj_found.quantity * stock_adj_found.cost,
+            )
+            DM.record(
+                db,
+                stock_adj_found.created_at.date(),
+                stock_adj_found.barcode_id,
+                stock_adj_found.department_id,
+                adjustment_quantity=-stock_adj_found.quantity,
+                adjustment_cost=-stock_adj_found.quantity * stock_adj_found.cost,
+            )
+            IL.record(
+                db,
+                stock_adj_found.barcode_id,
+                MovementType.adjustment,
+                stock_adj_found.quantity,
+                stock_adj_found.cost,
+                stock_adjustment_id=stock_adj_found.id,
+            )
             db.delete(stock_adj_found)
-            db.commit()
-        grouped_data: dict[str, Any] = (
-            StockAdjustmentOperator.get_grouped_stock_adjustments_by_barcode(
-                barcode
-            )
-        )
-        SR.create_running_stock(
-            stock_adj_found.barcode.barcode,
-            stock_operator=SO,
-            adjustment_quantity=(
-                -1 if not grouped_data else grouped_data.get("quantity", 0)
-            ),
-        )
+            commit(db)
+        ReportCache.invalidate("adjustments")
         return True
 
     @staticmethod
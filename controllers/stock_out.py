@@ -1,12 +1,14 @@
 from typing import Any, Union
 
 from sqlalchemy import func, and_
+from sqlalchemy.orm import selectinload
 
 from models.barcode import Barcode
+from models.order import Orders
 from models.stock_out import StockOut
 from utils.session import DBSession
-from schemas.stock import StockQuery
-from utils.countFilter import StockFilter
+from schemas.stock import PageQuery, StockQuery
+from utils.countFilter import KeysetFilter, StockFilter
 
 
 def parse_stock_out_data(data: Union[Any, list, None]):
@@ -36,10 +38,13 @@ def parse_stock_out_data(data: Union[Any, list, None]):
 
 class StockOutOperator:
     @staticmethod
-    def get_all_stocks():
+    def get_all_stocks(page: PageQuery = None):
         with DBSession() as db:
-            data = db.query(StockOut).order_by(StockOut.id.desc()).all()
-        return data
+            query = db.query(StockOut).options(
+                selectinload(StockOut.barcode),
+                selectinload(StockOut.orders).selectinload(Orders.barcode),
+            )
+        return KeysetFilter(page, query, StockOut.id).apply()
 
     @staticmethod
     def create_stock_out(
@@ -82,16 +87,6 @@ class StockOutOperator:
             )
         return parse_stock_out_data(query.one_or_none())
     
-    @staticmethod
-    def get_all_stock_outs_for_barcode(barcode: str):
-        with DBSession() as db:
-            value = db.query(
-                func.sum(StockOut.quantity * StockOut.cost)
-                ).filter(
-                StockOut.barcode.has(Barcode.barcode == barcode)
-            ).first()
-            return value[0]
-
     @staticmethod
     def get_stock_out_data_for_barcode(
         barcode: Union[int, str],
@@ -1,137 +1,348 @@
-from typing import TypeVar, Any
+from typing import Any, Iterable
 
+from controllers.inventory_ledger import InventoryLedgerOperator
 from models.barcode import Barcode
 from models.stock_running import StockRunning
+from models.stock_running_history import StockRunningHistory
 from utils.enum import RunningStockStatus
-from utils.session import DBSession
+from utils.session import DBSession, commit
 from schemas.stock import StockQuery
 from utils.countFilter import StockFilter
-from controllers.stock_out import StockOutOperator
 from typing import Union
-from datetime import datetime as dt
-from sqlalchemy import and_
+from datetime import datetime as dt, timedelta
+from sqlalchemy import (
+    Row,
+    and_,
+    case,
+    cast,
+    delete,
+    exists,
+    func,
+    literal,
+    select,
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session, aliased, selectinload
 
-StockOperator = TypeVar("StockOperator")
-StockAdjustmentOperator = TypeVar("StockAdjustmentOperator")
+RE_ORDER_LEVEL = 10
+
+RUNNING_STOCK_FIELDS = (
+    "stock_quantity",
+    "out_quantity",
+    "adjustment_quantity",
+    "remaining_quantity",
+    "cost",
+)
+
+
+def running_stock_status(remaining_quantity: Any):
+    """
+    Status of a running stock for its remaining quantity, as an SQL
+    expression when given a column expression.
+    """
+    if isinstance(remaining_quantity, int):
+        return (
+            RunningStockStatus.re_order.name
+            if remaining_quantity < RE_ORDER_LEVEL
+            else RunningStockStatus.available.name
+        )
+    return cast(
+        case(
+            (remaining_quantity < RE_ORDER_LEVEL, RunningStockStatus.re_order.name),
+            else_=RunningStockStatus.available.name,
+        ),
+        StockRunning.status.type,
+    )
 
 
 class StockRunningOperator:
 
     @staticmethod
-    def create_running_stock(
-        barcode: str,
-        stock_operator: StockOperator,
-        add_stock_quantity: int = 0,
+    def apply_movement(
+        db: Session,
+        barcode_id: int,
+        stock_quantity: int = 0,
         out_quantity: int = 0,
         adjustment_quantity: int = 0,
-        order_quantity: int = 0,
-        should_delete_quantity: bool = False,
-        stock_adjustment_op: StockAdjustmentOperator = None,
-    ) -> StockRunning:
-        stock_data = stock_operator.get_grouped_stocks_with_stock_barcode(
-            barcode)
-        total_stock_adjustment_value = 0
-        if not stock_data:
-            raise ValueError("No stocks available for barcode")
-
-        quantity = stock_data.get("quantity", 0)
-        total_stock_value = stock_data.get("prices", 0)
-        total_stock_out_value = StockOutOperator.get_all_stock_outs_for_barcode(
-            barcode)
-        if stock_adjustment_op:
-            total_stock_adjustment_value = stock_adjustment_op.get_stock_adjustments_value(
-                barcode=barcode
+        cost: float = 0,
+    ) -> Row:
+        """
+        Apply a stock movement to the running stock of a barcode.
+
+        The running stock is changed in place by the deltas given, in the
+        transaction of ``db``, so the movement is recorded together with
+        the change it causes and its cost does not depend on the history
+        of the barcode.
+
+        Args:
+            db (Session): The session the movement is written with.
+            barcode_id (int): The barcode the movement is for.
+            stock_quantity (int): Change in quantity stocked in.
+            out_quantity (int): Change in quantity collected.
+            adjustment_quantity (int): Change in quantity adjusted.
+            cost (float): Change in value of the stock remaining.
+
+        Returns:
+            Row: The barcode id, remaining quantity, cost and status of the
+            running stock after the movement.
+        """
+        return StockRunningOperator.apply_movements(
+            db,
+            [
+                {
+                    "barcode_id": barcode_id,
+                    "stock_quantity": stock_quantity,
+                    "out_quantity": out_quantity,
+                    "adjustment_quantity": adjustment_quantity,
+                    "cost": cost,
+                }
+            ],
+        )[0]
+
+    @staticmethod
+    def apply_movements(db: Session, movements: list[dict[str, Any]]) -> list[Row]:
+        """
+        Apply many stock movements to the running stocks at once.
+
+        The movements are summed per barcode and upserted by a single
+        INSERT ... ON CONFLICT (barcode_id) DO UPDATE statement, which adds
+        them to the existing running stocks and creates the missing ones,
+        in the order of the barcodes so concurrent writers lock them alike.
+
+        Args:
+            db (Session): The session the movements are written with.
+            movements (list[dict]): The barcode_id of each movement with its
+                stock_quantity, out_quantity, adjustment_quantity and cost
+                deltas, as taken by apply_movement. Missing deltas are 0.
+
+        Returns:
+            list[Row]: The barcode id, remaining quantity, cost and status of
+            each running stock after the movements.
+        """
+        deltas = ("stock_quantity", "out_quantity", "adjustment_quantity", "cost")
+        totals: dict[int, dict[str, Any]] = {}
+        for movement in movements:
+            total = totals.setdefault(
+                movement["barcode_id"], dict.fromkeys(deltas, 0)
+            )
+            for delta in deltas:
+                total[delta] += movement.get(delta, 0)
+        if not totals:
+            return []
+
+        rows = []
+        for barcode_id in sorted(totals):
+            total = totals[barcode_id]
+            remaining = (
+                total["stock_quantity"]
+                - total["out_quantity"]
+                - total["adjustment_quantity"]
             )
-        existing_stock = StockRunningOperator.get_stock_in_inventory(barcode)
-        total_cost = total_stock_value - \
-            ((total_stock_out_value or 0) + (total_stock_adjustment_value or 0))
-        if existing_stock:
-            # Update existing stock
-            updated_stock = StockRunningOperator.update_stock(
-                running_stock_found=existing_stock,
-                quantity=quantity,
-                out_quantity=out_quantity,
-                adjustment_quantity=adjustment_quantity,
-                add_stock_quantity=add_stock_quantity,
-                order_quantity=order_quantity,
-                should_delete_quantity=should_delete_quantity,
+            rows.append(
+                {
+                    "barcode_id": barcode_id,
+                    **total,
+                    "remaining_quantity": remaining,
+                    "status": running_stock_status(remaining),
+                    "updated_at": dt.now(),
+                }
             )
-            updated_status = StockRunningOperator.update_status(updated_stock)
-            updated_status.cost = total_cost
-            return updated_status.save(merge=True)
-        else:
-            # Create new stock
-            remaining_quantity = quantity - \
-                (adjustment_quantity + out_quantity)
-            new_running_stock = StockRunning(
-                barcode_id=stock_data.get("id"),
-                stock_quantity=quantity,
-                out_quantity=out_quantity,
-                adjustment_quantity=adjustment_quantity,
-                remaining_quantity=remaining_quantity,
-                status=(
-                    RunningStockStatus.re_order.name
-                    if remaining_quantity < 10
-                    else RunningStockStatus.available.name
-                ),
+        statement = insert(StockRunning).values(rows)
+        remaining_quantity = (
+            StockRunning.remaining_quantity
+            + statement.excluded.remaining_quantity
+        )
+        updated = db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[StockRunning.barcode_id],
+                set_={
+                    **{
+                        field: getattr(StockRunning, field)
+                        + statement.excluded[field]
+                        for field in RUNNING_STOCK_FIELDS
+                    },
+                    "status": running_stock_status(remaining_quantity),
+                    "updated_at": statement.excluded.updated_at,
+                },
+            ).returning(
+                StockRunning.barcode_id,
+                StockRunning.remaining_quantity,
+                StockRunning.cost,
+                StockRunning.status,
             )
-            new_running_stock.cost = total_cost
-            return new_running_stock.save()
-        
+        ).all()
+        StockRunningOperator.record_history(db, totals)
+        return updated
+
     @staticmethod
-    def handle_cancelled_stocks(barcode: str, quantity: int):
-        existing_stock = StockRunningOperator.get_stock_in_inventory(barcode)
-        if existing_stock:
-            StockRunningOperator.update_stock(
-                existing_stock,
-                order_quantity=quantity,
-                should_delete_quantity=True
-            ).save(merge=True)
+    def record_history(db: Session, barcode_ids: Iterable[int]) -> None:
+        """
+        Copy the running stocks of barcodes to their history as of their
+        last update, in the transaction which changed them.
+        """
+        db.execute(
+            insert(StockRunningHistory).from_select(
+                ["barcode_id", "as_of", *RUNNING_STOCK_FIELDS],
+                select(
+                    StockRunning.barcode_id,
+                    func.coalesce(StockRunning.updated_at, dt.now()),
+                    *(getattr(StockRunning, field) for field in RUNNING_STOCK_FIELDS),
+                ).where(StockRunning.barcode_id.in_(sorted(set(barcode_ids)))),
+            )
+        )
 
     @staticmethod
-    def update_stock(
-        running_stock_found: StockRunning,
-        quantity: int = 0,
-        add_stock_quantity: int = 0,
-        out_quantity: int = 0,
-        adjustment_quantity: int = 0,
-        order_quantity: int = 0,
-        should_delete_quantity: bool = False,
-    ) -> StockRunning:
-        if out_quantity:
-            running_stock_found.out_quantity = out_quantity
-            running_stock_found.remaining_quantity -= order_quantity
-        elif adjustment_quantity:
-            if adjustment_quantity == -1:
-                running_stock_found.adjustment_quantity = 0
-                running_stock_found.remaining_quantity = quantity
-            else:
-                running_stock_found.adjustment_quantity = adjustment_quantity
-                running_stock_found.remaining_quantity -= order_quantity
-
-        elif add_stock_quantity:
-            running_stock_found.stock_quantity += add_stock_quantity
-            running_stock_found.remaining_quantity = quantity
-        else:
-            if not should_delete_quantity:
-                running_stock_found.remaining_quantity = quantity
-            else:
-                running_stock_found.remaining_quantity -= order_quantity
-                running_stock_found.stock_quantity -= order_quantity
-        return running_stock_found
+    def snapshot_history(day: Any) -> int:
+        """
+        Record the closing state of a day of every barcode changed that day,
+        as of midnight after it.
+
+        The state is the last change of the day in the history, so it does
+        not depend on changes made while the snapshot is taken. Taking the
+        snapshot of a day again replaces it.
+
+        Args:
+            day (date): The day closed.
+
+        Returns:
+            int: The number of barcodes recorded.
+        """
+        start = dt.combine(day, dt.min.time())
+        end = start + timedelta(days=1)
+        last_changes = (
+            select(func.max(StockRunningHistory.id))
+            .where(
+                and_(
+                    StockRunningHistory.snapshot.is_(False),
+                    StockRunningHistory.as_of >= start,
+                    StockRunningHistory.as_of < end,
+                )
+            )
+            .group_by(StockRunningHistory.barcode_id)
+        )
+        with DBSession() as db:
+            db.execute(
+                delete(StockRunningHistory).where(
+                    and_(
+                        StockRunningHistory.snapshot.is_(True),
+                        StockRunningHistory.as_of == end,
+                    )
+                )
+            )
+            recorded = db.execute(
+                insert(StockRunningHistory).from_select(
+                    ["barcode_id", "as_of", "snapshot", *RUNNING_STOCK_FIELDS],
+                    select(
+                        StockRunningHistory.barcode_id,
+                        literal(end),
+                        literal(True),
+                        *(
+                            getattr(StockRunningHistory, field)
+                            for field in RUNNING_STOCK_FIELDS
+                        ),
+                    ).where(StockRunningHistory.id.in_(last_changes)),
+                )
+            ).rowcount
+            commit(db)
+        return recorded
 
     @staticmethod
-    def update_status(stock: StockRunning):
+    def compact_history(before: Any) -> int:
         """
-        Updates the status of the StockRunning object based on remaining quantity.
+        Drop the changes made before a day whose day has a closing snapshot,
+        so older history is kept at the resolution of a day.
+
+        Args:
+            before (date): The first day whose changes are kept.
+
+        Returns:
+            int: The number of changes dropped.
         """
+        snapshot = aliased(StockRunningHistory)
+        with DBSession() as db:
+            dropped = db.execute(
+                delete(StockRunningHistory).where(
+                    and_(
+                        StockRunningHistory.snapshot.is_(False),
+                        StockRunningHistory.as_of < dt.combine(before, dt.min.time()),
+                        exists().where(
+                            and_(
+                                snapshot.barcode_id == StockRunningHistory.barcode_id,
+                                snapshot.snapshot.is_(True),
+                                snapshot.as_of
+                                == func.date_trunc("day", StockRunningHistory.as_of)
+                                + timedelta(days=1),
+                            )
+                        ),
+                    )
+                )
+            ).rowcount
+            commit(db)
+        return dropped
 
-        stock.status = (
-            RunningStockStatus.re_order.name
-            if stock.remaining_quantity < 10
-            else RunningStockStatus.available.name
-        )
-        return stock
+    @staticmethod
+    def reconcile_running_stocks(repair: bool = False) -> list[dict[str, Any]]:
+        """
+        Check every running stock against its projection from the inventory
+        movement ledger.
+
+        Args:
+            repair (bool): Reset drifted running stocks to the projection.
+
+        Returns:
+            list: One entry per barcode whose running stock has drifted,
+            with the expected and actual values of the drifted fields.
+        """
+        ledger = InventoryLedgerOperator.running_totals()
+        drifts = []
+        with DBSession() as db:
+            rows = db.execute(
+                select(
+                    StockRunning,
+                    *(
+                        func.coalesce(ledger.c[field], 0)
+                        for field in RUNNING_STOCK_FIELDS
+                    ),
+                )
+                .outerjoin(ledger, ledger.c.barcode_id == StockRunning.barcode_id)
+                .order_by(StockRunning.barcode_id)
+            ).all()
+            for running_stock, *projected in rows:
+                expected = {
+                    field: int(value) if field != "cost" else round(float(value), 2)
+                    for field, value in zip(RUNNING_STOCK_FIELDS, projected)
+                }
+                drifted = {
+                    field: {
+                        "expected": value,
+                        "actual": getattr(running_stock, field),
+                    }
+                    for field, value in expected.items()
+                    if (
+                        abs(value - (running_stock.cost or 0)) > 0.01
+                        if field == "cost"
+                        else value != getattr(running_stock, field)
+                    )
+                }
+                if not drifted:
+                    continue
+                drifts.append(
+                    {"barcode_id": running_stock.barcode_id, "fields": drifted}
+                )
+                if repair:
+                    for field, value in expected.items():
+                        setattr(running_stock, field, value)
+                    running_stock.status = running_stock_status(
+                        expected["remaining_quantity"]
+                    )
+                    running_stock.updated_at = dt.now()
+            if repair and drifts:
+                db.flush()
+                StockRunningOperator.record_history(
+                    db, [drift["barcode_id"] for drift in drifts]
+                )
+                commit(db)
+        return drifts
 
     @staticmethod
     def get_stock_in_inventory(barcode_id: Union[int, str]) -> StockRunning:
@@ -152,20 +363,43 @@ class StockRunningOperator:
 
     @staticmethod
     def get_running_stock_report(
-        barcode_id: Union[int, str],
-        report_on: Any = dt.now()
-    ) -> StockRunning:
+        barcode: str, report_on: Any = None
+    ) -> StockRunningHistory:
+        """
+        The running stock of a barcode as it was at a time, read from its
+        history with a single index seek.
+
+        Args:
+            barcode (str): The barcode the running stock is for.
+            report_on (datetime): The time of the report, now by default.
+
+        Returns:
+            StockRunningHistory: The last change or snapshot of the running
+            stock up to that time, None when it had not been stocked in yet.
+        """
         with DBSession() as db:
-            return db.query(StockRunning)\
-                .filter(
+            return db.execute(
+                select(StockRunningHistory)
+                .where(
                     and_(
-                        StockRunning.barcode.has(
-                            Barcode.barcode == barcode_id),
-                        StockRunning.updated_at <= report_on,
+                        StockRunningHistory.barcode_id
+                        == select(Barcode.id)
+                        .where(Barcode.barcode == barcode)
+                        .scalar_subquery(),
+                        StockRunningHistory.as_of <= (report_on or dt.now()),
                     )
-            ).first()
+                )
+                .order_by(
+                    StockRunningHistory.as_of.desc(), StockRunningHistory.id.desc()
+                )
+                .limit(1)
+            ).scalar_one_or_none()
 
     @staticmethod
     def get_all_running_stocks(query_params: StockQuery = None):
-        stock_filter = StockFilter(query_params, db_model=StockRunning)
+        stock_filter = StockFilter(
+            query_params,
+            db_model=StockRunning,
+            options=(selectinload(StockRunning.barcode),),
+        )
         return stock_filter.apply()
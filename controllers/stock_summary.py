@@ -0,0 +1,138 @@
+import datetime
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import and_, delete, func, literal, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session, selectinload
+
+from models.stock import Stock
+from models.stock_summary import StockSummary
+from schemas.stock import PageQuery
+from utils.countFilter import KeysetFilter
+from utils.session import DBSession
+
+MEASURES = (
+    "total_quantity",
+    "total_cost",
+    "average_cost",
+    "min_cost",
+    "max_cost",
+    "lot_count",
+    "updated_at",
+)
+
+
+class StockSummaryOperator:
+    @staticmethod
+    def refresh(db: Session, barcode_ids: Iterable[int]) -> None:
+        """
+        Recompute the summaries of barcodes from their lots, in the
+        transaction of ``db``.
+
+        Called after the running stocks of the barcodes were moved in the
+        same transaction, so concurrent lot writes on a barcode are queued
+        on its running stock and each one sums the lots committed before it.
+
+        Args:
+            db (Session): The session the lots were written with.
+            barcode_ids: The barcodes whose lots changed.
+        """
+        barcode_ids = sorted(set(barcode_ids))
+        if not barcode_ids:
+            return
+        lots = and_(Stock.barcode_id.in_(barcode_ids), Stock.cancelled.is_(False))
+        total_quantity = func.sum(Stock.quantity_initiated)
+        total_cost = func.sum(Stock.quantity_initiated * Stock.cost)
+        statement = insert(StockSummary).from_select(
+            ["barcode_id", *MEASURES],
+            select(
+                Stock.barcode_id,
+                total_quantity,
+                total_cost,
+                func.coalesce(total_cost / func.nullif(total_quantity, 0), 0),
+                func.min(Stock.cost),
+                func.max(Stock.cost),
+                func.count(Stock.id),
+                literal(datetime.datetime.now()),
+            )
+            .where(lots)
+            .group_by(Stock.barcode_id),
+        )
+        db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[StockSummary.barcode_id],
+                set_={
+                    measure: statement.excluded[measure] for measure in MEASURES
+                },
+            )
+        )
+        db.execute(
+            delete(StockSummary).where(
+                and_(
+                    StockSummary.barcode_id.in_(barcode_ids),
+                    StockSummary.barcode_id.not_in(
+                        select(Stock.barcode_id).where(lots)
+                    ),
+                )
+            )
+        )
+
+    @staticmethod
+    def get_summaries(
+        page: PageQuery = None, with_prices: bool = False
+    ) -> tuple[list[dict[str, Any]], Optional[str]]:
+        """
+        List the stock summary of every barcode stocked in, newest barcode
+        first.
+
+        Args:
+            page (PageQuery): The page requested, every barcode if none.
+            with_prices (bool): Also list the cost of every lot of the
+                barcodes of the page.
+
+        Returns:
+            the summaries of the page and the cursor of the next page, None
+            when this is the last page
+        """
+        with DBSession() as db:
+            query = db.query(StockSummary).options(
+                selectinload(StockSummary.barcode)
+            )
+            summaries, next_cursor = KeysetFilter(
+                page, query, StockSummary.barcode_id
+            ).apply()
+            prices = {}
+            if with_prices and summaries:
+                prices = dict(
+                    db.execute(
+                        select(Stock.barcode_id, func.array_agg(Stock.cost))
+                        .where(
+                            and_(
+                                Stock.barcode_id.in_(
+                                    [summary.barcode_id for summary in summaries]
+                                ),
+                                Stock.cancelled.is_(False),
+                            )
+                        )
+                        .group_by(Stock.barcode_id)
+                    ).all()
+                )
+        return [
+            {
+                "id": summary.barcode.id,
+                "barcode": summary.barcode.barcode,
+                "code": summary.barcode.code,
+                "specification": summary.barcode.specification,
+                "location": summary.barcode.location,
+                "erm_code": summary.barcode.erm_code,
+                "created_at": summary.barcode.created_at,
+                "quantity": summary.total_quantity,
+                "total_cost": summary.total_cost,
+                "average_cost": summary.average_cost,
+                "min_cost": summary.min_cost,
+                "max_cost": summary.max_cost,
+                "lot_count": summary.lot_count,
+                "prices": prices.get(summary.barcode_id),
+            }
+            for summary in summaries
+        ], next_cursor
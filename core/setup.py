@@ -1,3 +1,5 @@
+from typing import Any
+
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
@@ -7,7 +9,14 @@ from config.setting import settings
 
 class DatabaseSetup:
     def __init__(self):
-        self._engine = create_engine(settings.DATABASE_URL)
+        self._engine = create_engine(
+            settings.DATABASE_URL,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+        )
         self._session_maker = sessionmaker(
             autocommit=False, autoflush=False, bind=self._engine
         )
@@ -22,7 +31,18 @@ class DatabaseSetup:
     def get_engine(self):
         return self._engine
 
+    def get_pool_status(self) -> dict[str, Any]:
+        pool = self._engine.pool
+        return {
+            "pool_size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+        }
+
 
+# one engine (and connection pool) per process, shared by every DBSession
 database = DatabaseSetup()
 Base = database.get_base()
 engine = database.get_engine()
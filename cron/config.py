@@ -1,7 +1,27 @@
+from celery.schedules import crontab
+
 from config.setting import settings
 
 
 class Config:
     broker_url = f"redis://@{settings.REDIS_HOST}:{settings.REDIS_PORT}/{settings.REDIS_DB}"
     result_backend = f"redis://@{settings.REDIS_HOST}:{settings.REDIS_PORT}/{settings.REDIS_DB}"
-    broker_connection_retry_on_startup = True
\ No newline at end of file
+    broker_connection_retry_on_startup = True
+    beat_schedule = {
+        "reconcile-running-stocks": {
+            "task": "cron.task.reconcile_running_stocks",
+            "schedule": crontab(hour=2, minute=0),
+        },
+        "ensure-inventory-partitions": {
+            "task": "cron.task.ensure_inventory_partitions",
+            "schedule": crontab(hour=1, minute=0),
+        },
+        "snapshot-running-stocks": {
+            "task": "cron.task.snapshot_running_stocks",
+            "schedule": crontab(hour=0, minute=15),
+        },
+        "rebuild-daily-movements": {
+            "task": "cron.task.rebuild_daily_movements",
+            "schedule": crontab(hour=3, minute=0, day_of_week="sunday"),
+        },
+    }
@@ -1,7 +1,17 @@
 from cron import celery_app
+from datetime import date, timedelta
 from typing import Any
-from asgiref.sync import async_to_sync
-from utils.email import EmailService
+from celery.signals import worker_process_init, worker_process_shutdown
+from celery.utils.log import get_task_logger
+from config.setting import settings
+from controllers.daily_movement import DailyMovementOperator
+from controllers.inventory_ledger import InventoryLedgerOperator
+from controllers.stock_running import StockRunningOperator
+from models.email import Recipients
+from utils.email import EmailService, SMTPConnection
+from utils.notification import ReorderNotifications
+
+logger = get_task_logger(__name__)
 
 
 @celery_app.task(autoretry_for=(Exception,), max_retries=7, retry_backoff=True)
@@ -9,11 +19,75 @@ def send_email(
     email: list[str], subject: str, content: dict[str, Any], email_template: str = None
 ):
     if email_template:
-        async_to_sync(EmailService.send)(
+        EmailService.send(
             email=email, subject=subject, content=content, email_template=email_template
         )
     else:
-        async_to_sync(EmailService.send)(
-            email=email, subject=subject, content=content
+        EmailService.send(email=email, subject=subject, content=content)
+    return True
+
+
+@celery_app.task(autoretry_for=(Exception,), max_retries=7, retry_backoff=True)
+def flush_reorder_notifications():
+    pending = ReorderNotifications.pending()
+    if not pending:
+        return 0
+    EmailService.send(
+        email=Recipients.get_recipient_emails(),
+        subject="Stock Re-Order Notification Alert",
+        content={"items": list(pending.values())},
+    )
+    ReorderNotifications.acknowledge(list(pending))
+    return len(pending)
+
+
+@celery_app.task
+def reconcile_running_stocks(repair: bool = False):
+    drifts = StockRunningOperator.reconcile_running_stocks(repair=repair)
+    for drift in drifts:
+        logger.warning(
+            "Running stock drift for barcode %s: %s", drift["barcode_id"], drift["fields"]
         )
-    return True
\ No newline at end of file
+    return drifts
+
+
+@celery_app.task
+def snapshot_running_stocks(day: str = None):
+    day = date.fromisoformat(day) if day else date.today() - timedelta(days=1)
+    recorded = StockRunningOperator.snapshot_history(day)
+    dropped = StockRunningOperator.compact_history(
+        date.today() - timedelta(days=settings.STOCK_HISTORY_DETAIL_DAYS)
+    )
+    logger.info(
+        "Running stocks of %s snapshotted for %s barcodes, %s changes compacted",
+        day,
+        recorded,
+        dropped,
+    )
+    return recorded
+
+
+@celery_app.task
+def ensure_inventory_partitions():
+    partitions = InventoryLedgerOperator.ensure_partitions()
+    logger.info(
+        "Inventory movement partitions created: %s", ", ".join(partitions) or "none"
+    )
+    return partitions
+
+
+@celery_app.task
+def rebuild_daily_movements():
+    rows = DailyMovementOperator.rebuild()
+    logger.info("Daily movements rebuilt with %s rows", rows)
+    return rows
+
+
+@worker_process_init.connect
+def warm_email_templates(**kwargs):
+    logger.info("Compiled %s email templates", EmailService.warm_templates())
+
+
+@worker_process_shutdown.connect
+def close_smtp_connection(**kwargs):
+    SMTPConnection.close()
@@ -1,4 +1,10 @@
+from typing import Optional
+
+
 class AppError(Exception):
-    def __init__(self, message: str, status_code: int) -> None:
+    def __init__(
+        self, message: str, status_code: int, headers: Optional[dict[str, str]] = None
+    ) -> None:
         self.message = message
         self.status_code = status_code
+        self.headers = headers
@@ -4,6 +4,7 @@ from fastapi import Request, responses
 from fastapi.exceptions import HTTPException, RequestValidationError
 from jose.exceptions import JWTError
 from pydantic import ValidationError
+from redis.exceptions import RedisError
 from sqlalchemy.exc import DBAPIError, IntegrityError
 
 from error import AppError
@@ -53,9 +54,22 @@ def validation_for_db_errors(
     )
 
 
+def validation_for_redis_errors(
+    request: Request, exec: RedisError
+) -> responses.JSONResponse:
+    print("redis error", exec)
+    return responses.JSONResponse(
+        status_code=503,
+        content={"message": "Service temporarily unavailable"},
+        headers={"Retry-After": "1"},
+    )
+
+
 def validation_app_error(request: Request, exec: AppError):
     return responses.JSONResponse(
-        status_code=exec.status_code, content={"message": exec.message}
+        status_code=exec.status_code,
+        content={"message": exec.message},
+        headers=exec.headers,
     )
 
 
@@ -1,11 +1,16 @@
+from contextlib import asynccontextmanager
+
 import uvicorn
-from fastapi import FastAPI
+from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
+from anyio import to_thread
+from fastapi import Depends, FastAPI
 from fastapi.exceptions import HTTPException, RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi_pagination import add_pagination
 from fastapi_pagination.utils import disable_installed_extensions_check
 from jose.exceptions import JWTError
 from pydantic import ValidationError
+from redis.exceptions import RedisError
 from sqlalchemy.exc import DBAPIError, IntegrityError
 
 import handlers as hlp
@@ -17,25 +22,74 @@ from api.v1.routers import (
     report,
     purchase_order
 )
+from config.setting import settings
 from core.setup import Base, engine
 from error import AppError
 from utils.common import responses
+from utils.countFilter import NEXT_CURSOR_HEADER
+from utils.session import request_connections, unit_of_work
 
 disable_installed_extensions_check()
 
-Base.metadata.create_all(bind=engine)
+# tables flagged migration_only need more than their model, e.g. partitions
+Base.metadata.create_all(
+    bind=engine,
+    tables=[
+        table
+        for table in Base.metadata.sorted_tables
+        if not table.info.get("migration_only")
+    ],
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # route handlers are sync and run on this thread pool, each holding a
+    # database connection for its unit of work, so threads beyond the
+    # connections of the pool would only wait for one until DB_POOL_TIMEOUT
+    to_thread.current_default_thread_limiter().total_tokens = min(
+        settings.THREADPOOL_SIZE, request_connections()
+    )
+    yield
+
 
 app = FastAPI(
     title="Store Management System",
     description="Manage Store Stocks with the organization",
     responses=responses,
+    lifespan=lifespan,
+)
+# every request runs in a single session and transaction
+request_dependencies = [Depends(unit_of_work)]
+app.include_router(
+    op.op_router,
+    tags=["Management Operations"],
+    dependencies=request_dependencies,
+)
+app.include_router(
+    scp.op_router,
+    tags=["Stock Control Operations"],
+    dependencies=request_dependencies,
+)
+app.include_router(
+    cu.op_router,
+    tags=["Engineer Operations"],
+    dependencies=request_dependencies,
+)
+app.include_router(
+    purchase_order.po_router,
+    tags=["Purchase Order Operations"],
+    dependencies=request_dependencies,
+)
+app.include_router(
+    auth.op_router,
+    tags=["Authentication Operations"],
+    dependencies=request_dependencies,
+)
+app.include_router(
+    report.op_router,
+    tags=["Stock Reports"],
+    dependencies=request_dependencies,
 )
-app.include_router(op.op_router, tags=["Management Operations"])
-app.include_router(scp.op_router, tags=["Stock Control Operations"])
-app.include_router(cu.op_router, tags=["Engineer Operations"])
-app.include_router(purchase_order.po_router, tags=["Purchase Order Operations"])
-app.include_router(auth.op_router, tags=["Authentication Operations"])
-app.include_router(report.op_router, tags=["Stock Reports"])
 
 add_pagination(app)
 app.add_middleware(
@@ -44,7 +98,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "Retry-After"],
 )
+# the client address is the one forwarded by the trusted proxies
+app.add_middleware(ProxyHeadersMiddleware, trusted_hosts=settings.FORWARDED_ALLOW_IPS)
 app.add_exception_handler(ValueError, hlp.validation_for_all_exceptions)
 app.add_exception_handler(HTTPException, hlp.validation_for_http_exception)
 app.add_exception_handler(RequestValidationError, hlp.validation_error)
@@ -52,6 +109,7 @@ app.add_exception_handler(ValidationError, hlp.validation_error)
 app.add_exception_handler(DBAPIError, hlp.validation_for_db_errors)
 app.add_exception_handler(IntegrityError, hlp.validation_for_db_errors)
 app.add_exception_handler(AppError, hlp.validation_app_error)
+app.add_exception_handler(RedisError, hlp.validation_for_redis_errors)
 app.add_exception_handler(JWTError, hlp.validation_jwt_error)
 
 if __name__ == "__main__":
@@ -5,7 +5,7 @@ from sqlalchemy import Column, ForeignKey
 from sqlalchemy.orm import relationship
 
 from core.setup import Base
-from utils.session import DBSession
+from utils.session import DBSession, commit
 
 
 class Barcode(Base):
@@ -21,66 +21,64 @@ class Barcode(Base):
         "Category",
         back_populates="barcode",
         passive_updates=True,
-        lazy="selectin"
     )
     stock = relationship(
         "Stock",
         back_populates="barcode",
         passive_deletes="all",
         passive_updates=True,
-        lazy="selectin",
+        lazy="raise",
     )
     stock_adjustments = relationship(
         "StockAdjustment",
         back_populates="barcode",
         passive_deletes="all",
         passive_updates=True,
-        lazy="subquery",
+        lazy="raise",
     )
     stock_out = relationship(
         "StockOut",
         back_populates="barcode",
         passive_deletes="all",
         passive_updates=True,
-        lazy="subquery",
+        lazy="raise",
     )
     stock_running = relationship(
         "StockRunning",
         back_populates="barcode",
         passive_deletes="all",
         passive_updates=True,
-        lazy="subquery",
+        lazy="raise",
     )
     orders = relationship(
         "Orders",
         back_populates="barcode",
         passive_deletes="all",
         passive_updates=True,
-        lazy="subquery",
+        lazy="raise",
     )
     cost_evaluation = relationship(
         "CostEvaluation",
         back_populates="barcode",
         passive_deletes="all",
         passive_updates=True,
-        lazy="subquery",
+        lazy="raise",
     )
     purchase_order_items = relationship(
         "PurchaseOrderItems",
         back_populates="barcode",
         passive_deletes="all",
         passive_updates=True,
-        lazy="subquery",
+        lazy="raise",
     )
-    created_at = Column(sq.DateTime, default=datetime.datetime.now())
+    created_at = Column(sq.DateTime, default=datetime.datetime.now)
 
     def save(self, merge=False):
         with DBSession() as db:
             if merge:
                 self = db.merge(self)
             db.add(self)
-            db.commit()
-            db.refresh(self)
+            commit(db, self)
             return self
 
     def json(self):
@@ -5,7 +5,7 @@ from sqlalchemy import Column
 from sqlalchemy.orm import relationship
 
 from core.setup import Base
-from utils.session import DBSession
+from utils.session import DBSession, commit
 from schemas.operations import CategoryIn
 from error import AppError
 from typing import Union
@@ -18,15 +18,14 @@ class Category(Base):
     name = Column(sq.String, unique=True, index=True, nullable=False)
     created_at = Column(sq.DateTime, default=datetime.datetime.now())
     barcode = relationship(
-        "Barcode", back_populates="category", lazy="subquery")
+        "Barcode", back_populates="category", lazy="raise")
 
     def save(self, merge=False) -> "Category":
         with DBSession() as db:
             if merge:
                 self = db.merge(self)
             db.add(self)
-            db.commit()
-            db.refresh(self)
+            commit(db, self)
             return self
 
     def remove(self, merge: bool = False):
@@ -34,7 +33,7 @@ class Category(Base):
             if merge:
                 self = db.merge(self)
             db.delete(self)
-            db.commit()
+            commit(db)
             return True
 
     def json(self):
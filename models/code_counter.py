@@ -0,0 +1,18 @@
+import sqlalchemy as sq
+from sqlalchemy import Column
+
+from core.setup import Base
+
+
+class CodeCounter(Base):
+    """
+    The last number given to a barcode code per code prefix, e.g. SKC.
+
+    Codes are allocated by incrementing the counter, so concurrent
+    allocations queue on its row and a rolled back allocation gives its
+    numbers back.
+    """
+
+    __tablename__ = "code_counters"
+    prefix = Column(sq.String, primary_key=True)
+    last_value = Column(sq.Integer, nullable=False, default=0, server_default="0")
@@ -0,0 +1,41 @@
+import sqlalchemy as sq
+from sqlalchemy import Column, ForeignKey
+
+from core.setup import Base
+
+# dimension values standing for "none" so they can be part of the key
+NO_DEPARTMENT = 0
+NO_ERM_CODE = ""
+
+
+class DailyMovement(Base):
+    """
+    Stock movements of a barcode summed per day, department and ERM code.
+
+    Stock in is not tied to a department and is kept under NO_DEPARTMENT,
+    stock out is accounted for per order under the department of the staff
+    who placed it.
+    """
+
+    __tablename__ = "daily_movements"
+    __table_args__ = (
+        sq.Index("ix_daily_movements_department_id_day", "department_id", "day"),
+        sq.Index("ix_daily_movements_erm_code_day", "erm_code", "day"),
+    )
+    day = Column(sq.Date, primary_key=True)
+    barcode_id = Column(
+        sq.Integer,
+        ForeignKey("barcodes.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    department_id = Column(sq.Integer, primary_key=True, default=NO_DEPARTMENT)
+    erm_code = Column(sq.String, primary_key=True, default=NO_ERM_CODE)
+    in_quantity = Column(sq.Integer, nullable=False, default=0, server_default="0")
+    in_cost = Column(sq.Float, nullable=False, default=0, server_default="0")
+    orders = Column(sq.Integer, nullable=False, default=0, server_default="0")
+    out_quantity = Column(sq.Integer, nullable=False, default=0, server_default="0")
+    out_cost = Column(sq.Float, nullable=False, default=0, server_default="0")
+    adjustment_quantity = Column(
+        sq.Integer, nullable=False, default=0, server_default="0"
+    )
+    adjustment_cost = Column(sq.Float, nullable=False, default=0, server_default="0")
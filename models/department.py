@@ -5,15 +5,17 @@ from sqlalchemy import Column
 from sqlalchemy.orm import relationship
 
 from core.setup import Base
-from utils.session import DBSession
+from utils.session import DBSession, commit
 
 
 class Department(Base):
     __tablename__ = "departments"
     id = Column(sq.Integer, primary_key=True, unique=True, index=True)
     name = Column(sq.String(200), nullable=False, unique=True)
-    staff = relationship("Staff", back_populates="department")
-    stock_adjustments = relationship("StockAdjustment", back_populates="department")
+    staff = relationship("Staff", back_populates="department", lazy="raise")
+    stock_adjustments = relationship(
+        "StockAdjustment", back_populates="department", lazy="raise"
+    )
     created_at = Column(sq.DateTime, default=datetime.datetime.now())
 
     def save(self, merge=True) -> "Department":
@@ -21,8 +23,7 @@ class Department(Base):
             if merge:
                 self = db.merge(self)
             db.add(self)
-            db.commit()
-            db.refresh(self)
+            commit(db, self)
             return self
 
     def json(self):
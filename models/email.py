@@ -1,12 +1,17 @@
 import datetime
+import json
 from typing import Union
 
 import sqlalchemy as sq
 from pydantic import EmailStr
 from sqlalchemy import Column
 
+from config.setting import settings
 from core.setup import Base
-from utils.session import DBSession
+from utils.redis import Cache
+from utils.session import DBSession, after_commit, commit
+
+RECIPIENTS_KEY = "notification_recipients"
 
 
 class Recipients(Base):
@@ -20,8 +25,7 @@ class Recipients(Base):
             if merge:
                 self = db.merge(self)
             db.add(self)
-            db.commit()
-            db.refresh(self)
+            commit(db, self)
             return self
 
     def json(self):
@@ -32,7 +36,9 @@ class Recipients(Base):
         if Recipients.find_recipient(email):
             raise ValueError("Recipient email already exists")
         new_recipient = Recipients(email=email)
-        return new_recipient.save()
+        new_recipient = new_recipient.save()
+        Recipients.invalidate_recipient_emails()
+        return new_recipient
 
     @staticmethod
     def find_recipient(email: Union[EmailStr, int]) -> "Recipients":
@@ -47,7 +53,9 @@ class Recipients(Base):
         if not value:
             raise ValueError("Recipient does not exist")
         value.email = email
-        return value.save(merge=True)
+        value = value.save(merge=True)
+        Recipients.invalidate_recipient_emails()
+        return value
 
     @staticmethod
     def delete_recipient(recipient_id: int) -> bool:
@@ -57,10 +65,37 @@ class Recipients(Base):
         with DBSession() as db:
             value = db.merge(value)
             db.delete(value)
-            db.commit()
-            return True
+            commit(db)
+        Recipients.invalidate_recipient_emails()
+        return True
 
     @staticmethod
     def get_all_recipients():
         with DBSession() as db:
             return db.query(Recipients).all()
+
+    @staticmethod
+    def get_recipient_emails() -> list[str]:
+        """
+        The emails notifications are sent to, cached in Redis until the
+        recipients change.
+        """
+        cached = Cache.get(RECIPIENTS_KEY)
+        if cached is not None:
+            return json.loads(cached)
+        with DBSession() as db:
+            emails = db.query(Recipients.email).order_by(Recipients.id).all()
+        emails = [email for email, in emails]
+        Cache.set(
+            RECIPIENTS_KEY, json.dumps(emails), ex=settings.RECIPIENTS_CACHE_TTL
+        )
+        return emails
+
+    @staticmethod
+    def invalidate_recipient_emails() -> None:
+        """
+        Drop the emails cached once the change of recipients is committed,
+        so a notification sent meanwhile cannot cache them as they were.
+        """
+        with DBSession() as db:
+            after_commit(db, lambda: Cache.delete(RECIPIENTS_KEY))
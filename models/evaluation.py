@@ -5,7 +5,7 @@ from sqlalchemy import Column, ForeignKey
 from sqlalchemy.orm import relationship
 
 from core.setup import Base
-from utils.session import DBSession
+from utils.session import DBSession, commit
 
 
 class CostEvaluation(Base):
@@ -16,15 +16,14 @@ class CostEvaluation(Base):
     cost = Column(sq.Float)
     total = Column(sq.Float)
     created_at = Column(sq.DateTime, default=datetime.datetime.now())
-    barcode = relationship("Barcode", back_populates="cost_evaluation", lazy="selectin")
+    barcode = relationship("Barcode", back_populates="cost_evaluation")
 
     def save(self, merge=False):
         with DBSession() as db:
             if merge:
                 self = db.merge(self)
             db.add(self)
-            db.commit()
-            db.refresh(self)
+            commit(db, self)
             return self
 
     def json(self):
@@ -5,7 +5,7 @@ from sqlalchemy import Column
 from utils.enum import GroupStates
 
 from core.setup import Base
-from utils.session import DBSession
+from utils.session import DBSession, commit
 from sqlalchemy.orm import relationship
 from models.staff import Staff
 
@@ -15,7 +15,7 @@ class Groups(Base):
     id = Column(sq.Integer, primary_key=True, unique=True, index=True)
     group = Column(sq.Enum(GroupStates), default=GroupStates.users.name)
 
-    staffs = relationship(Staff, back_populates="groups")
+    staffs = relationship(Staff, back_populates="groups", lazy="raise")
     created_at = Column(sq.DateTime, default=datetime.datetime.now())
 
     def _save_to_db(self, merge=False):
@@ -23,8 +23,7 @@ class Groups(Base):
             if merge:
                 self = db.merge(self)
             db.add(self)
-            db.commit()
-            db.refresh(self)
+            commit(db, self)
             return self
 
     def save(self, merge=False) -> "Groups":
@@ -43,5 +42,5 @@ class Groups(Base):
             if force:
                 self = db.merge(self)
             db.delete(self)
-            db.commit()
+            commit(db)
             return True
@@ -0,0 +1,50 @@
+import datetime
+
+import sqlalchemy as sq
+from sqlalchemy import Column, ForeignKey
+
+from core.setup import Base
+from utils.enum import MovementType
+
+
+class InventoryMovement(Base):
+    """
+    Insert-only ledger of every change of stock, the source the running
+    stocks, the stock analysis and the stock valuation are projected from.
+
+    The quantity is signed as it changes the stock remaining: stock in is
+    positive, stock out and adjustments negative. A movement is never
+    updated, a lot changed or cancelled and an adjustment changed or
+    deleted are recorded as further movements making up the difference.
+
+    The table is partitioned by month of created_at, the movements of a
+    month without a partition falling into a default one. It is created by
+    its migration only, left out of Base.metadata.create_all as a
+    partitioned table without partitions takes no rows, and partitions are
+    created ahead by InventoryLedgerOperator.ensure_partitions.
+    """
+
+    __tablename__ = "inventory_movements"
+    __table_args__ = (
+        sq.Index(
+            "ix_inventory_movements_barcode_id_created_at", "barcode_id", "created_at"
+        ),
+        {
+            "postgresql_partition_by": "RANGE (created_at)",
+            "info": {"migration_only": True},
+        },
+    )
+    # the partition key has to be part of the primary key
+    id = Column(sq.BigInteger, primary_key=True, autoincrement=True)
+    created_at = Column(
+        sq.DateTime, primary_key=True, default=datetime.datetime.now
+    )
+    barcode_id = Column(sq.Integer, ForeignKey("barcodes.id"), nullable=False)
+    movement_type = Column(sq.Enum(MovementType), nullable=False)
+    quantity = Column(sq.Integer, nullable=False)
+    unit_cost = Column(sq.Float, nullable=False, default=0)
+    # references to the lot, order and adjustment moved, kept after they are
+    # deleted so they are not foreign keys
+    stock_id = Column(sq.Integer)
+    order_id = Column(sq.Integer)
+    stock_adjustment_id = Column(sq.Integer)
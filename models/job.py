@@ -5,14 +5,14 @@ from sqlalchemy import Column
 from sqlalchemy.orm import relationship
 
 from core.setup import Base
-from utils.session import DBSession
+from utils.session import DBSession, commit
 
 
 class Job(Base):
     __tablename__ = "jobs"
     id = Column(sq.Integer, primary_key=True, unique=True, index=True)
     name = Column(sq.String(200), nullable=False, unique=True)
-    staff = relationship("Staff", back_populates="job")
+    staff = relationship("Staff", back_populates="job", lazy="raise")
     created_at = Column(sq.DateTime, default=datetime.datetime.now())
 
     def save(self, merge=False) -> "Job":
@@ -20,8 +20,7 @@ class Job(Base):
             if merge:
                 self = db.merge(self)
             db.add(self)
-            db.commit()
-            db.refresh(self)
+            commit(db, self)
             return self
 
     def json(self):
@@ -7,11 +7,15 @@ from sqlalchemy.orm import relationship
 
 from core.setup import Base
 from utils.enum import OrderStatus
-from utils.session import DBSession
+from utils.session import DBSession, commit
 
 
 class Orders(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        sq.Index("ix_orders_created_at_id", "created_at", "id"),
+        sq.Index("ix_orders_barcode_id_created_at", "barcode_id", "created_at"),
+    )
     id = Column(sq.Integer, primary_key=True, unique=True, index=True)
     staff_id = Column(sq.Integer, ForeignKey("staffs.id"))
     barcode_id = Column(sq.Integer, ForeignKey("barcodes.id"), nullable=False)
@@ -24,19 +28,16 @@ class Orders(Base):
         sq.Enum(OrderStatus), nullable=False, default=OrderStatus.part_available.name
     )
     barcode = relationship("Barcode", back_populates="orders")
-    stock_out = relationship("StockOut", back_populates="orders")
-    staff = relationship(
-        "Staff", foreign_keys=[staff_id], back_populates="orders", lazy="selectin"
-    )
-    created_at = Column(sq.DateTime, default=datetime.datetime.now())
+    stock_out = relationship("StockOut", back_populates="orders", lazy="raise")
+    staff = relationship("Staff", foreign_keys=[staff_id], back_populates="orders")
+    created_at = Column(sq.DateTime, default=datetime.datetime.now)
 
     def save(self, merge: bool = False) -> "Orders":
         with DBSession() as db:
             if merge:
                 self = db.merge(self)
             db.add(self)
-            db.commit()
-            db.refresh(self)
+            commit(db, self)
             return self
 
     def json(self) -> dict[str, Any]:
@@ -60,5 +61,5 @@ class Orders(Base):
             "part_type": self.part_name,
             "part_description": self.barcode.specification,
             "quantity": self.quantity,
-            "erm_code": self.barcode.stock[0].erm_code,
+            "erm_code": self.barcode.erm_code,
         }
\ No newline at end of file
@@ -5,7 +5,7 @@ from sqlalchemy.orm import relationship
 from sqlalchemy import Column
 
 from core.setup import Base
-from utils.session import DBSession
+from utils.session import DBSession, commit
 
 
 class PaymentTerms(Base):
@@ -17,7 +17,7 @@ class PaymentTerms(Base):
     purchase_orders = relationship(
         "PurchaseOrders",
         back_populates="payment_terms",
-        lazy="selectin",
+        lazy="raise",
     )
 
     created_at = Column(sq.DateTime, default=datetime.datetime.now())
@@ -27,8 +27,7 @@ class PaymentTerms(Base):
             if merge:
                 self = db.merge(self)
             db.add(self)
-            db.commit()
-            db.refresh(self)
+            commit(db, self)
             return self
 
     def delete(self, force=False) -> bool:
@@ -36,7 +35,7 @@ class PaymentTerms(Base):
             if force:
                 self = db.merge(self)
             db.delete(self)
-            db.commit()
+            commit(db)
             return True
 
     def json(self):
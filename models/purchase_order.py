@@ -5,7 +5,7 @@ from sqlalchemy import Column, ForeignKey
 from sqlalchemy.orm import relationship
 
 from core.setup import Base
-from utils.session import DBSession
+from utils.session import DBSession, commit
 from utils.enum import PurchaseOrderStates
 
 
@@ -32,8 +32,7 @@ class PurchaseOrders(Base):
     purchase_order_items = relationship(
         "PurchaseOrderItems", back_populates="purchase_orders", lazy="selectin"
     )
-    suppliers = relationship(
-        "Suppliers", back_populates="purchase_orders", lazy="selectin")
+    suppliers = relationship("Suppliers", back_populates="purchase_orders")
 
     created_at = Column(sq.DateTime, default=datetime.datetime.now())
     updated_at = Column(
@@ -45,8 +44,7 @@ class PurchaseOrders(Base):
             if merge:
                 self = db.merge(self)
             db.add(self)
-            db.commit()
-            db.refresh(self)
+            commit(db, self)
             return self
 
     def update(self, data: dict) -> "PurchaseOrders":
@@ -54,10 +52,10 @@ class PurchaseOrders(Base):
             db.query(PurchaseOrders).filter(
                 PurchaseOrders.id == self.id
             ).update(data)
-            db.commit()
+            commit(db)
             value = db.query(PurchaseOrders).filter(
                 PurchaseOrders.id == self.id
-            ).first()
+            ).populate_existing().first()
             return value
 
     def delete(self, force=False) -> bool:
@@ -65,7 +63,7 @@ class PurchaseOrders(Base):
             if force:
                 self = db.merge(self)
             db.delete(self)
-            db.commit()
+            commit(db)
             return True
 
     def json(self):
@@ -5,7 +5,7 @@ from sqlalchemy import Column, ForeignKey
 from sqlalchemy.orm import relationship
 
 from core.setup import Base
-from utils.session import DBSession
+from utils.session import DBSession, commit
 from models.staff import Staff
 
 
@@ -28,12 +28,8 @@ class PurchaseOrderItems(Base):
     )
     requested_by = Column(sq.Integer, ForeignKey("staffs.id"), nullable=False)
 
-    requested_by_staff = relationship(
-        Staff, back_populates="purchase_order_items", lazy="selectin"
-    )
-    barcode = relationship(
-        "Barcode", back_populates="purchase_order_items", lazy="selectin"
-    )
+    requested_by_staff = relationship(Staff, back_populates="purchase_order_items")
+    barcode = relationship("Barcode", back_populates="purchase_order_items")
     purchase_orders = relationship(
         "PurchaseOrders",
         back_populates="purchase_order_items",
@@ -49,8 +45,7 @@ class PurchaseOrderItems(Base):
             if merge:
                 self = db.merge(self)
             db.add(self)
-            db.commit()
-            db.refresh(self)
+            commit(db, self)
         return self
 
     def update(self, data: dict):
@@ -58,7 +53,7 @@ class PurchaseOrderItems(Base):
             db.query(PurchaseOrderItems).filter(
                 PurchaseOrderItems.id == self.id
             ).update(data)
-            db.commit()
+            commit(db)
             return self
 
     def delete(self, force=False) -> bool:
@@ -66,7 +61,7 @@ class PurchaseOrderItems(Base):
             if force:
                 self = db.merge(self)
             db.delete(self)
-            db.commit()
+            commit(db)
             return True
 
     def json(self):
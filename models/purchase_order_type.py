@@ -4,7 +4,7 @@ import sqlalchemy as sq
 from sqlalchemy import Column
 
 from core.setup import Base
-from utils.session import DBSession
+from utils.session import DBSession, commit
 
 
 class PurchaseOrderTypes(Base):
@@ -19,8 +19,7 @@ class PurchaseOrderTypes(Base):
             if merge:
                 self = db.merge(self)
             db.add(self)
-            db.commit()
-            db.refresh(self)
+            commit(db, self)
             return self
         
     def delete(self, force=False) -> bool:
@@ -28,7 +27,7 @@ class PurchaseOrderTypes(Base):
             if force:
                 self = db.merge(self)
             db.delete(self)
-            db.commit()
+            commit(db)
             return True
 
     def json(self):
@@ -6,7 +6,7 @@ from sqlalchemy.orm import relationship
 
 from core.setup import Base
 from utils.enum import RolesStatus
-from utils.session import DBSession
+from utils.session import DBSession, commit
 
 
 class Roles(Base):
@@ -15,14 +15,13 @@ class Roles(Base):
     name = Column(
         sq.Enum(RolesStatus), nullable=False, default=RolesStatus.engineer.name
     )
-    staff = relationship("Staff", back_populates="roles")
+    staff = relationship("Staff", back_populates="roles", lazy="raise")
     created_at = Column(sq.DateTime, default=datetime.datetime.now())
 
     def save(self):
         with DBSession() as db:
             db.add(self)
-            db.commit()
-            db.refresh(self)
+            commit(db, self)
             return self
 
     def json(self):
@@ -1,7 +1,6 @@
 import datetime
 
 import sqlalchemy as sq
-from passlib.context import CryptContext
 from sqlalchemy import Column, ForeignKey
 from sqlalchemy.orm import relationship
 
@@ -11,9 +10,8 @@ from models.job import Job
 from models.order import Orders
 from models.roles import Roles
 from models.stock import Stock
-from utils.session import DBSession
-
-context = CryptContext(["bcrypt"], deprecated="auto")
+from utils.password import PasswordHasher
+from utils.session import DBSession, commit
 
 
 class Staff(Base):
@@ -28,27 +26,33 @@ class Staff(Base):
     role_id = Column(sq.Integer, ForeignKey("roles.id"), nullable=False)
     group_id = Column(sq.Integer, ForeignKey("groups.id"))
 
-    job = relationship(Job, back_populates="staff", lazy="subquery")
-    groups = relationship("Groups", back_populates="staffs", lazy="subquery")
-    department = relationship(Department, back_populates="staff", lazy="subquery")
+    job = relationship(Job, back_populates="staff")
+    groups = relationship("Groups", back_populates="staffs")
+    department = relationship(Department, back_populates="staff")
+    # deleting a staff member detaches these with bulk updates instead of
+    # loading them, see StaffOperator.delete_staff_by_id
     created_stocks = relationship(
         "Stock",
         foreign_keys=[Stock.created_by],
         back_populates="creator",
-        lazy="subquery",
+        lazy="raise",
+        passive_deletes=True,
     )
     modified_stocks = relationship(
         "Stock",
         foreign_keys=[Stock.updated_by],
         back_populates="modifier",
-        lazy="subquery",
+        lazy="raise",
+        passive_deletes=True,
+    )
+    orders = relationship(
+        Orders, back_populates="staff", lazy="raise", passive_deletes=True
     )
-    orders = relationship(Orders, back_populates="staff", lazy="subquery")
-    roles = relationship(Roles, back_populates="staff", lazy="subquery")
+    roles = relationship(Roles, back_populates="staff")
     purchase_order_items = relationship(
         "PurchaseOrderItems",
         back_populates="requested_by_staff",
-        lazy="selectin",
+        lazy="raise",
         passive_deletes="all",
         passive_updates=True,
     )
@@ -59,8 +63,7 @@ class Staff(Base):
             if merge:
                 self = db.merge(self)
             db.add(self)
-            db.commit()
-            db.refresh(self)
+            commit(db, self)
             return self
 
     def json(self):
@@ -74,11 +77,9 @@ class Staff(Base):
 
     @staticmethod
     def generate_hash_password(password: str) -> str:
-        return context.hash(password)
+        return PasswordHasher.hash(password)
 
     @staticmethod
     def verify_hash_password(hash_password: str, password: str) -> bool:
-        try:
-            return context.verify(hash=hash_password, secret=password)
-        except Exception as e:
-            print("Verification failed", e)
+        verified, _ = PasswordHasher.verify_and_update(hash_password, password)
+        return verified
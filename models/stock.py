@@ -5,11 +5,14 @@ from sqlalchemy import Column, ForeignKey
 from sqlalchemy.orm import relationship
 
 from core.setup import Base
-from utils.session import DBSession
+from utils.session import DBSession, commit
 
 
 class Stock(Base):
     __tablename__ = "stocks"
+    __table_args__ = (
+        sq.Index("ix_stocks_barcode_id_created_at", "barcode_id", "created_at"),
+    )
     id = Column(sq.Integer, primary_key=True, unique=True, index=True)
     quantity = Column(sq.Integer, default=0)
     quantity_initiated = Column(
@@ -27,17 +30,15 @@ class Stock(Base):
         "Staff",
         foreign_keys=[created_by],
         back_populates="created_stocks",
-        lazy="subquery",
     )
     modifier = relationship(
         "Staff",
         foreign_keys=[updated_by],
         back_populates="modified_stocks",
-        lazy="subquery",
     )
-    barcode = relationship("Barcode", back_populates="stock", lazy="subquery")
+    barcode = relationship("Barcode", back_populates="stock")
     sold_at = Column(sq.DateTime)
-    created_at = Column(sq.DateTime, default=datetime.datetime.now())
+    created_at = Column(sq.DateTime, default=datetime.datetime.now)
     updated_at = Column(sq.DateTime)
 
     def save(self, merge=False):
@@ -45,14 +46,13 @@ class Stock(Base):
             if merge:
                 self = db.merge(self)
             db.add(self)
-            db.commit()
-            db.refresh(self)
+            commit(db, self)
             return self
 
     def update(self, data: dict):
         with DBSession() as db:
             db.query(Stock).filter(Stock.id == self.id).update(data, synchronize_session="evaluate")
-            db.commit()
+            commit(db)
             return self
 
     def json(self):
@@ -5,11 +5,14 @@ from sqlalchemy import Column, ForeignKey
 from sqlalchemy.orm import relationship
 
 from core.setup import Base
-from utils.session import DBSession
+from utils.session import DBSession, commit
 
 
 class StockAdjustment(Base):
     __tablename__ = "stock_adjustments"
+    __table_args__ = (
+        sq.Index("ix_stock_adjustments_barcode_id_created_at", "barcode_id", "created_at"),
+    )
     id = Column(sq.Integer, primary_key=True, unique=True, index=True)
     quantity = Column(sq.Integer, nullable=False, default=0)
     cost = Column(sq.Float, nullable=False, default=0)
@@ -17,20 +20,15 @@ class StockAdjustment(Base):
     department_id = Column(sq.Integer, ForeignKey("departments.id"))
     created_by = Column(sq.Integer, ForeignKey("staffs.id"))
     updated_by = Column(sq.Integer, ForeignKey("staffs.id"))
-    barcode = relationship(
-        "Barcode", lazy="selectin", back_populates="stock_adjustments"
-    )
-    department = relationship(
-        "Department", lazy="selectin", back_populates="stock_adjustments"
-    )
-    created_at = Column(sq.DateTime, default=datetime.datetime.now())
+    barcode = relationship("Barcode", back_populates="stock_adjustments")
+    department = relationship("Department", back_populates="stock_adjustments")
+    created_at = Column(sq.DateTime, default=datetime.datetime.now)
     updated_at = Column(sq.DateTime, default=datetime.datetime.now())
 
     def save(self) -> "StockAdjustment":
         with DBSession() as db:
             db.add(self)
-            db.commit()
-            db.refresh(self)
+            commit(db, self)
             return self
 
     def json(self):
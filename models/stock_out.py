@@ -5,11 +5,14 @@ from sqlalchemy import Column, ForeignKey
 from sqlalchemy.orm import relationship
 
 from core.setup import Base
-from utils.session import DBSession
+from utils.session import DBSession, commit
 
 
 class StockOut(Base):
     __tablename__ = "stock_outs"
+    __table_args__ = (
+        sq.Index("ix_stock_outs_barcode_id_created_at", "barcode_id", "created_at"),
+    )
     id = Column(sq.Integer, primary_key=True, unique=True, index=True)
     barcode_id = Column(sq.Integer, ForeignKey("barcodes.id"), nullable=False)
     order_id = Column(sq.Integer, ForeignKey("orders.id"))
@@ -22,8 +25,7 @@ class StockOut(Base):
     def save(self) -> "StockOut":
         with DBSession() as db:
             db.add(self)
-            db.commit()
-            db.refresh(self)
+            commit(db, self)
             return self
 
     def json(self):
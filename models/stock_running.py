@@ -6,11 +6,15 @@ from sqlalchemy.orm import relationship
 
 from core.setup import Base
 from utils.enum import RunningStockStatus
-from utils.session import DBSession
+from utils.session import DBSession, commit
 
 
 class StockRunning(Base):
     __tablename__ = "stock_runnings"
+    # a single running stock per barcode, the key movements are upserted on
+    __table_args__ = (
+        sq.Index("ix_stock_runnings_barcode_id", "barcode_id", unique=True),
+    )
     id = Column(sq.Integer, primary_key=True, unique=True, index=True)
     barcode_id = Column(sq.Integer, ForeignKey("barcodes.id"), nullable=False)
     stock_quantity = Column(sq.Integer, nullable=False)
@@ -21,7 +25,7 @@ class StockRunning(Base):
     status = Column(
         sq.Enum(RunningStockStatus), default=RunningStockStatus.available.name
     )
-    barcode = relationship("Barcode", back_populates="stock_running", lazy="selectin")
+    barcode = relationship("Barcode", back_populates="stock_running")
     created_at = Column(sq.DateTime, default=datetime.datetime.now())
     updated_at = Column(sq.DateTime)
 
@@ -31,8 +35,7 @@ class StockRunning(Base):
                 self = db.merge(self)
             self.updated_at = datetime.datetime.now()
             db.add(self)
-            db.commit()
-            db.refresh(self)
+            commit(db, self)
             return self
 
     def json(self):
@@ -0,0 +1,32 @@
+import sqlalchemy as sq
+from sqlalchemy import Column, ForeignKey
+
+from core.setup import Base
+
+
+class StockRunningHistory(Base):
+    """
+    Append-only ledger of the running stocks, one row per change.
+
+    Every change of a running stock is copied here as of the time it was
+    made, so the running stock of a barcode at any time is its last row up
+    to that time. A nightly snapshot also records the closing state of every
+    barcode changed during the day, after which the changes of days older
+    than STOCK_HISTORY_DETAIL_DAYS are dropped in favour of it.
+    """
+
+    __tablename__ = "stock_running_history"
+    __table_args__ = (
+        sq.Index("ix_stock_running_history_barcode_id_as_of", "barcode_id", "as_of"),
+    )
+    id = Column(sq.Integer, primary_key=True)
+    barcode_id = Column(
+        sq.Integer, ForeignKey("barcodes.id", ondelete="CASCADE"), nullable=False
+    )
+    as_of = Column(sq.DateTime, nullable=False)
+    snapshot = Column(sq.Boolean, nullable=False, default=False, server_default="false")
+    stock_quantity = Column(sq.Integer, nullable=False)
+    out_quantity = Column(sq.Integer, nullable=False)
+    adjustment_quantity = Column(sq.Integer, nullable=False)
+    remaining_quantity = Column(sq.Integer, nullable=False)
+    cost = Column(sq.Float, nullable=False)
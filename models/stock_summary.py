@@ -0,0 +1,30 @@
+import sqlalchemy as sq
+from sqlalchemy import Column, ForeignKey
+from sqlalchemy.orm import relationship
+
+from core.setup import Base
+
+
+class StockSummary(Base):
+    """
+    The lots stocked in of a barcode, cancelled ones aside, summed up.
+
+    A row is recomputed from the lots of its barcode whenever one of them is
+    stocked in, changed, cancelled or removed, and dropped when the barcode
+    has no lot left.
+    """
+
+    __tablename__ = "stock_summaries"
+    barcode_id = Column(
+        sq.Integer,
+        ForeignKey("barcodes.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    total_quantity = Column(sq.Integer, nullable=False)
+    total_cost = Column(sq.Float, nullable=False)
+    average_cost = Column(sq.Float, nullable=False)
+    min_cost = Column(sq.Float, nullable=False)
+    max_cost = Column(sq.Float, nullable=False)
+    lot_count = Column(sq.Integer, nullable=False)
+    updated_at = Column(sq.DateTime, nullable=False)
+    barcode = relationship("Barcode")
@@ -5,7 +5,7 @@ from sqlalchemy import Column
 from sqlalchemy.orm import relationship
 
 from core.setup import Base
-from utils.session import DBSession
+from utils.session import DBSession, commit
 
 
 class Suppliers(Base):
@@ -14,15 +14,14 @@ class Suppliers(Base):
     name = Column(sq.String, nullable=False, unique=True)
 
     purchase_orders = relationship("PurchaseOrders", back_populates="suppliers", passive_deletes="all",
-                                   passive_updates=True)
+                                   passive_updates=True, lazy="raise")
 
     created_at = Column(sq.DateTime, default=datetime.datetime.now())
 
     def save(self):
         with DBSession() as db:
             db.add(self)
-            db.commit()
-            db.refresh(self)
+            commit(db, self)
             return self
 
     def json(self):
@@ -37,7 +36,7 @@ class Suppliers(Base):
             db.query(Suppliers).filter(
                 Suppliers.id == self.id
             ).update(data)
-            db.commit()
+            commit(db)
             return self
 
     def delete(self, force=False) -> bool:
@@ -45,5 +44,5 @@ class Suppliers(Base):
             if force:
                 self = db.merge(self)
             db.delete(self)
-            db.commit()
+            commit(db)
             return True
@@ -52,3 +52,18 @@ class EmailConfigureIn(BaseModel):
 
 class EmailConfigureOut(EmailConfigureIn):
     id: int
+
+
+class PoolStatusOut(BaseModel):
+    pool_size: int
+    checked_out: int
+    idle: int
+    overflow: int
+    max_overflow: int
+
+
+class RedisPoolStatusOut(BaseModel):
+    max_connections: int
+    created: int
+    in_use: int
+    idle: int
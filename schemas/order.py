@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from schemas.staff import StaffOut
 from schemas.stock import Barcode
@@ -14,6 +14,12 @@ class OrderIn(BaseModel):
     quantity: int
 
 
+class BatchOrderIn(OrderIn):
+    barcode: str
+    part_name: Optional[str] = None
+    quantity: int = Field(gt=0)
+
+
 class OrderOut(BaseModel):
     id: int
     job_number: str
@@ -20,4 +20,11 @@ class ErmQuantityOut(BaseModel):
 class MonthlyCollectionOut(BaseModel):
     date: int
     num_of_orders: int
-    quantity: int
\ No newline at end of file
+    quantity: int
+
+
+class StockValuationOut(BaseModel):
+    barcode_id: int
+    barcode: str
+    quantity: int
+    value: float
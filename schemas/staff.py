@@ -1,7 +1,7 @@
 from pydantic import BaseModel, Field
 
 from schemas.operations import DepartmentOut, JobOut, RolesOut
-from utils.enum import GroupStates
+from utils.enum import GroupStates, RolesStatus
 from typing import Optional
 
 
@@ -73,3 +73,10 @@ class LoginOut(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class Principal(BaseModel):
+    id: int
+    role: Optional[RolesStatus] = None
+    group: Optional[GroupStates] = None
+    department_id: int
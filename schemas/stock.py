@@ -157,6 +157,20 @@ class StockQuery(BaseModel):
     sorted: Union[Optional[bool], None] = Query(None)
 
 
+class StockSummaryOut(Barcode):
+    total_cost: float
+    average_cost: float
+    min_cost: float
+    max_cost: float
+    lot_count: int
+
+
+class PageQuery(BaseModel):
+    cursor: Optional[str] = Query(None)
+    after_id: Optional[int] = Query(None)
+    limit: Optional[int] = Query(None, ge=1, le=500)
+
+
 class CostEvaluationOut(BaseModel):
     id: int
     barcode: Barcode
@@ -164,3 +178,15 @@ class CostEvaluationOut(BaseModel):
     cost: float
     total: float
     created_at: datetime
+
+
+class BarcodeImportErrorOut(BaseModel):
+    line: Optional[int]
+    barcode: Optional[str]
+    message: str
+
+
+class BarcodeImportOut(BaseModel):
+    inserted: int
+    updated: int
+    errors: list[BarcodeImportErrorOut]
@@ -0,0 +1,52 @@
+"""
+Benchmarks of the changes made for performance, left out of the test run
+unless asked for:
+
+    python -m pytest -m benchmark tests/benchmarks
+
+Against SQLite they only show the shape of a change, such as the statements
+run; run them with TEST_DATABASE_URL set to a Postgres database for timings
+that compare with production.
+"""
+import math
+import time
+from typing import Callable
+
+import pytest
+
+RESULTS: list[str] = []
+
+
+def percentile(timings: list[float], percent: float) -> float:
+    """The nearest rank percentile of timings."""
+    ordered = sorted(timings)
+    return ordered[max(math.ceil(len(ordered) * percent / 100) - 1, 0)]
+
+
+def summary(name: str, timings: list[float], elapsed: float) -> str:
+    """The rate, median and p95 of timings taken over elapsed seconds."""
+    return (
+        f"{name}: {len(timings) / elapsed:.1f}/s, "
+        f"p50 {percentile(timings, 50) * 1000:.1f} ms, "
+        f"p95 {percentile(timings, 95) * 1000:.1f} ms"
+    )
+
+
+def timed(call: Callable[[], object]) -> tuple[object, float]:
+    """The result of call and the seconds it took."""
+    started = time.perf_counter()
+    result = call()
+    return result, time.perf_counter() - started
+
+
+@pytest.fixture
+def report() -> Callable[[str], None]:
+    """Record a line of results, printed at the end of the run."""
+    return RESULTS.append
+
+
+def pytest_terminal_summary(terminalreporter):
+    if RESULTS:
+        terminalreporter.section("benchmarks")
+        for line in RESULTS:
+            terminalreporter.write_line(line)
@@ -0,0 +1,61 @@
+"""
+Load on guarded endpoints with tokens verified against Redis, and verified
+statelessly against the revocation list.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from config.setting import settings
+from tests.benchmarks.conftest import summary
+from utils.redis import Cache
+
+pytestmark = pytest.mark.benchmark
+
+CLIENTS = 20
+REQUESTS = 400
+PATHS = ("/barcodes", "/orders", "/stock-running")
+
+
+@pytest.fixture
+def redis_commands(monkeypatch):
+    """The commands sent to Redis."""
+    count = [0]
+    execute_command = Cache._redis.execute_command
+
+    def counted(*args, **kwargs):
+        count[0] += 1
+        return execute_command(*args, **kwargs)
+
+    monkeypatch.setattr(Cache._redis, "execute_command", counted)
+    # revocations published while stateless are read from the same server
+    monkeypatch.setattr(Cache, "subscriber", lambda: Cache._redis.pubsub())
+    return count
+
+
+@pytest.mark.parametrize("mode", ["redis", "stateless"])
+def test_guarded_endpoints(
+    client, stock_controller, barcode, redis_commands, monkeypatch, mode, report
+):
+    monkeypatch.setattr(settings, "AUTH_VERIFY_MODE", mode)
+
+    def request(number: int) -> float:
+        started = time.perf_counter()
+        response = client.get(PATHS[number % len(PATHS)], headers=stock_controller)
+        assert response.status_code == 200, response.text
+        return time.perf_counter() - started
+
+    # principals and the revocation list are cached by the first requests
+    for number in range(len(PATHS)):
+        request(number)
+    redis_commands[0] = 0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=CLIENTS) as executor:
+        timings = list(executor.map(request, range(REQUESTS)))
+    elapsed = time.perf_counter() - started
+
+    report(
+        summary(f"guarded requests, {mode} verification", timings, elapsed)
+        + f", {redis_commands[0] / REQUESTS:.2f} Redis commands per request"
+    )
@@ -0,0 +1,39 @@
+import csv
+import os
+
+import pytest
+
+from controllers.barcode_import import BarcodeImportOperator
+from models.category import Category
+from tests.benchmarks.conftest import timed
+from utils.enum import ImportFormat
+
+pytestmark = pytest.mark.benchmark
+
+ROWS = int(os.environ.get("BENCHMARK_IMPORT_ROWS", 100_000))
+
+
+@pytest.fixture
+def barcodes_file(tmp_path):
+    Category(name="Cables").save()
+    path = tmp_path / "barcodes.csv"
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["barcode", "specification", "location", "category"])
+        for number in range(ROWS):
+            writer.writerow([f"B{number}", "Cat6 cable", "Shelf 1", "Cables"])
+    return str(path)
+
+
+def test_import_barcodes(barcodes_file, report):
+    inserted, seconds = timed(
+        lambda: BarcodeImportOperator.import_file(barcodes_file, ImportFormat.csv)
+    )
+    assert inserted == {"inserted": ROWS, "updated": 0, "errors": []}
+    report(f"import of {ROWS} new barcodes: {ROWS / seconds:.0f} rows/s")
+
+    updated, seconds = timed(
+        lambda: BarcodeImportOperator.import_file(barcodes_file, ImportFormat.csv)
+    )
+    assert updated == {"inserted": 0, "updated": ROWS, "errors": []}
+    report(f"import of {ROWS} known barcodes: {ROWS / seconds:.0f} rows/s")
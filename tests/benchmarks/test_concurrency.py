@@ -0,0 +1,52 @@
+"""
+Throughput of the app under 50 and 200 concurrent clients, each sending
+requests one after the other to listings of the stock controller.
+"""
+import time
+
+import anyio
+import httpx
+import pytest
+
+import main
+from tests.benchmarks.conftest import summary
+
+pytestmark = pytest.mark.benchmark
+
+REQUESTS_PER_CLIENT = 5
+PATHS = ("/barcodes", "/orders", "/stock-running")
+
+
+async def load(clients: int, headers: dict[str, str]) -> tuple[list[float], float, int]:
+    """The timings, seconds taken and errors of every request."""
+    timings = []
+    errors = [0]
+
+    async def client_requests(number: int, http: httpx.AsyncClient) -> None:
+        for request in range(REQUESTS_PER_CLIENT):
+            started = time.perf_counter()
+            response = await http.get(
+                PATHS[(number + request) % len(PATHS)], headers=headers
+            )
+            timings.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                errors[0] += 1
+
+    async with main.lifespan(main.app):
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=main.app), base_url="http://test"
+        ) as http:
+            started = time.perf_counter()
+            async with anyio.create_task_group() as group:
+                for number in range(clients):
+                    group.start_soon(client_requests, number, http)
+            elapsed = time.perf_counter() - started
+    return timings, elapsed, errors[0]
+
+
+@pytest.mark.parametrize("clients", [50, 200])
+def test_concurrent_clients(stock_controller, barcode, clients, report):
+    timings, elapsed, errors = anyio.run(load, clients, stock_controller)
+
+    report(summary(f"{clients} clients", timings, elapsed) + f", {errors} errors")
+    assert errors == 0
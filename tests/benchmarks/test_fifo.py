@@ -0,0 +1,79 @@
+"""
+Collecting every unit of a barcode stocked in as 1, 100 and 10k lots of a
+unit each, consumed first in, first out.
+"""
+import pytest
+from sqlalchemy import event
+
+from controllers.order import OrderOperator
+from controllers.stock import StockOperator
+from core.setup import engine
+from schemas.order import OrderIn
+from schemas.stock import StockIn
+from tests.benchmarks.conftest import timed
+from tests.test_statement_counts import add_barcode
+
+pytestmark = pytest.mark.benchmark
+
+LOTS = (1, 100, 10_000)
+CHUNK = 1000
+
+
+def stock_in(client, headers, code: str, lots: int) -> None:
+    barcode_id = add_barcode(client, headers, code)
+    for start in range(0, lots, CHUNK):
+        StockOperator.add_stocks(
+            [
+                StockIn(barcode_id=barcode_id, quantity=1, cost=2.0)
+                for _ in range(min(CHUNK, lots - start))
+            ],
+            staff_id=2,
+        )
+
+
+def collect(code: str, quantity: int):
+    return OrderOperator.create_order_for_stock_with(
+        code, OrderIn(job_number="J1", part_name="p", quantity=quantity), user_id=1
+    )
+
+
+def test_collect_across_lots(client, stock_controller, report):
+    # the recipients of the re-order notification are cached by the first
+    stock_in(client, stock_controller, "W", 1)
+    collect("W", 1)
+
+    statements = {}
+    for lots in LOTS:
+        code = f"L{lots}"
+        stock_in(client, stock_controller, code, lots)
+        count = [0]
+
+        def sent(*_):
+            count[0] += 1
+
+        event.listen(engine, "before_cursor_execute", sent)
+        try:
+            order, seconds = timed(lambda: collect(code, lots))
+        finally:
+            event.remove(engine, "before_cursor_execute", sent)
+        statements[lots] = count[0]
+
+        assert order.total_cost == 2.0 * lots
+        report(
+            f"collect across {lots} lots: {seconds * 1000:.1f} ms, "
+            f"{count[0]} statements"
+        )
+
+    # an executemany is a single statement, whatever the lots consumed
+    assert len(set(statements.values())) == 1
+
+
+def test_collect_from_the_oldest_of_many_lots(client, stock_controller, report):
+    stock_in(client, stock_controller, "W", 1)
+    collect("W", 1)
+    stock_in(client, stock_controller, "M", LOTS[-1])
+
+    order, seconds = timed(lambda: collect("M", 1))
+
+    assert order.total_cost == 2.0
+    report(f"collect 1 unit of {LOTS[-1]} lots: {seconds * 1000:.1f} ms")
@@ -0,0 +1,112 @@
+"""
+Staff logging in all at once, as at the start of a shift, with bcrypt run
+inline on the handler threads and on the password hashing process pool.
+"""
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pytest
+from passlib.context import CryptContext
+
+import utils.password
+from models.staff import Staff
+from tests.benchmarks.conftest import summary
+from tests.conftest import PASSWORD, login
+from utils.password import PasswordHasher
+
+pytestmark = pytest.mark.benchmark
+
+ROUNDS = int(os.environ.get("BENCHMARK_BCRYPT_ROUNDS", 12))
+LOGINS = 48
+CLIENTS = 48
+
+
+def stop_pool() -> None:
+    if PasswordHasher._pool is not None:
+        PasswordHasher._pool.shutdown()
+        PasswordHasher._pool = None
+
+
+@pytest.fixture
+def production_cost(monkeypatch):
+    """
+    Hashes made and verified at the production cost, by the process pool
+    as well, whose workers read BCRYPT_ROUNDS when started.
+    """
+    stop_pool()
+    monkeypatch.setenv("BCRYPT_ROUNDS", str(ROUNDS))
+    monkeypatch.setattr(
+        utils.password,
+        "context",
+        CryptContext(["bcrypt"], deprecated="auto", bcrypt__rounds=ROUNDS),
+    )
+    yield
+    stop_pool()
+
+
+@pytest.fixture
+def engineers(staff, production_cost) -> list[str]:
+    hash_password = utils.password.context.hash(PASSWORD)
+    staff_id_numbers = [f"E{number}" for number in range(2, LOGINS + 2)]
+    for staff_id_number in staff_id_numbers:
+        Staff(
+            name="Engineer",
+            staff_id_number=staff_id_number,
+            hash_password=hash_password,
+            job_id=1,
+            department_id=1,
+            role_id=1,
+        ).save()
+    return staff_id_numbers
+
+
+def inline(function, *args):
+    # bcrypt on the calling thread, as before the process pool
+    return function(*args)
+
+
+@pytest.mark.parametrize("hashing", ["inline", "process pool"])
+def test_login_storm(client, engineers, monkeypatch, hashing, report):
+    if hashing == "inline":
+        monkeypatch.setattr(PasswordHasher, "_run", staticmethod(inline))
+    # the pool starts its workers on the first hash
+    headers = login(client, "S1")
+
+    def log_in(staff_id_number: str) -> tuple[float, int]:
+        started = time.perf_counter()
+        response = client.post(
+            "/login", json={"staff_id_number": staff_id_number, "password": PASSWORD}
+        )
+        assert response.status_code in (200, 503), response.text
+        return time.perf_counter() - started, response.status_code
+
+    def browse(storm: Future) -> list[float]:
+        """The latency of listings requested while the storm lasts."""
+        timings = []
+        while not storm.done():
+            started = time.perf_counter()
+            assert client.get("/barcodes", headers=headers).status_code == 200
+            timings.append(time.perf_counter() - started)
+        return timings
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=CLIENTS + 1) as executor:
+        storm = executor.submit(lambda: list(executor.map(log_in, engineers)))
+        browsing = executor.submit(browse, storm)
+        results = storm.result()
+    elapsed = time.perf_counter() - started
+
+    report(
+        summary(
+            f"login storm, bcrypt {hashing} at cost {ROUNDS}",
+            [seconds for seconds, _ in results],
+            elapsed,
+        )
+        + f", {sum(status == 503 for _, status in results)} busy"
+    )
+    report(
+        summary(
+            f"listings during the storm, bcrypt {hashing}", browsing.result(), elapsed
+        )
+    )
@@ -0,0 +1,92 @@
+"""
+Round trips and latency of collecting a part, with every helper opening a
+session and committing of its own as before the request unit of work, and
+with all of them sharing the unit of work as a request does now.
+"""
+import time
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from controllers.order import OrderOperator
+from core.setup import database, engine
+from schemas.order import OrderIn
+from tests.benchmarks.conftest import summary
+from utils.session import _request_session
+
+pytestmark = pytest.mark.benchmark
+
+COLLECTIONS = 50
+
+
+@contextmanager
+def no_unit_of_work():
+    yield
+
+
+@contextmanager
+def unit_of_work():
+    session = database.get_session()()
+    token = _request_session.set(session)
+    try:
+        yield
+        session.commit()
+    finally:
+        _request_session.reset(token)
+        session.close()
+
+
+@pytest.fixture
+def stocked(client, stock_controller, barcode):
+    response = client.post(
+        "/stock",
+        json={"barcode_id": barcode["id"], "quantity": 10_000, "cost": 2.0},
+        headers=stock_controller,
+    )
+    assert response.status_code == 200, response.text
+
+
+@pytest.fixture
+def round_trips():
+    """The statements, commits and rollbacks sent to the database."""
+    count = [0]
+
+    def sent(*_):
+        count[0] += 1
+
+    names = ("before_cursor_execute", "commit", "rollback")
+    for name in names:
+        event.listen(engine, name, sent)
+    yield count
+    for name in names:
+        event.remove(engine, name, sent)
+
+
+def collect(scope, round_trips) -> tuple[list[float], float, float]:
+    """The timings, seconds taken and round trips per collection."""
+    data = OrderIn(job_number="J1", part_name="p", quantity=1)
+    timings = []
+    round_trips[0] = 0
+    started = time.perf_counter()
+    for _ in range(COLLECTIONS):
+        collection_started = time.perf_counter()
+        with scope():
+            OrderOperator.create_order_for_stock_with("B1", data, user_id=1)
+        timings.append(time.perf_counter() - collection_started)
+    return timings, time.perf_counter() - started, round_trips[0] / COLLECTIONS
+
+
+def test_collect_round_trips(stocked, round_trips, report):
+    results = {}
+    for name, scope in (
+        ("a session per helper", no_unit_of_work),
+        ("a unit of work", unit_of_work),
+    ):
+        timings, elapsed, results[name] = collect(scope, round_trips)
+        report(
+            summary(f"collect with {name}", timings, elapsed)
+            + f", {results[name]:.1f} round trips"
+        )
+
+    assert results["a unit of work"] < results["a session per helper"]
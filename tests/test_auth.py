@@ -0,0 +1,54 @@
+import math
+import time
+from types import SimpleNamespace
+
+import pytest
+from jose import jwt
+
+from config.setting import settings
+from controllers.auth import Auth
+from error import AppError
+from utils import revocation
+from utils.revocation import RevocationList
+
+
+@pytest.fixture
+def stateless(monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_VERIFY_MODE", "stateless")
+    monkeypatch.setattr(RevocationList, "_entries", type(RevocationList._entries)())
+
+
+def token(staff_id: int, issued_at: float) -> str:
+    return jwt.encode(
+        {"id": staff_id, "exp": issued_at + 60, "iat": issued_at},
+        settings.APP_SECRET_KEY,
+    )
+
+
+def test_tokens_revoked_within_the_second(stateless, monkeypatch):
+    second = math.floor(time.time())
+    before, after = token(1, second + 0.2), token(1, second + 0.8)
+    monkeypatch.setattr(
+        revocation,
+        "time",
+        SimpleNamespace(time=lambda: second + 0.5, monotonic=time.monotonic),
+    )
+
+    RevocationList.revoke(1)
+
+    with pytest.raises(AppError):
+        Auth.verify_token(before, "login")
+    assert Auth.verify_token(after, "login") == 1
+    assert Auth.verify_token(token(2, second + 0.2), "login") == 2
+
+
+def test_login_after_logout(stateless):
+    old = Auth.generate_access_token(1, "login")[0]
+    # a millisecond apart at least
+    time.sleep(0.002)
+    Auth.logout(1)
+    new = Auth.generate_access_token(1, "login")[0]
+
+    with pytest.raises(AppError):
+        Auth.verify_token(old, "login")
+    assert Auth.verify_token(new, "login") == 1
@@ -0,0 +1,121 @@
+import json
+
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+
+from controllers.barcode_import import BarcodeImportOperator
+from controllers.code_counter import CodeCounterOperator
+from models.barcode import Barcode
+from models.category import Category
+from utils.session import DBSession
+
+
+def row(barcode: str, category: str = "Cables", **fields) -> dict:
+    return {
+        "barcode": barcode,
+        "specification": "Cable",
+        "location": "Shelf 1",
+        "category": category,
+        **fields,
+    }
+
+
+def import_file(client, headers, content: str, import_format: str = "csv"):
+    response = client.post(
+        "/barcodes/import",
+        params={"format": import_format},
+        content=content.encode(),
+        headers=headers,
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def barcodes() -> list[tuple]:
+    with DBSession(shared=False) as db:
+        return db.execute(
+            select(
+                Barcode.barcode, Barcode.code, Barcode.location, Barcode.erm_code
+            ).order_by(Barcode.id)
+        ).all()
+
+
+def test_known_barcodes_updated_and_new_ones_added(
+    client, stock_controller, barcode
+):
+    report = import_file(
+        client,
+        stock_controller,
+        "barcode,specification,location,category,erm_code\n"
+        "B1,Cat6 cable,Shelf 2,Cables,\n"
+        "B2,Cat5 cable,Shelf 3,Cables,erm2\n",
+    )
+
+    assert report == {"inserted": 1, "updated": 1, "errors": []}
+    # a known barcode keeps its code, and its ERM code when none is given
+    assert barcodes() == [
+        ("B1", barcode["code"], "Shelf 2", "ERM1"),
+        ("B2", "SKC-2", "Shelf 3", "ERM2"),
+    ]
+
+
+def test_invalid_rows_reported_and_the_others_imported(
+    client, stock_controller, staff
+):
+    report = import_file(
+        client,
+        stock_controller,
+        "\n".join(
+            (
+                json.dumps(row("B1")),
+                "not json",
+                json.dumps({"barcode": "B2", "category": "Cables"}),
+                json.dumps(row("B3", category="Tools")),
+                json.dumps(row("B1", location="Shelf 2")),
+            )
+        ),
+        import_format="ndjson",
+    )
+
+    assert report == {
+        "inserted": 1,
+        "updated": 0,
+        "errors": [
+            {"line": 1, "barcode": "B1", "message": "Replaced by line 5"},
+            {"line": 2, "barcode": None, "message": "Invalid JSON object"},
+            {
+                "line": 3,
+                "barcode": "B2",
+                "message": "invalid specification: Field required",
+            },
+            {"line": 4, "barcode": "B3", "message": "Unknown category: Tools"},
+        ],
+    }
+    assert barcodes() == [("B1", "SKC-1", "Shelf 2", None)]
+
+
+def test_failed_chunk_reported_and_the_next_ones_imported(staff, monkeypatch):
+    Category(name="Tools").save()
+    reserve = CodeCounterOperator.reserve
+
+    def unavailable(db, prefix, count=1):
+        if prefix == "SKT":
+            raise OperationalError("INSERT", {}, Exception("unavailable"))
+        return reserve(db, prefix, count)
+
+    monkeypatch.setattr(CodeCounterOperator, "reserve", unavailable)
+
+    report = BarcodeImportOperator.import_rows(
+        [
+            (2, row("B1", category="Tools")),
+            (3, row("B2")),
+        ],
+        chunk_size=1,
+    )
+
+    assert report == {
+        "inserted": 1,
+        "updated": 0,
+        "errors": [{"line": 2, "barcode": "B1", "message": "Could not be saved"}],
+    }
+    assert barcodes() == [("B2", "SKC-1", "Shelf 1", None)]
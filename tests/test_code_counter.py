@@ -0,0 +1,77 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import delete, insert, select, text
+
+from controllers.code_counter import CodeCounterOperator
+from core.setup import engine
+from models.barcode import Barcode
+from models.code_counter import CodeCounter
+from tests.conftest import load_migration
+from utils.session import DBSession, commit
+
+
+def reserve(count: int) -> list[str]:
+    with DBSession(shared=False) as db:
+        codes = CodeCounterOperator.reserve(db, "SKC", count)
+        commit(db)
+    return codes
+
+
+def test_codes_reserved_in_sequence(empty_database):
+    assert reserve(2) == ["SKC-1", "SKC-2"]
+    assert reserve(1) == ["SKC-3"]
+
+
+def test_concurrent_reservations_never_share_a_code(empty_database):
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        reserved = list(pool.map(reserve, [3] * 16))
+
+    codes = [code for codes in reserved for code in codes]
+    assert sorted(codes, key=lambda code: int(code.split("-")[1])) == [
+        f"SKC-{number}" for number in range(1, 49)
+    ]
+
+
+def test_rolled_back_reservation_gives_its_codes_back(empty_database):
+    with DBSession(shared=False) as db:
+        CodeCounterOperator.reserve(db, "SKC", 2)
+        db.rollback()
+
+    assert reserve(1) == ["SKC-1"]
+
+
+@pytest.mark.skipif(
+    engine.dialect.name != "postgresql", reason="the seed runs on Postgres"
+)
+def test_counters_seeded_from_the_codes_given(staff):
+    migration = load_migration("d4f6b9a2c7e1_add_code_counters")
+    with engine.begin() as connection:
+        connection.execute(
+            insert(Barcode),
+            [
+                {
+                    "barcode": barcode,
+                    "code": code,
+                    "specification": "Part",
+                    "location": "Shelf 1",
+                    "category_id": 1,
+                }
+                for barcode, code in (
+                    ("B1", "SKC-7"),
+                    ("B2", "SKC-12"),
+                    ("B3", "SKT-3"),
+                    ("B4", "legacy"),
+                )
+            ],
+        )
+        connection.execute(delete(CodeCounter))
+        connection.execute(text(migration.SEED))
+        counters = connection.execute(
+            select(CodeCounter.prefix, CodeCounter.last_value).order_by(
+                CodeCounter.prefix
+            )
+        ).all()
+
+    assert counters == [("SKC", 12), ("SKT", 3)]
+    assert reserve(1) == ["SKC-13"]
@@ -0,0 +1,84 @@
+import pytest
+from sqlalchemy import delete, update
+
+from controllers.inventory_ledger import InventoryLedgerOperator
+from controllers.stock import StockOperator
+from controllers.stock_adjustment import StockAdjustmentOperator
+from controllers.stock_running import StockRunningOperator
+from core.setup import engine
+from models.inventory_movement import InventoryMovement
+from models.stock import Stock
+from schemas.stock import StockAdjustmentIn
+from tests.conftest import load_migration
+from tests.test_stock import collect
+from utils.enum import MovementType
+
+
+def backfill_ledger() -> None:
+    """Record the ledger again as its migration backfills it."""
+    migration = load_migration("a6c2e8f4d1b7_add_inventory_movements")
+    with engine.begin() as connection:
+        connection.execute(delete(InventoryMovement))
+        for statement in migration.backfill():
+            connection.execute(statement)
+
+
+def test_backfilled_ledger_agrees_with_the_running_stocks(client, engineer, lots):
+    collect(client, engineer, 7)
+    StockOperator.mark_stock_as_cancelled(lots[0])
+    StockAdjustmentOperator.create_stock_adjustment(
+        "B1", StockAdjustmentIn(department_id=1, quantity=3), staff_id=2
+    )
+    with engine.begin() as connection:
+        # lots stocked in before they could be cancelled
+        connection.execute(
+            update(Stock).where(Stock.id == lots[1]).values(cancelled=None)
+        )
+
+    backfill_ledger()
+
+    assert StockRunningOperator.reconcile_running_stocks() == []
+
+
+def test_drifted_running_stocks_repaired(client, engineer, lots):
+    collect(client, engineer, 7)
+    with engine.begin() as connection:
+        connection.execute(
+            update(InventoryMovement)
+            .where(
+                InventoryMovement.stock_id == lots[0],
+                InventoryMovement.movement_type == MovementType.stock_in.name,
+            )
+            .values(quantity=6)
+        )
+
+    drifts = StockRunningOperator.reconcile_running_stocks(repair=True)
+
+    assert [drift["barcode_id"] for drift in drifts] == [1]
+    assert drifts[0]["fields"]["remaining_quantity"] == {"expected": 24, "actual": 23}
+    assert StockRunningOperator.reconcile_running_stocks() == []
+
+
+def test_stock_remaining_valued_at_the_newest_lots(client, engineer, lots):
+    collect(client, engineer, 7)
+
+    assert InventoryLedgerOperator.valuation() == [
+        {"barcode_id": 1, "barcode": "B1", "quantity": 23, "value": 89.0}
+    ]
+
+
+def test_cancelled_lots_left_out_of_the_valuation(client, engineer, lots):
+    StockOperator.mark_stock_as_cancelled(lots[2])
+    collect(client, engineer, 7)
+
+    assert InventoryLedgerOperator.valuation() == [
+        {"barcode_id": 1, "barcode": "B1", "quantity": 3, "value": 9.0}
+    ]
+
+
+@pytest.mark.skipif(
+    engine.dialect.name != "postgresql", reason="the ledger is partitioned on Postgres"
+)
+def test_partitions_created_once(lots):
+    assert len(InventoryLedgerOperator.ensure_partitions()) == 3
+    assert InventoryLedgerOperator.ensure_partitions() == []
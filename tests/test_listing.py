@@ -0,0 +1,104 @@
+import datetime
+
+from sqlalchemy import update
+
+from controllers.stock import ScanStock
+from models.order import Orders
+from schemas.stock import BarcodeIn
+from utils.countFilter import DEFAULT_PAGE_LIMIT, NEXT_CURSOR_HEADER
+from utils.session import DBSession, commit
+
+
+def add_barcodes(count: int) -> None:
+    ScanStock.add_barcodes(
+        [
+            BarcodeIn(
+                barcode=f"B{number}",
+                specification=f"Part {number}",
+                location="Shelf 1",
+                category="Cables",
+            )
+            for number in range(count)
+        ]
+    )
+
+
+def test_listing_paged_by_default(client, stock_controller):
+    add_barcodes(DEFAULT_PAGE_LIMIT + 10)
+
+    response = client.get("/barcodes", headers=stock_controller)
+
+    assert response.status_code == 200, response.text
+    first_page = response.json()
+    assert len(first_page) == DEFAULT_PAGE_LIMIT
+    assert first_page[0]["barcode"] == f"B{DEFAULT_PAGE_LIMIT + 9}"
+    cursor = response.headers[NEXT_CURSOR_HEADER]
+
+    response = client.get(
+        "/barcodes", params={"cursor": cursor}, headers=stock_controller
+    )
+
+    assert response.status_code == 200, response.text
+    assert [barcode["barcode"] for barcode in response.json()] == [
+        f"B{number}" for number in range(9, -1, -1)
+    ]
+    assert NEXT_CURSOR_HEADER not in response.headers
+
+
+def test_listing_page_limit(client, stock_controller):
+    add_barcodes(5)
+
+    response = client.get("/barcodes", params={"limit": 2}, headers=stock_controller)
+
+    assert [barcode["barcode"] for barcode in response.json()] == ["B4", "B3"]
+    response = client.get(
+        "/barcodes",
+        params={"limit": 2, "cursor": response.headers[NEXT_CURSOR_HEADER]},
+        headers=stock_controller,
+    )
+    assert [barcode["barcode"] for barcode in response.json()] == ["B2", "B1"]
+
+
+def add_orders(client, engineer, count: int) -> None:
+    for _ in range(count):
+        response = client.post(
+            "/stock/B1/collect",
+            json={"job_number": "J1", "part_name": "p", "quantity": 1},
+            headers=engineer,
+        )
+        assert response.status_code == 200, response.text
+
+
+def test_orders_paged_on_their_creation_time(
+    client, engineer, stock_controller, lots
+):
+    add_orders(client, engineer, 5)
+    # a row backdated out of id order
+    with DBSession(shared=False) as db:
+        db.execute(
+            update(Orders)
+            .where(Orders.id == 5)
+            .values(created_at=datetime.datetime(2020, 1, 1))
+        )
+        commit(db)
+    pages = []
+    params = {"limit": 2, "from_": "2019-01-01"}
+    while True:
+        response = client.get("/orders", params=params, headers=stock_controller)
+        assert response.status_code == 200, response.text
+        pages.append([order["id"] for order in response.json()])
+        if NEXT_CURSOR_HEADER not in response.headers:
+            break
+        params["cursor"] = response.headers[NEXT_CURSOR_HEADER]
+
+    assert pages == [[4, 3], [2, 1], [5]]
+
+
+def test_orders_paged_after_an_id(client, engineer, stock_controller, lots):
+    add_orders(client, engineer, 3)
+
+    response = client.get(
+        "/orders", params={"after_id": 3}, headers=stock_controller
+    )
+
+    assert [order["id"] for order in response.json()] == [2, 1]
@@ -0,0 +1,69 @@
+import anyio
+import httpx
+from anyio import to_thread
+from fastapi.testclient import TestClient
+
+import main
+from config.setting import settings
+from utils.session import request_connections
+
+
+def thread_limit(client: TestClient) -> int:
+    return client.portal.call(
+        lambda: to_thread.current_default_thread_limiter().total_tokens
+    )
+
+
+def test_threads_limited_to_the_database_connections(monkeypatch):
+    monkeypatch.setattr(settings, "THREADPOOL_SIZE", 40)
+    with TestClient(main.app) as client:
+        assert thread_limit(client) == request_connections()
+
+
+def test_threads_below_the_database_connections(monkeypatch):
+    monkeypatch.setattr(settings, "THREADPOOL_SIZE", 4)
+    with TestClient(main.app) as client:
+        assert thread_limit(client) == 4
+
+
+def concurrent_gets(paths: tuple[str, ...], clients: int, headers) -> list[int]:
+    """The statuses of ``clients`` requests sent at once, cycling over paths."""
+
+    async def requests() -> list[int]:
+        statuses = []
+        async with main.lifespan(main.app), httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=main.app), base_url="http://test"
+        ) as client:
+
+            async def get(path: str) -> None:
+                response = await client.get(path, headers=headers)
+                statuses.append(response.status_code)
+
+            # well within DB_POOL_TIMEOUT, which a deadlock would wait for
+            with anyio.fail_after(10):
+                async with anyio.create_task_group() as group:
+                    for number in range(clients):
+                        group.start_soon(get, paths[number % len(paths)])
+        return statuses
+
+    return anyio.run(requests)
+
+
+def test_requests_beyond_the_database_connections(stock_controller):
+    clients = 3 * (settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW)
+
+    statuses = concurrent_gets(("/barcodes", "/orders"), clients, stock_controller)
+
+    assert statuses == [200] * clients
+
+
+def test_reports_with_every_request_connection_held(
+    stock_controller, lots, monkeypatch
+):
+    # report queries open sessions of their own besides the unit of work
+    monkeypatch.setattr(settings, "REPORT_CACHE_ENABLED", False)
+    clients = 3 * request_connections()
+
+    statuses = concurrent_gets(("/reports", "/analysis/B1"), clients, stock_controller)
+
+    assert statuses == [200] * clients
@@ -0,0 +1,197 @@
+import email
+
+import pytest
+
+pytest.importorskip("aiosmtpd")
+
+from aiosmtpd.controller import Controller  # noqa: E402
+
+from config.setting import settings  # noqa: E402
+from controllers.order import OrderOperator  # noqa: E402
+from cron.task import flush_reorder_notifications  # noqa: E402
+from models.email import Recipients  # noqa: E402
+from schemas.order import OrderIn  # noqa: E402
+from utils.email import SMTPConnection  # noqa: E402
+from utils.notification import DIGEST_KEY  # noqa: E402
+from utils.redis import Cache  # noqa: E402
+
+
+class Sink:
+    """Local SMTP server keeping the messages received."""
+
+    def __init__(self):
+        self.messages = []
+        self.controller = None
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(email.message_from_bytes(envelope.content))
+        return "250 Message accepted for delivery"
+
+    def start(self) -> None:
+        self.controller = Controller(
+            self, hostname=settings.MAIL_SERVER, port=settings.MAIL_PORT
+        )
+        self.controller.start()
+
+    def stop(self) -> None:
+        self.controller.stop()
+
+
+@pytest.fixture
+def sink():
+    sink = Sink()
+    sink.start()
+    yield sink
+    SMTPConnection.close()
+    sink.stop()
+
+
+@pytest.fixture
+def recipient(staff):
+    return Recipients.create_recipient("controller@example.com")
+
+
+def body(message) -> str:
+    return message.get_payload(decode=True).decode()
+
+
+def add_barcode(client, stock_controller, code: str, quantity: int) -> None:
+    response = client.post(
+        "/barcode",
+        json={
+            "barcode": code,
+            "specification": f"Part {code}",
+            "location": "Shelf 2",
+            "category": "Cables",
+            "erm_code": f"ERM-{code}",
+        },
+        headers=stock_controller,
+    )
+    assert response.status_code == 200, response.text
+    response = client.post(
+        "/stock",
+        json={"barcode_id": response.json()["id"], "quantity": quantity, "cost": 1},
+        headers=stock_controller,
+    )
+    assert response.status_code == 200, response.text
+
+
+def collect(client, engineer, *lines: tuple[str, int]) -> None:
+    response = client.post(
+        "/stock/collect/batch",
+        json=[
+            {"barcode": code, "job_number": "J1", "quantity": quantity}
+            for code, quantity in lines
+        ],
+        headers=engineer,
+    )
+    assert response.status_code == 200, response.text
+
+
+def test_barcode_notified_once_within_the_window(
+    client, engineer, lots, recipient, sink
+):
+    collect(client, engineer, ("B1", 25))
+    collect(client, engineer, ("B1", 1))
+
+    assert flush_reorder_notifications() == 1
+    assert len(sink.messages) == 1
+    assert sink.messages[0]["To"] == "controller@example.com"
+    assert body(sink.messages[0]).count("B1") == 1
+
+    collect(client, engineer, ("B1", 1))
+
+    assert flush_reorder_notifications() == 0
+    assert len(sink.messages) == 1
+
+
+def test_barcodes_sent_in_a_single_digest(
+    client, engineer, stock_controller, recipient, sink
+):
+    for code in ("B2", "B3", "B4"):
+        add_barcode(client, stock_controller, code, 12)
+
+    collect(client, engineer, ("B2", 5), ("B3", 5))
+    collect(client, engineer, ("B4", 5))
+
+    assert flush_reorder_notifications() == 3
+    assert len(sink.messages) == 1
+    html = body(sink.messages[0])
+    assert all(f"Part {code}" in html for code in ("B2", "B3", "B4"))
+    assert Cache._redis.hgetall(DIGEST_KEY) == {}
+
+
+def test_reconnect_after_the_server_disconnects(
+    client, engineer, stock_controller, recipient, sink
+):
+    add_barcode(client, stock_controller, "B2", 12)
+    add_barcode(client, stock_controller, "B3", 12)
+    collect(client, engineer, ("B2", 5))
+    assert flush_reorder_notifications() == 1
+
+    connection = SMTPConnection._smtp
+
+    # the connection kept open is dropped by the server restarting
+    sink.stop()
+    sink.start()
+    collect(client, engineer, ("B3", 5))
+
+    assert flush_reorder_notifications() == 1
+    assert SMTPConnection._smtp is not connection
+    assert len(sink.messages) == 2
+    assert "Part B3" in body(sink.messages[1])
+
+
+def test_rolled_back_collection_not_notified(
+    engineer, lots, recipient, sink, request_session
+):
+    OrderOperator.create_order_for_stock_with(
+        "B1", OrderIn(job_number="J1", part_name="p", quantity=25), user_id=1
+    )
+    assert Cache._redis.hgetall(DIGEST_KEY) == {}
+    request_session.rollback()
+
+    assert Cache._redis.hgetall(DIGEST_KEY) == {}
+    assert flush_reorder_notifications() == 0
+    assert sink.messages == []
+
+
+def test_committed_collection_notified_after_commit(
+    engineer, lots, recipient, request_session
+):
+    OrderOperator.create_order_for_stock_with(
+        "B1", OrderIn(job_number="J1", part_name="p", quantity=25), user_id=1
+    )
+    assert Cache._redis.hgetall(DIGEST_KEY) == {}
+    request_session.commit()
+
+    assert list(Cache._redis.hgetall(DIGEST_KEY)) == [b"B1"]
+
+
+def test_recipients_cache_follows_changes(client, stock_controller, recipient):
+    assert Recipients.get_recipient_emails() == ["controller@example.com"]
+
+    response = client.post(
+        "/configure/email", json={"email": "store@example.com"}, headers=stock_controller
+    )
+    assert response.status_code == 200, response.text
+    added = response.json()["id"]
+    assert Recipients.get_recipient_emails() == [
+        "controller@example.com",
+        "store@example.com",
+    ]
+
+    response = client.put(
+        f"/configure/email/{added}",
+        json={"email": "stores@example.com"},
+        headers=stock_controller,
+    )
+    assert response.status_code == 200, response.text
+    assert Recipients.get_recipient_emails() == [
+        "controller@example.com",
+        "stores@example.com",
+    ]
+
+    response = client.delete(f"/configure/email/{recipient.id}", headers=stock_controller)
+    assert response.status_code == 200, response.text
+    assert Recipients.get_recipient_emails() == ["stores@example.com"]
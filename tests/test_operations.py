@@ -0,0 +1,110 @@
+import pytest
+
+from config.setting import settings
+from controllers.operations import StaffOperator
+from schemas.staff import UpdateStaffIn
+from utils.enum import RolesStatus
+from utils.redis import Cache
+from utils.revocation import (
+    NOT_BEFORE_KEY,
+    REVOCATION_CHANNEL,
+    PrincipalCache,
+    RevocationList,
+)
+
+PRINCIPAL_KEY = "principal_1"
+
+
+def update_engineer() -> None:
+    StaffOperator.update_staff_by_id(
+        1, UpdateStaffIn(name="Engineer", role_id=2, department_id=1, job_id=1)
+    )
+
+
+def test_principal_invalidated_once_committed(staff, request_session):
+    assert StaffOperator.get_principal(1).role == RolesStatus.engineer
+    assert Cache._redis.exists(PRINCIPAL_KEY)
+
+    update_engineer()
+
+    # the change is not visible to other requests yet, nor is the cache
+    assert Cache._redis.exists(PRINCIPAL_KEY)
+    assert StaffOperator.get_principal(1).role == RolesStatus.stock_controller
+    request_session.commit()
+    assert not Cache._redis.exists(PRINCIPAL_KEY)
+
+
+def test_principal_kept_when_rolled_back(staff, request_session):
+    StaffOperator.get_principal(1)
+
+    update_engineer()
+    request_session.rollback()
+
+    assert Cache._redis.exists(PRINCIPAL_KEY)
+
+
+def test_principal_refreshed_after_update(client, stock_controller):
+    response = client.put(
+        "/staff/1",
+        json={"name": "Engineer", "role_id": 2, "department_id": 1, "job_id": 1},
+        headers=stock_controller,
+    )
+
+    assert response.status_code == 200, response.text
+    assert not Cache._redis.exists(PRINCIPAL_KEY)
+    assert StaffOperator.get_principal(1).role == RolesStatus.stock_controller
+
+
+@pytest.fixture
+def stateless(monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_VERIFY_MODE", "stateless")
+
+
+def test_principal_kept_in_process_when_stateless(staff, stateless, monkeypatch):
+    StaffOperator.get_principal(1)
+    commands = []
+    monkeypatch.setattr(
+        Cache._redis, "execute_command", lambda *args, **kwargs: commands.append(args)
+    )
+
+    assert StaffOperator.get_principal(1).role == RolesStatus.engineer
+    assert commands == []
+
+
+def test_principal_dropped_from_every_process_once_committed(
+    staff, stateless, request_session
+):
+    StaffOperator.get_principal(1)
+    changes = Cache._redis.pubsub()
+    changes.subscribe(REVOCATION_CHANNEL)
+
+    update_engineer()
+
+    assert PrincipalCache.get(1).role == RolesStatus.engineer
+    request_session.commit()
+    assert PrincipalCache.get(1) is None
+    messages = iter(lambda: changes.get_message(timeout=0.1), None)
+    assert [m["data"] for m in messages if m["type"] == "message"] == [b"principal:1"]
+
+
+def test_deleted_staff_signed_out_once_committed(staff, request_session):
+    Cache._redis.set("login_1", "token")
+
+    StaffOperator.delete_staff_by_id(1)
+
+    assert Cache._redis.exists("login_1")
+    request_session.commit()
+    assert not Cache._redis.exists("login_1")
+    assert RevocationList.not_before(1) > 0
+
+
+def test_staff_kept_signed_in_when_deletion_rolled_back(staff, request_session):
+    Cache._redis.set("login_1", "token")
+    Cache._redis.set("report_tag_staff", 1)
+
+    StaffOperator.delete_staff_by_id(1)
+    request_session.rollback()
+
+    assert Cache._redis.exists("login_1")
+    assert Cache._redis.get("report_tag_staff") == b"1"
+    assert not Cache._redis.hexists(NOT_BEFORE_KEY, 1)
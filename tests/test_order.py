@@ -0,0 +1,138 @@
+import pytest
+from sqlalchemy import event, select
+
+from core.setup import engine
+from models.order import Orders
+from models.stock import Stock
+from models.stock_running import StockRunning
+from tests.test_statement_counts import add_barcode
+from utils.session import DBSession
+
+
+def collect(client, engineer, quantity: int, barcode: str = "B1"):
+    return client.post(
+        f"/stock/{barcode}/collect",
+        json={"job_number": "J1", "part_name": "p", "quantity": quantity},
+        headers=engineer,
+    )
+
+
+def test_collect_a_part(client, engineer, lots):
+    response = collect(client, engineer, 7)
+
+    assert response.status_code == 200, response.text
+    order = response.json()
+    assert order["quantity"] == 7
+    assert order["available_quantity"] == 30
+    assert order["barcode"]["barcode"] == "B1"
+    with DBSession(shared=False) as db:
+        assert db.scalar(select(Orders.total_cost)) == 16
+        assert db.scalars(select(Stock.quantity).order_by(Stock.id)).all() == [
+            0,
+            3,
+            20,
+        ]
+        running_stock = db.scalars(select(StockRunning)).one()
+        assert running_stock.out_quantity == 7
+        assert running_stock.remaining_quantity == 23
+        assert running_stock.cost == 89
+
+
+def test_collect_more_than_remaining(client, engineer, lots):
+    assert collect(client, engineer, 25).status_code == 200
+
+    response = collect(client, engineer, 6)
+
+    assert response.status_code == 400
+    assert response.json()["message"] == "Sorry, we are currently out of stock: B1"
+    with DBSession(shared=False) as db:
+        assert db.scalar(select(StockRunning.remaining_quantity)) == 5
+        assert len(db.scalars(select(Orders)).all()) == 1
+
+
+def test_collect_unknown_barcode(client, engineer, lots):
+    response = collect(client, engineer, 1, barcode="B2")
+
+    assert response.status_code == 400
+    assert response.json()["message"] == "Sorry, item not found: B2"
+
+
+def collect_batch(client, engineer, lines: list[tuple[str, int]]):
+    return client.post(
+        "/stock/collect/batch",
+        json=[
+            {"barcode": barcode, "job_number": "J1", "part_name": "p", "quantity": q}
+            for barcode, q in lines
+        ],
+        headers=engineer,
+    )
+
+
+@pytest.fixture
+def other_lots(client, stock_controller, lots) -> list[int]:
+    """Barcode B2 stocked in as a lot of 2 at 5.0."""
+    barcode_id = add_barcode(client, stock_controller, "B2")
+    response = client.post(
+        "/stock",
+        json={"barcode_id": barcode_id, "quantity": 2, "cost": 5.0},
+        headers=stock_controller,
+    )
+    assert response.status_code == 200, response.text
+    return [response.json()["id"]]
+
+
+def test_batch_collects_a_barcode_repeated(client, engineer, lots):
+    response = collect_batch(client, engineer, [("B1", 3), ("B1", 4)])
+
+    assert response.status_code == 200, response.text
+    assert [
+        (order["quantity"], order["available_quantity"]) for order in response.json()
+    ] == [(3, 30), (4, 27)]
+    with DBSession(shared=False) as db:
+        assert db.scalars(select(Orders.total_cost).order_by(Orders.id)).all() == [
+            6,
+            10,
+        ]
+        assert db.scalar(select(StockRunning.remaining_quantity)) == 23
+
+
+def test_batch_out_of_stock_collects_nothing(client, engineer, other_lots):
+    response = collect_batch(client, engineer, [("B1", 5), ("B2", 3)])
+
+    assert response.status_code == 400
+    assert response.json()["message"] == "Sorry, we are currently out of stock: B2"
+    with DBSession(shared=False) as db:
+        assert db.scalars(select(Orders)).all() == []
+        assert db.scalars(select(Stock.quantity).order_by(Stock.id)).all() == [
+            5,
+            5,
+            20,
+            2,
+        ]
+
+
+def test_batch_locks_in_barcode_order(client, engineer, other_lots):
+    statements = []
+
+    def sent(connection, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", sent)
+    try:
+        response = collect_batch(client, engineer, [("B2", 1), ("B1", 1)])
+    finally:
+        event.remove(engine, "before_cursor_execute", sent)
+
+    assert response.status_code == 200, response.text
+    assert [order["barcode"]["barcode"] for order in response.json()] == ["B1", "B2"]
+    locks = [
+        statement.split("ORDER BY")[-1].split("LIMIT")[0].strip()
+        for statement in statements
+        if statement.startswith("SELECT")
+        and ("FROM stock_runnings" in statement or "FROM stocks" in statement)
+        and "ORDER BY" in statement
+    ]
+    assert locks[:2] == [
+        "stock_runnings.barcode_id ASC",
+        "stocks.barcode_id ASC, stocks.id ASC",
+    ]
@@ -0,0 +1,26 @@
+from utils.redis import Cache
+from utils.report_cache import ReportCache
+
+TAG_KEY = "report_tag_orders"
+
+
+def test_tags_bumped_once_committed(request_session):
+    ReportCache.invalidate("orders")
+
+    assert not Cache._redis.exists(TAG_KEY)
+    request_session.commit()
+    assert Cache._redis.get(TAG_KEY) == b"1"
+
+
+def test_tags_kept_when_rolled_back(request_session):
+    ReportCache.invalidate("orders")
+    request_session.rollback()
+    request_session.commit()
+
+    assert not Cache._redis.exists(TAG_KEY)
+
+
+def test_tags_bumped_at_once_outside_a_request():
+    ReportCache.invalidate("orders", "barcodes")
+
+    assert Cache._redis.mget(TAG_KEY, "report_tag_barcodes") == [b"1", b"1"]
@@ -0,0 +1,110 @@
+"""
+Statements run per read path, to catch a relationship loaded lazily per row
+or a load plan growing. Every path is requested over a short and a longer
+history: the count must not depend on the number of rows, and must not go
+over its budget. Lower a budget when a change saves statements.
+"""
+import pytest
+from sqlalchemy import event
+
+from config.setting import settings
+
+# statements of a request once the principal of its staff member is cached
+BUDGETS = {
+    "/barcodes": 1,
+    "/barcode/1": 1,
+    "/stock/1": 3,
+    "/stock-in": 2,
+    "/stock-in/history": 3,
+    "/stock-out": 1,
+    "/stock-out/history": 4,
+    "/stock-adjustment": 1,
+    "/stock-adjustment/history": 2,
+    "/stock-running": 2,
+    "/orders": 3,
+    "/cost-evaluation": 2,
+    "/staff": 1,
+    "/analysis/B1": 3,
+    "/valuation": 1,
+}
+
+
+def add_barcode(client, headers, code: str) -> int:
+    response = client.post(
+        "/barcode",
+        json={
+            "barcode": code,
+            "specification": f"Part {code}",
+            "location": "Shelf 1",
+            "category": "Cables",
+        },
+        headers=headers,
+    )
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+def add_history(
+    client, stock_controller, engineer, barcode_id: int, code: str, lots: int
+) -> None:
+    """Stock in lots of a barcode, collect from each and adjust it once."""
+    for _ in range(lots):
+        response = client.post(
+            "/stock",
+            json={"barcode_id": barcode_id, "quantity": 10, "cost": 2.5},
+            headers=stock_controller,
+        )
+        assert response.status_code == 200, response.text
+        response = client.post(
+            f"/stock/{code}/collect",
+            json={"job_number": "J1", "part_name": "p", "quantity": 3},
+            headers=engineer,
+        )
+        assert response.status_code == 200, response.text
+    response = client.post(
+        f"/stock-adjustment/{code}",
+        json={"department_id": 1, "quantity": 1},
+        headers=stock_controller,
+    )
+    assert response.status_code == 200, response.text
+
+
+def count_statements(client, engine, headers, path: str) -> int:
+    # the first request caches the principal
+    assert client.get(path, headers=headers).status_code == 200
+    statements = []
+
+    def count(connection, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        response = client.get(path, headers=headers)
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    assert response.status_code == 200, response.text
+    return len(statements)
+
+
+@pytest.fixture(autouse=True)
+def uncached_reports(monkeypatch):
+    # reports are counted as computed, not as read from their cache
+    monkeypatch.setattr(settings, "REPORT_CACHE_ENABLED", False)
+
+
+@pytest.mark.parametrize("path", BUDGETS)
+def test_statements_per_read_path(
+    client, empty_database, stock_controller, engineer, path
+):
+    barcode_id = add_barcode(client, stock_controller, "B1")
+    add_history(client, stock_controller, engineer, barcode_id, "B1", lots=1)
+    short = count_statements(client, empty_database, stock_controller, path)
+
+    add_history(client, stock_controller, engineer, barcode_id, "B1", lots=3)
+    for code in ("B2", "B3"):
+        other_id = add_barcode(client, stock_controller, code)
+        add_history(client, stock_controller, engineer, other_id, code, lots=3)
+    longer = count_statements(client, empty_database, stock_controller, path)
+
+    assert short == longer, f"{path} ran {short} then {longer} statements"
+    assert longer <= BUDGETS[path], f"{path} ran {longer} statements"
@@ -0,0 +1,68 @@
+from sqlalchemy import select
+
+from controllers.stock import StockOperator, lock_open_lots
+from models.evaluation import CostEvaluation
+from models.stock import Stock
+from models.stock_running import StockRunning
+from utils.session import DBSession
+
+
+def collect(client, engineer, quantity: int):
+    response = client.post(
+        "/stock/collect/batch",
+        json=[
+            {"barcode": "B1", "job_number": "J1", "part_name": "p", "quantity": quantity}
+        ],
+        headers=engineer,
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_collection_consumes_the_oldest_lots_first(client, engineer, lots):
+    collect(client, engineer, 7)
+    with DBSession(shared=False) as db:
+        assert db.execute(
+            select(Stock.id, Stock.quantity, Stock.sold).order_by(Stock.id)
+        ).all() == [(lots[0], 0, True), (lots[1], 3, False), (lots[2], 20, False)]
+        assert db.execute(
+            select(CostEvaluation.cost, CostEvaluation.quantity).order_by(
+                CostEvaluation.id
+            )
+        ).all() == [(2.0, 5), (3.0, 2)]
+
+
+def test_collection_allocates_past_cancelled_lots(client, engineer, lots):
+    StockOperator.mark_stock_as_cancelled(lots[0])
+
+    collect(client, engineer, 7)
+
+    with DBSession(shared=False) as db:
+        assert db.execute(
+            select(Stock.id, Stock.quantity, Stock.sold).order_by(Stock.id)
+        ).all() == [(lots[0], 5, False), (lots[1], 0, True), (lots[2], 18, False)]
+        assert db.execute(
+            select(CostEvaluation.cost, CostEvaluation.quantity).order_by(
+                CostEvaluation.id
+            )
+        ).all() == [(3.0, 5), (4.0, 2)]
+        running_stock = db.scalars(select(StockRunning)).one()
+        assert running_stock.remaining_quantity == 18
+        assert running_stock.cost == 72
+
+
+def test_collection_locks_only_the_lots_it_needs(lots):
+    with DBSession(shared=False) as db:
+        assert [row.id for row in lock_open_lots(db, {1: 7})] == lots[:2]
+        assert [row.id for row in lock_open_lots(db, {1: 10})] == lots[:2]
+        assert [row.id for row in lock_open_lots(db, {1: 11})] == lots
+
+
+def test_collection_locks_every_lot_when_short(client, engineer, lots):
+    StockOperator.mark_stock_as_cancelled(lots[1])
+    collect(client, engineer, 3)
+
+    with DBSession(shared=False) as db:
+        assert [
+            (row.id, row.quantity) for row in lock_open_lots(db, {1: 50})
+        ] == [(lots[0], 2), (lots[2], 20)]
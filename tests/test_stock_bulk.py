@@ -0,0 +1,96 @@
+import pytest
+from sqlalchemy import func, select
+
+from controllers.daily_movement import DailyMovementOperator
+from models.inventory_movement import InventoryMovement
+from models.stock import Stock
+from models.stock_running import StockRunning
+from tests.test_statement_counts import add_barcode
+from utils.session import DBSession
+
+
+def stock_in(client, headers, lots: list[dict]):
+    return client.post("/stock/bulk", json=lots, headers=headers)
+
+
+def written() -> tuple[int, int, int]:
+    """The lots, running stocks and ledger movements written."""
+    with DBSession(shared=False) as db:
+        return tuple(
+            db.scalar(select(func.count()).select_from(model))
+            for model in (Stock, StockRunning, InventoryMovement)
+        )
+
+
+def test_lots_stocked_in_together(client, stock_controller, barcode):
+    other_id = add_barcode(client, stock_controller, "B2")
+
+    response = stock_in(
+        client,
+        stock_controller,
+        [
+            {"barcode_id": barcode["id"], "quantity": 5, "cost": 2.0},
+            {"barcode_id": other_id, "quantity": 3, "cost": 1.5},
+            {"barcode_id": barcode["id"], "quantity": 10, "cost": 3.0},
+        ],
+    )
+
+    assert response.status_code == 200, response.text
+    assert [
+        (lot["barcode"]["barcode"], lot["quantity"]) for lot in response.json()
+    ] == [("B1", 5), ("B2", 3), ("B1", 10)]
+    with DBSession(shared=False) as db:
+        assert db.execute(
+            select(
+                StockRunning.barcode_id,
+                StockRunning.stock_quantity,
+                StockRunning.remaining_quantity,
+                StockRunning.cost,
+            ).order_by(StockRunning.barcode_id)
+        ).all() == [(barcode["id"], 15, 15, 40.0), (other_id, 3, 3, 4.5)]
+
+
+def test_unknown_barcode_rejects_every_lot(client, stock_controller, barcode):
+    response = stock_in(
+        client,
+        stock_controller,
+        [
+            {"barcode_id": barcode["id"], "quantity": 5, "cost": 2.0},
+            {"barcode_id": 99, "quantity": 5, "cost": 2.0},
+        ],
+    )
+
+    assert response.status_code == 400, response.text
+    assert written() == (0, 0, 0)
+
+
+def test_invalid_lot_rejects_every_lot(client, stock_controller, barcode):
+    response = stock_in(
+        client,
+        stock_controller,
+        [
+            {"barcode_id": barcode["id"], "quantity": 5, "cost": 2.0},
+            {"barcode_id": barcode["id"], "quantity": "many", "cost": 2.0},
+        ],
+    )
+
+    assert response.status_code == 422, response.text
+    assert written() == (0, 0, 0)
+
+
+def test_failed_write_rolls_every_lot_back(
+    client, stock_controller, barcode, monkeypatch
+):
+    def failed(*args, **kwargs):
+        raise RuntimeError("daily movements unavailable")
+
+    monkeypatch.setattr(DailyMovementOperator, "record_many", failed)
+
+    with pytest.raises(RuntimeError):
+        stock_in(
+            client,
+            stock_controller,
+            [{"barcode_id": barcode["id"], "quantity": 5, "cost": 2.0}] * 3,
+        )
+
+    assert written() == (0, 0, 0)
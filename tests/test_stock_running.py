@@ -0,0 +1,151 @@
+import datetime
+
+import pytest
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+
+from controllers.stock_running import StockRunningOperator as SR
+from core.setup import engine
+from models.stock_running import StockRunning
+from models.stock_running_history import StockRunningHistory
+from utils.enum import RunningStockStatus
+from utils.session import DBSession, commit
+
+
+def running_stocks(db) -> list[tuple]:
+    return db.execute(
+        select(
+            StockRunning.barcode_id,
+            StockRunning.stock_quantity,
+            StockRunning.out_quantity,
+            StockRunning.remaining_quantity,
+            StockRunning.cost,
+            StockRunning.status,
+        ).order_by(StockRunning.barcode_id)
+    ).all()
+
+
+def test_first_movement_creates_the_running_stock(barcode):
+    with DBSession(shared=False) as db:
+        running_stock = SR.apply_movement(db, barcode["id"], stock_quantity=5, cost=10)
+        commit(db)
+        assert running_stock.remaining_quantity == 5
+        assert running_stock.status == RunningStockStatus.re_order
+        assert running_stocks(db) == [
+            (barcode["id"], 5, 0, 5, 10, RunningStockStatus.re_order)
+        ]
+
+
+def test_movements_add_up_on_the_running_stock(barcode):
+    with DBSession(shared=False) as db:
+        SR.apply_movement(db, barcode["id"], stock_quantity=5, cost=10)
+        SR.apply_movement(db, barcode["id"], stock_quantity=20, cost=40)
+        running_stock = SR.apply_movement(db, barcode["id"], out_quantity=3, cost=-6)
+        commit(db)
+        assert running_stock.remaining_quantity == 22
+        assert running_stock.cost == 44
+        assert running_stocks(db) == [
+            (barcode["id"], 25, 3, 22, 44, RunningStockStatus.available)
+        ]
+        assert db.scalar(select(func.count()).select_from(StockRunningHistory)) == 3
+
+
+def test_movements_are_summed_per_barcode(client, stock_controller, barcode):
+    response = client.post(
+        "/barcode",
+        json={
+            "barcode": "B2",
+            "specification": "Cat5 cable",
+            "location": "Shelf 2",
+            "category": "Cables",
+            "erm_code": "ERM2",
+        },
+        headers=stock_controller,
+    )
+    other = response.json()["id"]
+    with DBSession(shared=False) as db:
+        SR.apply_movement(db, barcode["id"], stock_quantity=5, cost=10)
+        running_stocks_changed = SR.apply_movements(
+            db,
+            [
+                {"barcode_id": other, "stock_quantity": 12, "cost": 24},
+                {"barcode_id": barcode["id"], "stock_quantity": 10, "cost": 20},
+                {"barcode_id": barcode["id"], "out_quantity": 2, "cost": -4},
+            ],
+        )
+        commit(db)
+        assert sorted(
+            (row.barcode_id, row.remaining_quantity) for row in running_stocks_changed
+        ) == [(barcode["id"], 13), (other, 12)]
+        assert running_stocks(db) == [
+            (barcode["id"], 15, 2, 13, 26, RunningStockStatus.available),
+            (other, 12, 0, 12, 24, RunningStockStatus.available),
+        ]
+
+
+def test_a_barcode_has_a_single_running_stock(barcode):
+    with DBSession(shared=False) as db:
+        SR.apply_movement(db, barcode["id"], stock_quantity=5, cost=10)
+        db.add(
+            StockRunning(barcode_id=barcode["id"], stock_quantity=1, remaining_quantity=1)
+        )
+        with pytest.raises(IntegrityError):
+            db.flush()
+
+
+DAYS = [datetime.datetime(2026, 1, day, 10) for day in (1, 2, 3)]
+
+
+@pytest.fixture
+def history(lots) -> None:
+    """The running stock of B1 changed at 10:00 on January 1st, 2nd and 3rd."""
+    with DBSession(shared=False) as db:
+        ids = db.scalars(
+            select(StockRunningHistory.id).order_by(StockRunningHistory.id)
+        ).all()
+        for history_id, as_of in zip(ids, DAYS):
+            db.execute(
+                update(StockRunningHistory)
+                .where(StockRunningHistory.id == history_id)
+                .values(as_of=as_of)
+            )
+        commit(db)
+
+
+def remaining_on(report_on: datetime.datetime):
+    running_stock = SR.get_running_stock_report("B1", report_on)
+    return running_stock and running_stock.remaining_quantity
+
+
+def test_running_stock_as_of_a_past_time(history):
+    assert remaining_on(DAYS[0] - datetime.timedelta(hours=1)) is None
+    assert remaining_on(DAYS[0]) == 5
+    assert remaining_on(DAYS[1] + datetime.timedelta(hours=1)) == 10
+    assert remaining_on(None) == 30
+
+
+def test_snapshot_of_a_day_closed(history):
+    assert SR.snapshot_history(DAYS[1].date()) == 1
+    # taking it again replaces it
+    assert SR.snapshot_history(DAYS[1].date()) == 1
+
+    with DBSession(shared=False) as db:
+        assert db.execute(
+            select(StockRunningHistory.as_of, StockRunningHistory.remaining_quantity)
+            .where(StockRunningHistory.snapshot.is_(True))
+        ).all() == [(datetime.datetime(2026, 1, 3), 10)]
+    assert SR.snapshot_history(datetime.date(2025, 12, 31)) == 0
+
+
+@pytest.mark.skipif(
+    engine.dialect.name != "postgresql", reason="compacting truncates on Postgres"
+)
+def test_history_compacted_to_a_day(history):
+    for day in DAYS[:2]:
+        SR.snapshot_history(day.date())
+
+    assert SR.compact_history(DAYS[2].date()) == 2
+
+    assert remaining_on(DAYS[1] + datetime.timedelta(hours=1)) == 5
+    assert remaining_on(datetime.datetime(2026, 1, 3)) == 10
+    assert remaining_on(None) == 30
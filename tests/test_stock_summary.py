@@ -0,0 +1,68 @@
+from controllers.stock import StockOperator
+from tests.test_statement_counts import add_barcode
+from tests.test_stock import collect
+
+
+def summaries(client, headers) -> list[tuple]:
+    response = client.get("/stock-in", headers=headers)
+    assert response.status_code == 200, response.text
+    return [
+        (
+            summary["barcode"],
+            summary["quantity"],
+            summary["total_cost"],
+            summary["average_cost"],
+            summary["min_cost"],
+            summary["max_cost"],
+            summary["lot_count"],
+        )
+        for summary in response.json()
+    ]
+
+
+def test_summary_of_the_lots_stocked_in(client, stock_controller, lots):
+    assert summaries(client, stock_controller) == [
+        ("B1", 30, 105.0, 3.5, 2.0, 4.0, 3)
+    ]
+
+
+def test_summary_kept_on_collection(client, stock_controller, engineer, lots):
+    collect(client, engineer, 7)
+
+    # lots are summarized as stocked in, a collection leaves them so
+    assert summaries(client, stock_controller) == [
+        ("B1", 30, 105.0, 3.5, 2.0, 4.0, 3)
+    ]
+
+
+def test_cancelled_lot_left_out_of_the_summary(client, stock_controller, lots):
+    StockOperator.mark_stock_as_cancelled(lots[0])
+
+    assert summaries(client, stock_controller) == [
+        ("B1", 25, 95.0, 3.8, 3.0, 4.0, 2)
+    ]
+
+
+def test_summary_removed_with_the_last_lot(client, stock_controller, lots):
+    for lot in lots[:2]:
+        StockOperator.mark_stock_as_cancelled(lot)
+    response = client.delete(f"/stock/{lots[2]}", headers=stock_controller)
+    assert response.status_code == 200, response.text
+
+    assert summaries(client, stock_controller) == []
+
+
+def test_lot_moved_between_summaries(client, stock_controller, lots):
+    other_id = add_barcode(client, stock_controller, "B2")
+
+    response = client.put(
+        f"/stock/{lots[2]}",
+        json={"barcode_id": other_id, "quantity": 10, "cost": 5.0},
+        headers=stock_controller,
+    )
+
+    assert response.status_code == 200, response.text
+    assert summaries(client, stock_controller) == [
+        ("B2", 10, 50.0, 5.0, 5.0, 5.0, 1),
+        ("B1", 10, 25.0, 2.5, 2.0, 3.0, 2),
+    ]
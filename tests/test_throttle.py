@@ -0,0 +1,79 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from config.setting import settings
+from tests.conftest import PASSWORD
+from utils.throttle import LoginThrottle
+
+# fakeredis runs the Lua scripts of the throttle with lupa only, without it
+# the throttle fails open and no limit can be tested
+pytest.importorskip("lupa")
+
+
+def login(client, staff_id_number: str, password: str, **headers):
+    return client.post(
+        "/login",
+        json={"staff_id_number": staff_id_number, "password": password},
+        headers=headers,
+    )
+
+
+def test_concurrent_attempts_limited():
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        retry_afters = list(
+            executor.map(lambda _: LoginThrottle.attempt("E1"), range(20))
+        )
+
+    assert retry_afters.count(0) == settings.LOGIN_MAX_ATTEMPTS
+    assert all(
+        0 < retry_after <= settings.LOGIN_THROTTLE_WINDOW
+        for retry_after in retry_afters
+        if retry_after
+    )
+
+
+def test_failed_logins_locked_out_with_retry_after(client, staff):
+    for _ in range(settings.LOGIN_MAX_ATTEMPTS):
+        assert login(client, "E1", "wrong").status_code == 400
+
+    response = login(client, "E1", PASSWORD)
+
+    assert response.status_code == 429
+    assert 0 < int(response.headers["Retry-After"]) <= settings.LOGIN_THROTTLE_WINDOW
+    # another staff member is not locked out
+    assert login(client, "S1", PASSWORD).status_code == 200
+
+
+def test_successful_login_not_counted(client, staff):
+    for _ in range(settings.LOGIN_MAX_ATTEMPTS - 1):
+        assert login(client, "E1", "wrong").status_code == 400
+    assert login(client, "E1", PASSWORD).status_code == 200
+
+    assert login(client, "E1", "wrong").status_code == 400
+    assert login(client, "E1", "wrong").status_code == 429
+
+
+def test_client_ip_not_limited_by_default(client, staff):
+    for number in range(settings.LOGIN_MAX_ATTEMPTS * 5):
+        assert login(client, f"X{number}", "wrong").status_code == 400
+
+    assert login(client, "E1", PASSWORD).status_code == 200
+
+
+@pytest.fixture
+def ip_limit(monkeypatch):
+    monkeypatch.setattr(settings, "LOGIN_IP_MAX_ATTEMPTS", 3)
+
+
+def test_client_ip_limited_when_set(client, staff, ip_limit):
+    forwarded = {"X-Forwarded-For": "203.0.113.7"}
+    for number in range(3):
+        assert login(client, f"X{number}", "wrong", **forwarded).status_code == 400
+
+    assert login(client, "E1", PASSWORD, **forwarded).status_code == 429
+    # the limit is on the client forwarded by the proxy, not on the proxy
+    assert (
+        login(client, "E1", PASSWORD, **{"X-Forwarded-For": "203.0.113.8"}).status_code
+        == 200
+    )
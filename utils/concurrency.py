@@ -0,0 +1,29 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from config.setting import settings
+
+# shared by every request of the process, so a burst of reports holds at most
+# REPORT_QUERY_CONCURRENCY database connections at a time, connections kept
+# out of those requests may hold (see utils.session.request_connections)
+_report_queries = ThreadPoolExecutor(
+    max_workers=settings.REPORT_QUERY_CONCURRENCY,
+    thread_name_prefix="report-query",
+)
+
+
+def run_report_queries(*queries: Callable[[], Any]) -> list[Any]:
+    """
+    Run independent read only queries concurrently.
+
+    Each query runs on a worker thread outside the request unit of work, so
+    the DBSession it opens is a session of its own.
+
+    Args:
+        queries: callables taking no argument, each running its queries
+
+    Returns:
+        the results of the queries, in the order given
+    """
+    futures = [_report_queries.submit(query) for query in queries]
+    return [future.result() for future in futures]
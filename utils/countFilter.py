@@ -1,11 +1,22 @@
-from schemas.stock import StockQuery
-from typing import TypeVar, Any
+import base64
+import binascii
+from datetime import datetime
+
+from fastapi import Response
+from sqlalchemy import tuple_
+
+from error import AppError
+from schemas.stock import PageQuery, StockQuery
+from typing import TypeVar, Any, Optional
 from utils.session import DBSession
 
 
 DB_MODEL = TypeVar("T")
 DB_QUERY = TypeVar("T")
 
+DEFAULT_PAGE_LIMIT = 50
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
 
 class StockFilter:
     def __init__(
@@ -13,15 +24,17 @@ class StockFilter:
         query_params: StockQuery,
         db_model: DB_MODEL = None,
         query_to_use: DB_QUERY = None,
+        options: tuple = (),
     ):
         self.db_model = db_model
         self.query_params = query_params
         self.query_to_use = query_to_use
+        self.options = options
 
     def apply(self) -> list[dict[str, Any]]:
         if not self.query_to_use:
             with DBSession() as db:
-                query = db.query(self.db_model)
+                query = db.query(self.db_model).options(*self.options)
             if self.query_params.sorted:
                 query = query.order_by(self.db_model.id)
 
@@ -43,3 +56,99 @@ class StockFilter:
                 else self.query_params.to_value - self.query_params.from_value + 1
             )
         return query.all()
+
+
+class KeysetFilter:
+    """
+    Keyset pagination over a query, newest id first.
+
+    The id column can be any integer primary key of the rows, not only `id`.
+
+    Pages are fetched with `WHERE id < :after_id ORDER BY id DESC LIMIT n`
+    so every page is a primary key range scan, however deep the client goes.
+    Without any page parameter the first DEFAULT_PAGE_LIMIT rows are
+    returned, a listing is never read whole.
+
+    A listing filtered on a range of a datetime column, such as created_at,
+    is keyed on that column and the id instead, newest first, so its pages
+    are range scans of an index on both columns.
+    """
+
+    def __init__(
+        self,
+        query_params: PageQuery,
+        query_to_use: DB_QUERY,
+        id_column,
+        order_column=None,
+    ):
+        self.query_params = query_params
+        self.query_to_use = query_to_use
+        self.id_column = id_column
+        self.order_column = order_column
+
+    @staticmethod
+    def encode_cursor(last_id: int, last_value: datetime = None) -> str:
+        key = str(last_id)
+        if last_value is not None:
+            key = f"{last_value.isoformat()}|{key}"
+        return base64.urlsafe_b64encode(key.encode()).decode()
+
+    def decode_cursor(self, cursor: str) -> tuple[Optional[datetime], int]:
+        try:
+            key = base64.urlsafe_b64decode(cursor.encode()).decode()
+            if self.order_column is None:
+                return None, int(key)
+            value, last_id = key.split("|")
+            return datetime.fromisoformat(value), int(last_id)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise AppError(message="Invalid page cursor provided", status_code=400)
+
+    def apply(self) -> tuple[list[Any], Optional[str]]:
+        """
+        Returns:
+            the rows of the requested page and the cursor of the next page,
+            None when this is the last page
+        """
+        params = self.query_params or PageQuery()
+        if params.cursor is not None:
+            after_value, after_id = self.decode_cursor(params.cursor)
+        else:
+            after_value, after_id = None, params.after_id
+        if self.order_column is None:
+            query = self.query_to_use.order_by(self.id_column.desc())
+            if after_id is not None:
+                query = query.filter(self.id_column < after_id)
+        else:
+            query = self.query_to_use.order_by(
+                self.order_column.desc(), self.id_column.desc()
+            )
+            if after_id is not None and after_value is None:
+                # the key of the row an after_id names
+                after_value = (
+                    self.query_to_use.session.query(self.order_column)
+                    .filter(self.id_column == after_id)
+                    .scalar()
+                )
+            if after_value is not None:
+                query = query.filter(
+                    tuple_(self.order_column, self.id_column)
+                    < tuple_(after_value, after_id)
+                )
+            elif after_id is not None:
+                query = query.filter(self.id_column < after_id)
+        limit = params.limit or DEFAULT_PAGE_LIMIT
+        rows = query.limit(limit + 1).all()
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, self.encode_cursor(
+            getattr(rows[-1], self.id_column.key),
+            None
+            if self.order_column is None
+            else getattr(rows[-1], self.order_column.key),
+        )
+
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]) -> None:
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
@@ -1,59 +1,157 @@
-from typing import Any
+import smtplib
+import ssl
+import threading
+from email.message import EmailMessage
+from email.utils import formataddr
+from typing import Any, Optional
 
-from fastapi_mail import ConnectionConfig, FastMail, MessageSchema, MessageType
-from fastapi_mail.errors import ConnectionErrors
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment, FileSystemLoader, Template
 from pydantic import EmailStr
 
 from config.setting import settings
 from error import AppError
 
 file_loader = FileSystemLoader(searchpath="templates/")
-env = Environment(loader=file_loader, auto_reload=True, autoescape=True)
+# without auto_reload a template is compiled once and never checked on disk
+# again, turn it on while editing templates
+env = Environment(
+    loader=file_loader,
+    auto_reload=settings.EMAIL_TEMPLATE_AUTO_RELOAD,
+    autoescape=True,
+    cache_size=-1,
+)
+
+
+class SMTPConnection:
+    """
+    A single SMTP connection kept open and reused by every email sent from
+    the process, so a worker does not connect and authenticate per message.
+
+    Sends are serialized by a lock, a connection dropped by the server is
+    reopened once before the message fails.
+    """
+
+    _smtp: Optional[smtplib.SMTP] = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def send(message: EmailMessage) -> None:
+        with SMTPConnection._lock:
+            try:
+                SMTPConnection._connection().send_message(message)
+            except (smtplib.SMTPServerDisconnected, ConnectionError):
+                SMTPConnection._close()
+                SMTPConnection._connection().send_message(message)
+
+    @staticmethod
+    def close() -> None:
+        with SMTPConnection._lock:
+            SMTPConnection._close()
+
+    @staticmethod
+    def _connection() -> smtplib.SMTP:
+        if SMTPConnection._smtp is None:
+            context = ssl.create_default_context()
+            if str(settings.VALIDATE_CERTS).lower() not in ("1", "true", "yes"):
+                context.check_hostname = False
+                context.verify_mode = ssl.CERT_NONE
+            if settings.MAIL_SSL_TLS:
+                smtp = smtplib.SMTP_SSL(
+                    settings.MAIL_SERVER,
+                    settings.MAIL_PORT,
+                    timeout=settings.MAIL_TIMEOUT,
+                    context=context,
+                )
+            else:
+                smtp = smtplib.SMTP(
+                    settings.MAIL_SERVER,
+                    settings.MAIL_PORT,
+                    timeout=settings.MAIL_TIMEOUT,
+                )
+                if settings.MAIL_STARTTLS:
+                    smtp.starttls(context=context)
+            smtp.set_debuglevel(int(settings.MAIL_DEBUG))
+            if settings.USE_CREDENTIALS:
+                smtp.login(
+                    settings.MAIL_USERNAME, str(settings.MAIL_PASSWORD).strip()
+                )
+            SMTPConnection._smtp = smtp
+        return SMTPConnection._smtp
+
+    @staticmethod
+    def _close() -> None:
+        if SMTPConnection._smtp is None:
+            return
+        try:
+            SMTPConnection._smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+        SMTPConnection._smtp = None
 
 
 class EmailService:
-    mail_config = ConnectionConfig(
-        MAIL_USERNAME=settings.MAIL_USERNAME,
-        MAIL_PASSWORD=str(settings.MAIL_PASSWORD).strip(),
-        MAIL_FROM=settings.MAIL_FROM,
-        MAIL_FROM_NAME=settings.MAIL_FROM_NAME,
-        MAIL_PORT=settings.MAIL_PORT,
-        MAIL_SERVER=settings.MAIL_SERVER,
-        MAIL_SSL_TLS=settings.MAIL_SSL_TLS,
-        MAIL_STARTTLS=settings.MAIL_STARTTLS,
-        USE_CREDENTIALS=settings.USE_CREDENTIALS,
-        VALIDATE_CERTS=settings.VALIDATE_CERTS,
-        TEMPLATE_FOLDER="templates",
-        MAIL_DEBUG=settings.MAIL_DEBUG,
-    )
-
-    @staticmethod
-    async def send(
+    @staticmethod
+    def warm_templates() -> int:
+        """
+        Compile every email template ahead of the first message.
+
+        Returns:
+            int: The number of templates compiled.
+        """
+        names = env.list_templates(extensions=["html"])
+        for name in names:
+            env.get_template(name)
+        return len(names)
+
+    @staticmethod
+    def template(email_template: str) -> Template:
+        return env.get_template(email_template)
+
+    @staticmethod
+    def render(email_template: str, content: dict[str, Any]) -> str:
+        return EmailService.render_many(email_template, [content])[0]
+
+    @staticmethod
+    def render_many(
+        email_template: str, contents: list[dict[str, Any]]
+    ) -> list[str]:
+        """
+        Render many notifications from a single template load.
+
+        Args:
+            email_template (str): The template rendered.
+            contents (list[dict]): The content of each notification, as
+                taken by render.
+
+        Returns:
+            list[str]: The HTML of each notification, in the order given.
+        """
+        template = EmailService.template(email_template)
+        # a notification lists its items, older ones carry a single item
+        return [
+            template.render(items=content.get("items") or [content])
+            for content in contents
+        ]
+
+    @staticmethod
+    def send(
         email: list[EmailStr],
         subject: str,
         content: dict[str, Any],
         email_template: str = "email.html",
     ):
-        template = env.get_template(email_template)
-        html = template.render(
-            barcode=content.get("barcode"),
-            location=content.get("location"),
-            specification=content.get("specification"),
-        )
+        if len(email) == 0:
+            print("Skipped sending email, no emails configured")
+            return
+        html = EmailService.render(email_template, content)
+
+        message = EmailMessage()
+        message["Subject"] = subject
+        message["From"] = formataddr((settings.MAIL_FROM_NAME, settings.MAIL_FROM))
+        message["To"] = ", ".join(email)
+        message.set_content(html, subtype="html")
         try:
-            message = MessageSchema(
-                subject=subject, recipients=email, body=html, subtype=MessageType.html
-            )
-            if len(email) == 0:
-                print("Skipped sending email, no emails configured")
-                return
-            fm = FastMail(EmailService.mail_config)
-            await fm.send_message(message, template_name=email_template)
-
-        except ConnectionErrors as e:
-            print(e)
-            raise AppError(message="Internal Server Error", status_code=500)
-        except Exception as e:
+            SMTPConnection.send(message)
+        except (smtplib.SMTPException, OSError) as e:
             print(e)
             raise AppError(message="Internal Server Error", status_code=500)
@@ -6,6 +6,12 @@ class RunningStockStatus(Enum):
     re_order = "re_order"
 
 
+class MovementType(Enum):
+    stock_in = "stock_in"
+    stock_out = "stock_out"
+    adjustment = "adjustment"
+
+
 class OrderStatus(Enum):
     part_not_available = "part_not_available"
     part_available = "part_available"
@@ -23,6 +29,16 @@ class PurchaseOrderStates(Enum):
     canceled = "canceled"
 
 
+class ExportFormat(Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+class ImportFormat(Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
 class GroupStates(Enum):
     managers = "managers"
     users = "users"
\ No newline at end of file
@@ -0,0 +1,57 @@
+import csv
+import io
+import json
+from typing import Any, Iterator
+
+from fastapi.responses import StreamingResponse
+
+from utils.enum import ExportFormat
+
+MEDIA_TYPES = {
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.csv: "text/csv",
+}
+
+
+def ndjson_lines(rows: Iterator[dict[str, Any]]) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps(row, default=str) + "\n"
+
+
+def csv_lines(rows: Iterator[dict[str, Any]]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = None
+    for row in rows:
+        if writer is None:
+            writer = csv.DictWriter(buffer, fieldnames=list(row))
+            writer.writeheader()
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def stream_export(
+    rows: Iterator[dict[str, Any]], export_format: ExportFormat, filename: str
+) -> StreamingResponse:
+    """
+    Write rows out one at a time as NDJSON or CSV.
+
+    Args:
+        rows: lazily produced rows, all with the same keys
+        export_format: the format to write the rows in
+        filename: name offered to the client, without extension
+
+    Returns:
+        a response whose body is produced while the rows are read
+    """
+    lines = (
+        csv_lines(rows) if export_format is ExportFormat.csv else ndjson_lines(rows)
+    )
+    return StreamingResponse(
+        lines,
+        media_type=MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}.{export_format.value}"'
+        },
+    )
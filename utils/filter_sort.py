@@ -11,9 +11,14 @@ T = TypeVar("T")
 
 class FilterSort:
     def __init__(
-        self, db_model: Type[T], request_query_params: dict, db: Session = None
+        self,
+        db_model: Type[T],
+        request_query_params: dict,
+        db: Session = None,
+        options: tuple = (),
     ):
         self.db_model = db_model
+        self.options = options
         self.db_model_inspect = inspect(db_model)
         self.request_query_params = request_query_params
         self.db = db
@@ -91,7 +96,7 @@ class FilterSort:
                 del self.request_query_params[param_name]
 
     def filter_and_sort(self) -> List[T]:
-        query = self.db.query(self.db_model)
+        query = self.db.query(self.db_model).options(*self.options)
 
         self.handle_none_filter_and_sort()
 
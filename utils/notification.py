@@ -0,0 +1,88 @@
+import json
+from typing import Any
+
+from redis.exceptions import RedisError
+
+from config.setting import settings
+from utils.redis import Cache
+
+DIGEST_KEY = "reorder_digest"
+SCHEDULED_KEY = "reorder_digest_scheduled"
+
+
+class ReorderNotifications:
+    """
+    Redis queue coalescing re-order notifications into digests.
+
+    A barcode is queued at most once per REORDER_NOTIFICATION_WINDOW seconds
+    however often it is collected while in re-order. The barcodes queued are
+    kept in a hash until a single flush, scheduled REORDER_DIGEST_DELAY
+    seconds after the first of them, sends them all in one email.
+    """
+
+    @staticmethod
+    def enqueue(items: list[dict[str, Any]]) -> bool:
+        """
+        Queue the barcodes which were not notified within the window.
+
+        Args:
+            items: the barcode, location and specification of each barcode
+
+        Returns:
+            whether a flush of the digest has to be scheduled
+        """
+        try:
+            return ReorderNotifications._enqueue(items)
+        except RedisError as e:
+            # the collection is done already, only its notification is lost
+            print("Redis unavailable, re-order notification dropped", e)
+            return False
+
+    @staticmethod
+    def _enqueue(items: list[dict[str, Any]]) -> bool:
+        pipeline = Cache.pipeline()
+        for item in items:
+            pipeline.set(
+                f"reorder_notified_{item['barcode']}",
+                1,
+                nx=True,
+                ex=settings.REORDER_NOTIFICATION_WINDOW,
+            )
+        fresh = [item for item, added in zip(items, pipeline.execute()) if added]
+        if not fresh:
+            return False
+        Cache._redis.hset(
+            DIGEST_KEY, mapping={item["barcode"]: json.dumps(item) for item in fresh}
+        )
+        # the first barcode of a digest schedules its flush, the flag expires
+        # should that flush never run so a later barcode schedules another
+        return bool(
+            Cache._redis.set(
+                SCHEDULED_KEY, 1, nx=True, ex=settings.REORDER_DIGEST_DELAY * 10
+            )
+        )
+
+    @staticmethod
+    def pending() -> dict[str, dict[str, Any]]:
+        """
+        Open the digest for sending.
+
+        Barcodes queued from now on schedule the next digest.
+
+        Returns:
+            the items queued, by barcode
+        """
+        Cache.delete(SCHEDULED_KEY)
+        return {
+            barcode.decode(): json.loads(item)
+            for barcode, item in Cache._redis.hgetall(DIGEST_KEY).items()
+        }
+
+    @staticmethod
+    def acknowledge(barcodes: list[str]) -> None:
+        """
+        Drop the barcodes sent from the digest. Those not acknowledged, as
+        when sending failed, are sent by the next flush.
+        """
+        if barcodes:
+            Cache._redis.hdel(DIGEST_KEY, *barcodes)
@@ -0,0 +1,81 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+from passlib.context import CryptContext
+
+from config.setting import settings
+from error import AppError
+
+# hashes with another cost than BCRYPT_ROUNDS are reported as needing an update
+context = CryptContext(["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
+
+BUSY_MESSAGE = "The server is busy, please try again in a moment"
+
+
+def _hash(password: str) -> str:
+    return context.hash(password)
+
+
+def _verify_and_update(hash_password: str, password: str) -> tuple[bool, Optional[str]]:
+    try:
+        return context.verify_and_update(password, hash_password)
+    except (TypeError, ValueError) as e:
+        print("Verification failed", e)
+        return False, None
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a pool of processes, one per core by default, so hashing
+    neither holds the GIL of the API process nor piles up without bound.
+
+    At most PASSWORD_HASH_QUEUE_LIMIT hashes are running or waiting at a
+    time, further requests fail fast with a 503.
+    """
+
+    _pool: Optional[ProcessPoolExecutor] = None
+    _pool_lock = threading.Lock()
+    _slots = threading.BoundedSemaphore(settings.PASSWORD_HASH_QUEUE_LIMIT)
+
+    @staticmethod
+    def hash(password: str) -> str:
+        return PasswordHasher._run(_hash, password)
+
+    @staticmethod
+    def verify_and_update(
+        hash_password: str, password: str
+    ) -> tuple[bool, Optional[str]]:
+        """
+        Returns:
+            whether the password matches the hash, and a new hash of it when
+            the hash was made with another cost than the one configured
+        """
+        return PasswordHasher._run(_verify_and_update, hash_password, password)
+
+    @staticmethod
+    def _executor() -> ProcessPoolExecutor:
+        with PasswordHasher._pool_lock:
+            if PasswordHasher._pool is None:
+                PasswordHasher._pool = ProcessPoolExecutor(
+                    max_workers=settings.PASSWORD_HASH_WORKERS or None,
+                    # the API process runs threads, do not fork it
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return PasswordHasher._pool
+
+    @staticmethod
+    def _run(function: Callable, *args: Any) -> Any:
+        if not PasswordHasher._slots.acquire(blocking=False):
+            raise AppError(message=BUSY_MESSAGE, status_code=503)
+        try:
+            return PasswordHasher._executor().submit(function, *args).result()
+        except BrokenProcessPool:
+            # a worker died, start a new pool for the next requests
+            with PasswordHasher._pool_lock:
+                PasswordHasher._pool = None
+            raise AppError(message=BUSY_MESSAGE, status_code=503)
+        finally:
+            PasswordHasher._slots.release()
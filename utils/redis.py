@@ -1,31 +1,125 @@
-from typing import Any
+from typing import Any, Optional
 
 import redis
+from redis.exceptions import RedisError
 
 from config.setting import settings
 
+try:
+    from redis.cache import CacheConfig
+except ImportError:  # redis-py < 5.1 has no client side caching
+    CacheConfig = None
 
-class Cache:
-    _redis = redis.Redis(
-        host=settings.REDIS_HOST,
-        port=settings.REDIS_PORT,
-        # password=settings.REDIS_PASSWORD,
-        db=settings.REDIS_DB,
+
+def _connection_kwargs() -> dict[str, Any]:
+    return {
+        "host": settings.REDIS_HOST,
+        "port": settings.REDIS_PORT,
+        "db": settings.REDIS_DB,
+        "password": settings.REDIS_PASSWORD or None,
+        "socket_connect_timeout": settings.REDIS_CONNECT_TIMEOUT,
+        "health_check_interval": settings.REDIS_HEALTH_CHECK_INTERVAL,
+    }
+
+
+def _pool() -> redis.BlockingConnectionPool:
+    kwargs = _connection_kwargs()
+    if settings.REDIS_CLIENT_CACHE and CacheConfig is not None:
+        # RESP3 lets the server invalidate the keys cached in the process
+        kwargs.update(
+            protocol=3,
+            cache_config=CacheConfig(max_size=settings.REDIS_CLIENT_CACHE_SIZE),
+        )
+    # threads wait at most REDIS_POOL_TIMEOUT for a connection, then fail
+    return redis.BlockingConnectionPool(
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        timeout=settings.REDIS_POOL_TIMEOUT,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        **kwargs,
     )
 
+
+class Cache:
+    """
+    Redis client shared by the process.
+
+    Commands time out after REDIS_SOCKET_TIMEOUT seconds. get, get_many, set
+    and delete treat an unavailable Redis as a cache miss so a latency spike
+    slows requests down instead of failing them. Commands on _redis raise
+    RedisError, which is answered with a 503 unless the caller handles it.
+    """
+
+    _redis = redis.Redis(connection_pool=_pool())
+
     @staticmethod
     def set(key: str, value: str, ex=settings.APP_SECRET_KEY_EXPIRES_IN) -> None:
-        Cache._redis.set(key, value, ex=ex)
+        try:
+            Cache._redis.set(key, value, ex=ex)
+        except RedisError as e:
+            print("Redis unavailable, skipped set", e)
 
     @staticmethod
     def get(key: str) -> Any:
-        value = Cache._redis.get(key)
+        try:
+            value = Cache._redis.get(key)
+        except RedisError as e:
+            print("Redis unavailable, skipped get", e)
+            return None
         return value.decode() if value else None
 
+    @staticmethod
+    def get_many(keys: list[str]) -> list[Optional[str]]:
+        """
+        Read many keys in a single round trip.
+
+        Returns:
+            the value of each key in the order given, None when missing
+        """
+        if not keys:
+            return []
+        try:
+            values = Cache._redis.mget(keys)
+        except RedisError as e:
+            print("Redis unavailable, skipped get", e)
+            return [None] * len(keys)
+        return [value.decode() if value else None for value in values]
+
     @staticmethod
     def delete(key: str) -> None:
-        Cache._redis.delete(key)
+        try:
+            Cache._redis.delete(key)
+        except RedisError as e:
+            print("Redis unavailable, skipped delete", e)
 
     @staticmethod
     def incr(key: str) -> None:
         Cache._redis.incr(key)
+
+    @staticmethod
+    def pipeline(transaction: bool = False) -> redis.client.Pipeline:
+        """
+        Batch commands into a single round trip, run by its execute().
+        """
+        return Cache._redis.pipeline(transaction=transaction)
+
+    @staticmethod
+    def subscriber() -> redis.client.PubSub:
+        """
+        A pubsub on a connection of its own without a read timeout, as
+        subscriptions wait for messages indefinitely.
+        """
+        return redis.Redis(
+            socket_keepalive=True, **_connection_kwargs()
+        ).pubsub(ignore_subscribe_messages=True)
+
+    @staticmethod
+    def get_pool_status() -> dict[str, Any]:
+        pool = Cache._redis.connection_pool
+        idle = sum(1 for connection in list(pool.pool.queue) if connection)
+        created = len(pool._connections)
+        return {
+            "max_connections": pool.max_connections,
+            "created": created,
+            "in_use": created - idle,
+            "idle": idle,
+        }
@@ -0,0 +1,131 @@
+import functools
+import json
+import time
+from typing import Any, Callable
+
+from redis.exceptions import RedisError
+
+from config.setting import settings
+from utils.redis import Cache
+from utils.session import DBSession, after_commit
+
+STATS_KEY = "report_cache_stats"
+
+
+class ReportCache:
+    """
+    Read-through Redis cache for report results.
+
+    Every report depends on tags naming the data it reads, e.g. "orders".
+    Each tag has a version counter in Redis which is part of the cache key,
+    so invalidating a tag bumps its version and every report depending on it
+    misses on its next read. A miss is recomputed by a single worker holding
+    a short lock while the others wait for its result.
+    """
+
+    reports: dict[str, tuple[str, ...]] = {}
+
+    @staticmethod
+    def cached(name: str, tags: tuple[str, ...], ttl: int = None) -> Callable:
+        """
+        Cache the results of a report.
+
+        Args:
+            name: the name of the report, used in keys and counters
+            tags: the tags whose invalidation makes the results stale
+            ttl: seconds the results are kept, REPORT_CACHE_TTL by default
+        """
+        ReportCache.reports[name] = tags
+
+        def decorator(report: Callable) -> Callable:
+            @functools.wraps(report)
+            def wrapper(*args, **kwargs) -> Any:
+                if not settings.REPORT_CACHE_ENABLED:
+                    return report(*args, **kwargs)
+                try:
+                    key = ReportCache._key(name, tags, args, kwargs)
+                    return ReportCache._read_through(
+                        name, key, ttl or settings.REPORT_CACHE_TTL,
+                        lambda: report(*args, **kwargs),
+                    )
+                except RedisError as e:
+                    print("Redis unavailable, report computed uncached", e)
+                    return report(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    @staticmethod
+    def invalidate(*tags: str) -> None:
+        """
+        Mark the reports depending on the tags as stale.
+
+        Within a request unit of work the tags are only bumped once its
+        transaction commits, so a report recomputed meanwhile cannot cache
+        the data as it was before the write.
+        """
+        with DBSession() as db:
+            after_commit(db, lambda: ReportCache._bump(tags))
+
+    @staticmethod
+    def stats() -> dict[str, dict[str, int]]:
+        counters = {
+            field.decode(): int(value)
+            for field, value in Cache._redis.hgetall(STATS_KEY).items()
+        }
+        return {
+            name: {
+                "hits": counters.get(f"{name}:hits", 0),
+                "misses": counters.get(f"{name}:misses", 0),
+            }
+            for name in ReportCache.reports
+        }
+
+    @staticmethod
+    def _bump(tags) -> None:
+        if not tags:
+            return
+        pipeline = Cache.pipeline()
+        for tag in tags:
+            pipeline.incr(f"report_tag_{tag}")
+        try:
+            pipeline.execute()
+        except RedisError as e:
+            # the reports are stale until their REPORT_CACHE_TTL expires
+            print("Redis unavailable, reports not invalidated", tags, e)
+
+    @staticmethod
+    def _key(name: str, tags: tuple[str, ...], args: tuple, kwargs: dict) -> str:
+        versions = Cache._redis.mget([f"report_tag_{tag}" for tag in tags])
+        version = ".".join((value or b"0").decode() for value in versions)
+        arguments = json.dumps([args, kwargs], default=str, sort_keys=True)
+        return f"report_{name}_{version}_{arguments}"
+
+    @staticmethod
+    def _read_through(name: str, key: str, ttl: int, compute: Callable) -> Any:
+        cached = Cache.get(key)
+        if cached is not None:
+            Cache._redis.hincrby(STATS_KEY, f"{name}:hits")
+            return json.loads(cached)
+
+        lock = f"{key}_lock"
+        lock_ttl = settings.REPORT_CACHE_LOCK_TIMEOUT
+        deadline = time.monotonic() + lock_ttl
+        locked = Cache._redis.set(lock, 1, nx=True, ex=lock_ttl)
+        while not locked and time.monotonic() < deadline:
+            # another worker is computing the report, wait for its result
+            time.sleep(0.05)
+            cached = Cache.get(key)
+            if cached is not None:
+                Cache._redis.hincrby(STATS_KEY, f"{name}:hits")
+                return json.loads(cached)
+            locked = Cache._redis.set(lock, 1, nx=True, ex=lock_ttl)
+
+        Cache._redis.hincrby(STATS_KEY, f"{name}:misses")
+        try:
+            result = compute()
+            Cache.set(key, json.dumps(result, default=str), ex=ttl)
+        finally:
+            if locked:
+                Cache.delete(lock)
+        return result
+
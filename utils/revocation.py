@@ -0,0 +1,164 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from redis.exceptions import RedisError
+
+from config.setting import settings
+from utils.redis import Cache
+
+NOT_BEFORE_KEY = "auth_not_before"
+REVOCATION_CHANNEL = "auth_revocations"
+# published on REVOCATION_CHANNEL, followed by the staff id, when a principal
+# changes
+PRINCIPAL_CHANGED = "principal:"
+
+
+def _milliseconds(not_before: int) -> int:
+    # revocations recorded before were in seconds, below 10**11 until 5138
+    return not_before * 1000 if not_before < 10**11 else not_before
+
+
+class RevocationList:
+    """
+    Per staff "not before" timestamps used to revoke stateless tokens, in
+    milliseconds so a token issued in the second of a revocation, but after
+    it, is told apart from those issued before.
+
+    The timestamps are kept in a Redis hash and cached in a small local LRU.
+    A listener thread applies revocations published by other workers as they
+    happen, and cached entries expire after AUTH_REVOCATION_CACHE_TTL seconds
+    so a worker that missed a message is stale for at most that long.
+    """
+
+    _entries: "OrderedDict[int, tuple[int, float]]" = OrderedDict()
+    _lock = threading.Lock()
+    _listener: Optional[threading.Thread] = None
+
+    @staticmethod
+    def revoked(staff_id: int, issued_at: float) -> bool:
+        """
+        Whether a token issued at ``issued_at``, in seconds since the epoch,
+        was issued before the tokens of its staff member were revoked.
+        """
+        return round(issued_at * 1000) < RevocationList.not_before(staff_id)
+
+    @staticmethod
+    def not_before(staff_id: int) -> int:
+        RevocationList._listen()
+        with RevocationList._lock:
+            entry = RevocationList._entries.get(staff_id)
+            if entry and time.monotonic() - entry[1] < settings.AUTH_REVOCATION_CACHE_TTL:
+                RevocationList._entries.move_to_end(staff_id)
+                return entry[0]
+        value = Cache._redis.hget(NOT_BEFORE_KEY, staff_id)
+        not_before = _milliseconds(int(value)) if value else 0
+        RevocationList._remember(staff_id, not_before)
+        return not_before
+
+    @staticmethod
+    def revoke(staff_id: int) -> None:
+        """
+        Revoke every token issued to a staff member before now.
+        """
+        not_before = int(time.time() * 1000)
+        Cache._redis.hset(NOT_BEFORE_KEY, staff_id, not_before)
+        Cache._redis.publish(REVOCATION_CHANNEL, f"{staff_id}:{not_before}")
+        RevocationList._remember(staff_id, not_before)
+
+    @staticmethod
+    def _remember(staff_id: int, not_before: int) -> None:
+        with RevocationList._lock:
+            RevocationList._entries[staff_id] = (not_before, time.monotonic())
+            RevocationList._entries.move_to_end(staff_id)
+            while len(RevocationList._entries) > settings.AUTH_REVOCATION_CACHE_SIZE:
+                RevocationList._entries.popitem(last=False)
+
+    @staticmethod
+    def _listen() -> None:
+        if RevocationList._listener is not None:
+            return
+        with RevocationList._lock:
+            if RevocationList._listener is not None:
+                return
+            RevocationList._listener = threading.Thread(
+                target=RevocationList._subscribe,
+                name="auth-revocations",
+                daemon=True,
+            )
+            RevocationList._listener.start()
+
+    @staticmethod
+    def _subscribe() -> None:
+        while True:
+            pubsub = Cache.subscriber()
+            try:
+                pubsub.subscribe(REVOCATION_CHANNEL)
+                # messages may have been missed while not subscribed
+                with RevocationList._lock:
+                    RevocationList._entries.clear()
+                PrincipalCache.clear()
+                for message in pubsub.listen():
+                    data = message["data"].decode()
+                    if data.startswith(PRINCIPAL_CHANGED):
+                        PrincipalCache.drop(int(data[len(PRINCIPAL_CHANGED):]))
+                        continue
+                    staff_id, not_before = data.split(":")
+                    RevocationList._remember(
+                        int(staff_id), _milliseconds(int(not_before))
+                    )
+            except RedisError:
+                time.sleep(1)
+            finally:
+                pubsub.close()
+
+
+class PrincipalCache:
+    """
+    Principals kept in the process for stateless verification, so a request
+    of a staff member seen recently makes no Redis round trip at all.
+
+    A change of principal is published on the channel of the revocations and
+    dropped by every worker as it happens. Like revocations, entries expire
+    after AUTH_REVOCATION_CACHE_TTL seconds for workers that missed it.
+    """
+
+    _entries: "OrderedDict[int, tuple[Any, float]]" = OrderedDict()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def get(staff_id: int) -> Any:
+        RevocationList._listen()
+        with PrincipalCache._lock:
+            entry = PrincipalCache._entries.get(staff_id)
+            if entry and time.monotonic() - entry[1] < settings.AUTH_REVOCATION_CACHE_TTL:
+                PrincipalCache._entries.move_to_end(staff_id)
+                return entry[0]
+        return None
+
+    @staticmethod
+    def put(staff_id: int, principal: Any) -> None:
+        with PrincipalCache._lock:
+            PrincipalCache._entries[staff_id] = (principal, time.monotonic())
+            PrincipalCache._entries.move_to_end(staff_id)
+            while len(PrincipalCache._entries) > settings.AUTH_REVOCATION_CACHE_SIZE:
+                PrincipalCache._entries.popitem(last=False)
+
+    @staticmethod
+    def invalidate(staff_id: int) -> None:
+        """
+        Drop the principal of a staff member from every worker.
+        """
+        PrincipalCache.drop(staff_id)
+        Cache._redis.publish(REVOCATION_CHANNEL, f"{PRINCIPAL_CHANGED}{staff_id}")
+
+    @staticmethod
+    def drop(staff_id: int) -> None:
+        with PrincipalCache._lock:
+            PrincipalCache._entries.pop(staff_id, None)
+
+    @staticmethod
+    def clear() -> None:
+        with PrincipalCache._lock:
+            PrincipalCache._entries.clear()
@@ -1,15 +1,153 @@
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Callable, Optional
+
+from anyio import CapacityLimiter, to_thread
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 
-from core.setup import DatabaseSetup
+from config.setting import settings
+from core.setup import database
+
+PENDING_CALLBACKS = "after_commit_callbacks"
+
+# session owned by the unit of work of the request being served, if any
+_request_session: ContextVar[Optional[Session]] = ContextVar(
+    "request_session", default=None
+)
+# units of work open and threads ending them, created with the event loop
+# running
+_open: Optional[CapacityLimiter] = None
+_ending: Optional[CapacityLimiter] = None
+
+
+def request_connections() -> int:
+    """
+    The connections of the pool requests may hold at once, those kept for
+    the report query threads, which open sessions of their own, aside.
+    """
+    return max(
+        settings.DB_POOL_SIZE
+        + settings.DB_MAX_OVERFLOW
+        - settings.REPORT_QUERY_CONCURRENCY,
+        1,
+    )
 
 
 class DBSession:
-    def __init__(self) -> None:
-        self._db_init = DatabaseSetup()
-        self._db = self._db_init.get_session()
+    """
+    Session for a block of work, reusing the request unit of work if any.
+
+    Args:
+        shared: set to False to always open a private session, e.g. for
+            work outliving the request unit of work such as streamed bodies
+    """
+
+    def __init__(self, shared: bool = True) -> None:
+        self._db = database.get_session()
+        self._shared = shared
+        self._session = None
 
     def __enter__(self) -> Session:
-        return self._db()
+        shared_session = _request_session.get() if self._shared else None
+        if shared_session is not None:
+            return shared_session
+        self._session = self._db()
+        return self._session
 
     def __exit__(self, exc_type, exc_value, traceback) -> None:
-        self._db().close()
+        if self._session is not None:
+            self._session.close()
+
+
+def in_unit_of_work(db: Session) -> bool:
+    return db is _request_session.get()
+
+
+def commit(db: Session, *instances: Any) -> None:
+    """
+    Commit the work done on a session and refresh the given instances.
+
+    When the session belongs to a request unit of work the changes are only
+    flushed, the request commits them all at once when it completes.
+    """
+    if in_unit_of_work(db):
+        db.flush()
+    else:
+        db.commit()
+    for instance in instances:
+        db.refresh(instance)
+
+
+def after_commit(db: Session, callback: Callable[[], Any]) -> None:
+    """
+    Run ``callback`` once the work done on a session is committed.
+
+    Within a request unit of work it is held until its transaction commits,
+    and dropped should it roll back, so side effects outside the database
+    such as cache invalidations never act on changes which may not persist.
+    Outside of one the work is committed already and it runs right away.
+    """
+    if in_unit_of_work(db):
+        if not db.in_transaction():
+            # so that a rollback before any statement drops the callback too
+            db.begin()
+        db.info.setdefault(PENDING_CALLBACKS, []).append(callback)
+    else:
+        callback()
+
+
+@event.listens_for(Session, "after_commit")
+def _run_pending_callbacks(session: Session) -> None:
+    for callback in session.info.pop(PENDING_CALLBACKS, []):
+        try:
+            callback()
+        except Exception as e:
+            # the transaction is committed, only the side effect is lost
+            print("After commit callback failed", callback, e)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_pending_callbacks(session: Session, previous_transaction) -> None:
+    # unlike after_rollback, also fired when no statement was run yet
+    if not previous_transaction.nested:
+        session.info.pop(PENDING_CALLBACKS, None)
+
+
+async def unit_of_work() -> AsyncIterator[Session]:
+    """
+    Request dependency sharing one session and one transaction between every
+    DBSession opened while the request is served.
+
+    Only as many requests as the pool has connections for them hold a unit
+    of work at once, the others wait here before taking a handler thread. A request
+    waiting for a connection on a handler thread could otherwise hold the
+    thread the request holding the connection needs to serialize its
+    response, and neither would go on until DB_POOL_TIMEOUT.
+    """
+    global _open
+    if _open is None:
+        _open = CapacityLimiter(request_connections())
+    async with _open:
+        session = database.get_session()()
+        token = _request_session.set(session)
+        try:
+            yield session
+            await _end(session.commit)
+        except Exception:
+            await _end(session.rollback)
+            raise
+        finally:
+            _request_session.reset(token)
+            await _end(session.close)
+
+
+async def _end(work: Callable[[], Any]) -> None:
+    """
+    Run the end of a unit of work on threads of its own rather than on the
+    handler thread pool, so a connection is given back without waiting for
+    a handler thread.
+    """
+    global _ending
+    if _ending is None:
+        _ending = CapacityLimiter(request_connections())
+    await to_thread.run_sync(work, limiter=_ending)
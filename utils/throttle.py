@@ -0,0 +1,123 @@
+import math
+
+from redis.exceptions import RedisError
+
+from config.setting import settings
+from utils.redis import Cache
+
+# counts an attempt on every key, starting the window of a key on its first
+# attempt, and returns the milliseconds until the attempts are allowed again
+# on the keys over their limit, 0 when none is
+HIT = """
+local retry_after = 0
+for i, key in ipairs(KEYS) do
+    local attempts = redis.call("INCR", key)
+    if attempts == 1 then
+        redis.call("PEXPIRE", key, ARGV[1])
+    end
+    if attempts > tonumber(ARGV[i + 1]) then
+        retry_after = math.max(retry_after, redis.call("PTTL", key))
+    end
+end
+return retry_after
+"""
+
+# takes an attempt back from every key, dropping the keys left without any
+REFUND = """
+for i, key in ipairs(KEYS) do
+    if redis.call("DECR", key) <= 0 then
+        redis.call("DEL", key)
+    end
+end
+return 0
+"""
+
+
+class Throttle:
+    """
+    Fixed window attempt counters in Redis.
+
+    An attempt is counted on all its keys by a single Lua call, so concurrent
+    attempts cannot slip past a limit between reading and writing a counter.
+
+    The throttle fails open: while Redis answers with a RedisError, attempts
+    are neither counted nor refused, so an outage cannot lock everybody out.
+    """
+
+    _hit = Cache._redis.register_script(HIT)
+    _refund = Cache._redis.register_script(REFUND)
+
+    @staticmethod
+    def hit(limits: dict[str, int], window: int) -> int:
+        """
+        Count an attempt.
+
+        Args:
+            limits: the attempts allowed per window on each key
+            window: seconds a window lasts, from the first attempt on a key
+
+        Returns:
+            seconds until the attempts are allowed again, 0 when the attempt
+            is within every limit
+        """
+        try:
+            retry_after = Throttle._hit(
+                keys=list(limits),
+                args=[window * 1000, *limits.values()],
+                client=Cache._redis,
+            )
+        except RedisError as e:
+            # an unavailable Redis must not lock everybody out
+            print("Redis unavailable, attempt not throttled", e)
+            return 0
+        return math.ceil(int(retry_after) / 1000)
+
+    @staticmethod
+    def refund(*keys: str) -> None:
+        """
+        Take back an attempt which should not count towards the limits.
+        """
+        try:
+            Throttle._refund(keys=list(keys), client=Cache._redis)
+        except RedisError as e:
+            print("Redis unavailable, attempt not refunded", e)
+
+
+class LoginThrottle:
+    """
+    Limits failed logins per staff id number, and per client IP when
+    LOGIN_IP_MAX_ATTEMPTS is set.
+
+    The client IP is the one forwarded by the proxies of FORWARDED_ALLOW_IPS,
+    behind any other proxy it is the proxy's, shared by every client, and
+    the limit per IP would lock everybody out at once.
+    """
+
+    @staticmethod
+    def keys(staff_id_number: str, client_ip: str = None) -> dict[str, int]:
+        limits = {
+            f"login_attempts_{staff_id_number}": settings.LOGIN_MAX_ATTEMPTS
+        }
+        if client_ip and settings.LOGIN_IP_MAX_ATTEMPTS:
+            limits[f"login_attempts_ip_{client_ip}"] = settings.LOGIN_IP_MAX_ATTEMPTS
+        return limits
+
+    @staticmethod
+    def attempt(staff_id_number: str, client_ip: str = None) -> int:
+        """
+        Count a login attempt, before the credentials are checked.
+
+        Returns:
+            seconds until logins are allowed again, 0 when this one is
+        """
+        return Throttle.hit(
+            LoginThrottle.keys(staff_id_number, client_ip),
+            settings.LOGIN_THROTTLE_WINDOW,
+        )
+
+    @staticmethod
+    def succeeded(staff_id_number: str, client_ip: str = None) -> None:
+        """
+        Take a successful login back, so only failed ones count.
+        """
+        Throttle.refund(*LoginThrottle.keys(staff_id_number, client_ip))
@@ -0,0 +1,56 @@
+import csv
+import io
+import json
+import tempfile
+from typing import Any, AsyncIterator, BinaryIO, Iterator, Optional
+
+from fastapi import Request
+
+from config.setting import settings
+from utils.enum import ImportFormat
+
+
+async def spooled_body(request: Request) -> AsyncIterator[BinaryIO]:
+    """
+    The request body as a file, kept in memory up to UPLOAD_SPOOL_SIZE bytes
+    and spooled to disk past it, so large uploads can be read row by row.
+    """
+    body = tempfile.SpooledTemporaryFile(max_size=settings.UPLOAD_SPOOL_SIZE)
+    try:
+        async for chunk in request.stream():
+            body.write(chunk)
+        body.seek(0)
+        yield body
+    finally:
+        body.close()
+
+
+def read_rows(
+    file: BinaryIO, import_format: ImportFormat
+) -> Iterator[tuple[int, Optional[dict[str, Any]]]]:
+    """
+    Read the rows of an NDJSON or CSV file one at a time.
+
+    CSV files need a header row naming the columns.
+
+    Yields:
+        the line number of each row and the row, None for an NDJSON line
+        which is not a JSON object
+    """
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    if import_format == ImportFormat.csv:
+        reader = csv.DictReader(text)
+        for row in reader:
+            # columns missing on a short row or beyond the header are dropped
+            yield reader.line_num, {
+                field: value for field, value in row.items() if field and value
+            }
+        return
+    for line, content in enumerate(text, start=1):
+        if not content.strip():
+            continue
+        try:
+            row = json.loads(content)
+        except ValueError:
+            row = None
+        yield line, row if isinstance(row, dict) else None